@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+import os
+import sqlite3
+import sys
+import textwrap
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from backend import parts
+
+DB_PATH = os.environ.get('SENTINEL_DB', '.spatia/sentinel.db')
+
+# Prints the source the witness verifies for an atom. Parts of a split Python
+# file (see backend/parts.py) are indented fragments that do not parse on their
+# own, and a skeleton is missing its definitions, so both are verified as the
+# whole file, composed as materialize would write it.
+
+def atom_source(conn, atom_id):
+    row = conn.execute("SELECT content FROM atoms WHERE id = ?", (atom_id,)).fetchone()
+    if not row:
+        return None
+    path = parts.parent_path(atom_id)
+    if path == atom_id and (not row[0] or parts.MARKER_PREFIX not in row[0]):
+        return row[0]
+
+    parent = conn.execute("SELECT content FROM atoms WHERE id = ?", (path,)).fetchone()
+    if not parent:
+        # Orphaned part: the best that can stand on its own
+        return textwrap.dedent(row[0])
+    # Every part of the file sorts between "path::" and "path:;"
+    prefix = path + parts.PART_SEPARATOR
+    part_contents = dict(conn.execute(
+        "SELECT id, content FROM atoms WHERE id > ? AND id < ?",
+        (prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)),
+    ).fetchall())
+    return parts.compose(path, parent[0], part_contents)
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Usage: spatia-atom-source.py <atom_id>")
+        sys.exit(1)
+    conn = sqlite3.connect(DB_PATH)
+    source = atom_source(conn, sys.argv[1])
+    conn.close()
+    if source is None:
+        sys.exit(1)
+    sys.stdout.write(source)
@@ -4,6 +4,9 @@ import re
 import sys
 import os
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from backend import migrations
+
 DB_PATH = os.environ.get('SENTINEL_DB', '.spatia/sentinel.db')
 
 def check_registers():
@@ -12,11 +15,14 @@ def check_registers():
         return False
         
     conn = sqlite3.connect(DB_PATH)
+    # Older DBs keep fossils (never a collision) in the atoms table
+    migrations.migrate(conn)
+    conn.commit()
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
     # Select all Register atoms
-    cursor.execute("SELECT id, content FROM atoms WHERE domain = 'Register' AND status != 4")
+    cursor.execute("SELECT id, content FROM atoms WHERE domain = 'Register'")
     atoms = cursor.fetchall()
     
     # Format: address -> atom_id
@@ -5,6 +5,9 @@ import shutil
 import argparse
 import sqlite3
 
+# Removed below anyway, and never holds user links
+METADATA_DIR = ".spatia"
+
 def eject_workspace(name, workspaces_dir="workspaces"):
     target_dir = os.path.join(workspaces_dir, name)
     print(f"Ejecting workspace '{name}' from {target_dir}...")
@@ -15,7 +18,11 @@ def eject_workspace(name, workspaces_dir="workspaces"):
 
     # 1. Resolve Symlinks
     print(" resolving symlinks...")
+    # Every tree, ignored ones included: a linked .env or node_modules package
+    # must not keep pointing back into the source project
     for root, dirs, files in os.walk(target_dir):
+        if root == target_dir and METADATA_DIR in dirs:
+            dirs.remove(METADATA_DIR)
         for file in files:
             file_path = os.path.join(root, file)
             if os.path.islink(file_path):
@@ -38,7 +45,7 @@ def eject_workspace(name, workspaces_dir="workspaces"):
 
     # 2. Remove Metadata
     metadata_files = ["sentinel.db", "geometry.sp"]
-    metadata_dirs = [".spatia"]
+    metadata_dirs = [METADATA_DIR]
     
     for f in metadata_files:
         p = os.path.join(target_dir, f)
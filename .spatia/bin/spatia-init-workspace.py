@@ -4,6 +4,9 @@ import sys
 import sqlite3
 import argparse
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from backend import migrations
+
 def init_workspace(name, workspaces_dir="workspaces"):
     target_dir = os.path.join(workspaces_dir, name)
     print(f"Initializing workspace '{name}' in {target_dir}...")
@@ -21,56 +24,9 @@ def init_workspace(name, workspaces_dir="workspaces"):
         with open(geo_path, 'w') as f:
             f.write("; Spatia Geometry Projection\n")
             
-    # Init DB
+    # Init DB (same migrations as the backend)
     conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    
-    # Schema matches backend/main.py lifespan
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS atoms (
-            id TEXT PRIMARY KEY,
-            type TEXT,
-            domain TEXT,
-            content TEXT,
-            status INTEGER DEFAULT 0,
-            hash TEXT,
-            last_witnessed TEXT
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS threads (
-            id TEXT PRIMARY KEY,
-            source TEXT,
-            target TEXT
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS portals (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            atom_id TEXT,
-            path TEXT,
-            description TEXT,
-            created_at TEXT
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS envelopes (
-            id TEXT PRIMARY KEY,
-            domain TEXT,
-            x INTEGER,
-            y INTEGER,
-            w INTEGER,
-            h INTEGER
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS geometry (
-            atom_id TEXT PRIMARY KEY,
-            x INTEGER,
-            y INTEGER
-        )
-    """)
-    
+    migrations.migrate(conn)
     conn.commit()
     conn.close()
     
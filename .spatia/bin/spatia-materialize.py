@@ -1,17 +1,28 @@
 #!/usr/bin/env python3
 import os
 import sqlite3
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from backend import migrations, parts
 
 DB_PATH = '.spatia/sentinel.db'
 
 def init_db():
     conn = sqlite3.connect(DB_PATH)
+    # Older DBs keep fossils in the atoms table; move them out before materializing
+    migrations.migrate(conn)
+    conn.commit()
     return conn
 
 def materialize(conn):
     cursor = conn.cursor()
+    # Fossils live in their own table, so every file atom is a file on disk
     cursor.execute("SELECT id, content FROM atoms WHERE type = 'file'")
     atoms = cursor.fetchall()
+    # Files shattered into sub-atoms are skeletons; their parts fill in the markers
+    cursor.execute("SELECT id, content FROM atoms WHERE type = 'part'")
+    part_contents = dict(cursor.fetchall())
 
     for atom_id, content in atoms:
         # atom_id is the relative path
@@ -25,7 +36,7 @@ def materialize(conn):
             
         try:
             with open(atom_id, 'w', encoding='utf-8') as f:
-                f.write(content)
+                f.write(parts.compose(atom_id, content, part_contents))
             print(f"Materialized: {atom_id}")
         except Exception as e:
             print(f"Error writing {atom_id}: {e}")
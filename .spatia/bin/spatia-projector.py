@@ -5,6 +5,9 @@ import re
 import os
 import sys
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from backend import migrations
+
 # Define color codes
 GREEN = '\033[92m'
 BLUE = '\033[94m'
@@ -89,17 +92,8 @@ def shatter():
     envelopes_count = 0
     threads_count = 0
     
-    # Ensure envelopes table exists (if script run standalone before backend init)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS envelopes (
-            id TEXT PRIMARY KEY,
-            domain TEXT,
-            x INTEGER,
-            y INTEGER,
-            w INTEGER,
-            h INTEGER
-        )
-    """)
+    # Ensure schema (if script run standalone before backend init)
+    migrations.migrate(conn)
     
     with open(PROJECT_FILE, 'r') as f:
         for line in f:
@@ -0,0 +1,138 @@
+import difflib
+import hashlib
+import json
+import zlib
+
+# Content-addressed blob store.
+# Fossils (see the fossils table) keep only the hash of their content; the text itself lives once
+# in the blobs table no matter how many fossils point at it. Live atoms keep their
+# content inline, since every witness and materialize path reads it directly.
+#
+# Blob rows come in three shapes:
+#   content NOT NULL              legacy plain text (written before compression)
+#   data NOT NULL, base NULL      zlib-compressed full text (a keyframe)
+#   data NOT NULL, base = <hash>  zlib-compressed line delta against the newer blob <base>
+#
+# History is stored as reverse deltas: when an atom moves from old to new content,
+# the new content becomes a keyframe and the old content is re-encoded as a delta
+# against it. `chain` records the longest run of deltas that ends at a blob, so a
+# blob is only turned into a delta while every chain through it stays within
+# FOSSIL_KEYFRAME_INTERVAL hops; otherwise it is kept as a keyframe.
+
+FOSSIL_KEYFRAME_INTERVAL = 16
+
+def calculate_hash(content):
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+# --- Delta codec ---
+
+def encode_delta(base, target):
+    """Line-level delta that rebuilds `target` from `base`, zlib-compressed."""
+    base_lines = base.splitlines(keepends=True)
+    target_lines = target.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, base_lines, target_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append(''.join(target_lines[j1:j2]))
+    return zlib.compress(json.dumps(ops, separators=(',', ':')).encode('utf-8'))
+
+def apply_delta(base, delta):
+    base_lines = base.splitlines(keepends=True)
+    out = []
+    for op in json.loads(zlib.decompress(delta).decode('utf-8')):
+        if isinstance(op, str):
+            out.append(op)
+        else:
+            out.extend(base_lines[op[0]:op[1]])
+    return ''.join(out)
+
+def compress(content):
+    return zlib.compress(content.encode('utf-8'))
+
+# --- Store ---
+
+def put_blobs(cursor, contents):
+    """
+    Store each content string once, keyed by its SHA-256, as a compressed keyframe.
+    Returns the hashes in input order.
+    """
+    rows = []
+    for content in contents:
+        content = content if content is not None else ''
+        rows.append((calculate_hash(content), compress(content)))
+    cursor.executemany("INSERT OR IGNORE INTO blobs (hash, data) VALUES (?, ?)", rows)
+    return [row[0] for row in rows]
+
+def put_blob(cursor, content):
+    return put_blobs(cursor, [content])[0]
+
+def get_blob(cursor, blob_hash):
+    """Rebuild a blob's text, following its delta chain to the nearest keyframe."""
+    deltas = []
+    current = blob_hash
+    while True:
+        cursor.execute("SELECT content, data, base FROM blobs WHERE hash = ?", (current,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        content, data, base = row
+        if content is not None:
+            text = content
+            break
+        if base is None:
+            text = zlib.decompress(data).decode('utf-8')
+            break
+        deltas.append(data)
+        current = base
+    for delta in reversed(deltas):
+        text = apply_delta(text, delta)
+    return text
+
+def get_blobs(cursor, hashes):
+    return {blob_hash: get_blob(cursor, blob_hash) for blob_hash in set(hashes)}
+
+def resolve_content(cursor, content, blob_hash):
+    """Inline content wins; blob-backed rows (content NULL) are looked up by hash."""
+    if content is not None:
+        return content
+    return get_blob(cursor, blob_hash)
+
+def make_keyframe(cursor, blob_hash):
+    """Turn a delta-encoded blob back into a full keyframe (used for new heads)."""
+    cursor.execute("SELECT content, base FROM blobs WHERE hash = ?", (blob_hash,))
+    row = cursor.fetchone()
+    if not row or row[0] is not None or row[1] is None:
+        return
+    text = get_blob(cursor, blob_hash)
+    cursor.execute("UPDATE blobs SET data = ?, base = NULL WHERE hash = ?", (compress(text), blob_hash))
+
+def fossilize(cursor, old_content, new_content):
+    """
+    Store the outgoing version of an atom for a fossil row and return its blob hash.
+    The incoming version becomes a keyframe and the outgoing one a delta against it,
+    unless that would push a delta chain past FOSSIL_KEYFRAME_INTERVAL.
+    """
+    old_content = old_content if old_content is not None else ''
+    new_content = new_content if new_content is not None else ''
+    old_hash, new_hash = put_blobs(cursor, [old_content, new_content])
+    if old_hash == new_hash:
+        return old_hash
+    make_keyframe(cursor, new_hash)
+
+    cursor.execute("SELECT base, chain FROM blobs WHERE hash = ?", (old_hash,))
+    base, chain = cursor.fetchone()
+    chain = chain or 0
+    # Already a delta (shared with another history), or too deep: keep it as is
+    if base is not None or chain + 1 > FOSSIL_KEYFRAME_INTERVAL:
+        return old_hash
+
+    delta = encode_delta(new_content, old_content)
+    if len(delta) >= len(compress(old_content)):
+        return old_hash
+
+    cursor.execute("UPDATE blobs SET content = NULL, data = ?, base = ? WHERE hash = ?", (delta, new_hash, old_hash))
+    cursor.execute("UPDATE blobs SET chain = MAX(COALESCE(chain, 0), ?) WHERE hash = ?", (chain + 1, new_hash))
+    return old_hash
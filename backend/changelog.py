@@ -0,0 +1,161 @@
+import sqlite3
+import threading
+
+from backend.db_query import fetch_rows
+
+# Change sequence for delta sync.
+#
+# Triggers (migrations.create_change_log) stamp every insert, update and delete on
+# the mirrored tables into `changes`, one row per table row, with a fresh seq from
+# a monotonically increasing counter. A client that has seen everything up to seq
+# N asks for `changes_since(N)` and gets the current state of each row changed
+# since then, or a tombstone when the row is gone.
+#
+# Rows that existed before the change log are not in it: clients take
+# current_seq() first, then do one full fetch, then pull deltas from that seq.
+# Changes landing in between are delivered twice, which is harmless since every
+# entry is the row's current state.
+
+# Current state of a changed row, by table; fossils are resolved by (atom_id, ts)
+ROW_QUERIES = {
+    "geometry": "SELECT atom_id, x, y FROM geometry WHERE atom_id IN ({placeholders})",
+    "threads": "SELECT id, source, target FROM threads WHERE id IN ({placeholders})",
+    "envelopes": "SELECT id, domain, x, y, w, h FROM envelopes WHERE id IN ({placeholders})",
+    "portals": "SELECT id, atom_id, path, description, created_at FROM portals WHERE id IN ({placeholders})",
+}
+
+def current_seq(conn):
+    """The seq of the latest change (0 before any change)."""
+    return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM changes").fetchone()[0]
+
+def load_fossils(cursor, row_ids):
+    rows = {}
+    for row_id in row_ids:
+        # Timestamps never contain '@', atom IDs might
+        atom_id, _, ts = row_id.rpartition('@')
+        cursor.execute("SELECT atom_id, ts, hash, type, domain, last_witnessed, x, y FROM fossils WHERE atom_id = ? AND ts = ?", (atom_id, ts))
+        row = cursor.fetchone()
+        if row is not None:
+            rows[row_id] = dict(row)
+    return rows
+
+def changes_since(conn, since, limit, atom_query):
+    """
+    Up to `limit` changes after seq `since`, oldest first, as
+    {seq, table, id, deleted, row}. `atom_query` selects atom rows for a
+    {placeholders} list of IDs, with the ID as its first column (the caller
+    decides the projection). Requires a sqlite3.Row row factory.
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT seq, tbl, row_id FROM changes WHERE seq > ? ORDER BY seq LIMIT ?", (since, limit))
+    entries = cursor.fetchall()
+
+    by_table = {}
+    for _, table, row_id in entries:
+        by_table.setdefault(table, set()).add(row_id)
+
+    current = {}
+    for table, row_ids in by_table.items():
+        if table == "fossils":
+            current[table] = load_fossils(cursor, row_ids)
+            continue
+        query = atom_query if table == "atoms" else ROW_QUERIES[table]
+        # Logged IDs are text; portal IDs are integers
+        current[table] = {str(row[0]): dict(row) for row in fetch_rows(cursor, query, row_ids)}
+
+    changes = []
+    for seq, table, row_id in entries:
+        row = current[table].get(row_id)
+        changes.append({"seq": seq, "table": table, "id": row_id, "deleted": row is None, "row": row})
+    return changes
+
+# --- Typed change events ---
+#
+# ChangeFeed.poll() turns what the log gained since the previous poll into typed
+# SSE events carrying the affected IDs:
+#
+#     atom_changed / atom_removed        atoms
+#     geometry_changed                   geometry (moved or placed atoms)
+#     fossil_added / fossil_removed      fossils ("<atom_id>@<ts>" IDs)
+#     thread_added / thread_removed      threads (added ones carry source/target)
+#     envelope_changed / envelope_removed
+#     portal_added / portal_removed
+#
+# Writes the backend announces itself call announce(conn, keys) inside their
+# transaction, so the feed skips their echoes. Keys are ("atom", id) (covering the
+# atom's geometry and fossils too), ("thread", id) or ("envelope", id).
+
+EVENT_TYPES = {
+    "atoms": ("atom_changed", "atom_removed"),
+    "geometry": ("geometry_changed", "geometry_changed"),
+    "fossils": ("fossil_added", "fossil_removed"),
+    "threads": ("thread_added", "thread_removed"),
+    "envelopes": ("envelope_changed", "envelope_removed"),
+    "portals": ("portal_added", "portal_removed"),
+}
+
+ATOM_ID_QUERY = "SELECT id FROM atoms WHERE id IN ({placeholders})"
+
+def announce_key(table, row_id):
+    if table == "fossils":
+        return ("atom", row_id.rpartition('@')[0])
+    if table in ("atoms", "geometry"):
+        return ("atom", row_id)
+    return (table[:-1], row_id)
+
+class ChangeFeed:
+    def __init__(self, batch=1000):
+        self.batch = batch
+        self.seq = None
+        self._lock = threading.Lock()
+        # key -> seq of the latest change the backend announced itself
+        self._announced = {}
+
+    def reset(self):
+        """Start over from the current seq on the next poll (e.g. after a workspace switch)."""
+        with self._lock:
+            self.seq = None
+            self._announced.clear()
+
+    def announce(self, conn, keys):
+        """Mark changes made so far in conn's open write transaction as already announced."""
+        try:
+            seq = current_seq(conn)
+        except sqlite3.OperationalError:
+            # Not migrated yet: no change log, so nothing to echo
+            return
+        # Writes are serialized, so a later announcement never has a lower seq
+        with self._lock:
+            for key in keys:
+                self._announced[key] = seq
+
+    def poll(self, conn):
+        """Events for changes since the previous poll (runs on a DB thread, one poll at a time)."""
+        seq = current_seq(conn)
+        if self.seq is None or seq < self.seq:
+            # First poll, or another database: nothing to compare against
+            self.seq = seq
+            return []
+
+        events = {}
+        while self.seq < seq:
+            changes = changes_since(conn, self.seq, self.batch, ATOM_ID_QUERY)
+            if not changes:
+                break
+            with self._lock:
+                for change in changes:
+                    if self._announced.get(announce_key(change["table"], change["id"]), -1) >= change["seq"]:
+                        continue
+                    event_type = EVENT_TYPES[change["table"]][change["deleted"]]
+                    event = events.setdefault(event_type, {"type": event_type, "ids": []})
+                    event["ids"].append(change["id"])
+                    if event_type == "thread_added":
+                        event.setdefault("threads", []).append(change["row"])
+            self.seq = changes[-1]["seq"]
+
+        # Announcements at or below the delivered seq cannot match later changes
+        with self._lock:
+            self._announced = {key: s for key, s in self._announced.items() if s > self.seq}
+        for event in events.values():
+            event["seq"] = self.seq
+        return list(events.values())
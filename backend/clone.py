@@ -0,0 +1,199 @@
+import errno
+import os
+import shutil
+import threading
+import time
+import uuid
+
+from backend import snapshots
+
+# Reflinks are a Linux ioctl; elsewhere files are copied
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Workspace cloning as a cancellable job with progress.
+#
+# Each file of the source workspace is copied the cheapest way that keeps the
+# two workspaces independent:
+#   sentinel.db, sentinel.snapshots.db   the backup API (see backend/snapshots.py):
+#                                        consistent while the source is in use,
+#                                        WAL included; -wal/-shm files are skipped
+#   sentinel.snap.*.db                   hardlinked: full snapshots are never
+#                                        written after creation
+#   everything else                      a reflink (FICLONE: btrfs, XFS, ...) when
+#                                        the filesystem shares extents, else
+#                                        copy_file_range (in-kernel, and itself
+#                                        copy-on-write on some filesystems), else
+#                                        a plain read/write copy
+#
+# The clone is built in a hidden directory next to the target and renamed into
+# place when complete, so a failed or cancelled clone leaves nothing behind.
+
+FICLONE = 0x40049409
+COPY_CHUNK = 8 * 1024 * 1024
+# Bigger steps than a snapshot's: a third faster, still a cancel check every 16 MiB
+BACKUP_PAGES = 4096
+BACKUP_DBS = ("sentinel.db", snapshots.STORE_NAME)
+SKIPPED_SUFFIXES = ("-wal", "-shm", "-journal", ".tmp")
+# Unsupported or cross-device: try the next method instead
+FALLBACK_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTTY, errno.EBADF, errno.EPERM}
+
+class Cancelled(Exception):
+    pass
+
+def plan(src_path):
+    """(relative path, method, size) for every file to clone, following symlinks as copytree does."""
+    files = []
+    for root, dirs, names in os.walk(src_path, followlinks=True):
+        dirs.sort()
+        for name in sorted(names):
+            path = os.path.join(root, name)
+            rel = os.path.relpath(path, src_path)
+            if name.endswith(SKIPPED_SUFFIXES):
+                continue
+            if rel in BACKUP_DBS:
+                method = "backup"
+            elif snapshots.FULL_PATTERN.match(rel):
+                method = "hardlink"
+            else:
+                method = "copy"
+            files.append((rel, method, os.path.getsize(path)))
+    return files
+
+def reflink(src_fd, dst_fd):
+    if fcntl is None:
+        return False
+    try:
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+        return True
+    except OSError as e:
+        if e.errno in FALLBACK_ERRNOS:
+            return False
+        raise
+
+def copy_file(src, dst, progress, check):
+    """
+    Copy src to dst, reporting bytes via progress(n) and calling check() between
+    chunks. Returns the method that did the work.
+    """
+    with open(src, "rb") as fin, open(dst, "wb") as fout:
+        if reflink(fin.fileno(), fout.fileno()):
+            progress(os.fstat(fin.fileno()).st_size)
+            method = "reflink"
+        else:
+            method = "copy_file_range" if hasattr(os, "copy_file_range") else "copy"
+            while method == "copy_file_range":
+                check()
+                try:
+                    n = os.copy_file_range(fin.fileno(), fout.fileno(), COPY_CHUNK)
+                except OSError as e:
+                    if e.errno not in FALLBACK_ERRNOS:
+                        raise
+                    # Carry on from the current offsets
+                    method = "copy"
+                    break
+                if not n:
+                    break
+                progress(n)
+            if method == "copy":
+                while chunk := fin.read(COPY_CHUNK):
+                    check()
+                    fout.write(chunk)
+                    progress(len(chunk))
+    shutil.copystat(src, dst)
+    return method
+
+class CloneJob:
+    # Seconds between progress reports
+    progress_interval = 0.2
+
+    def __init__(self, source, target, src_path, target_path):
+        self.id = uuid.uuid4().hex[:12]
+        self.source, self.target = source, target
+        self.src_path, self.target_path = src_path, target_path
+        self.status = "pending"
+        self.error = None
+        self.done = 0
+        self.total = 0
+        self.methods = {}
+        self._cancel = threading.Event()
+        self._last_report = 0.0
+
+    def as_dict(self):
+        return {
+            "job": self.id,
+            "source": self.source,
+            "target": self.target,
+            "status": self.status,
+            "done": self.done,
+            "total": self.total,
+            "methods": dict(self.methods),
+            "error": self.error,
+        }
+
+    def cancel(self):
+        self._cancel.set()
+
+    def check(self):
+        if self._cancel.is_set():
+            raise Cancelled()
+
+    def run(self, on_progress=None):
+        """Do the clone (blocking). on_progress(job) is called at most every progress_interval."""
+        self.status = "running"
+        work_path = os.path.join(os.path.dirname(self.target_path), f".{os.path.basename(self.target_path)}.clone-{self.id}")
+
+        def advance(n):
+            self.done += n
+            now = time.monotonic()
+            if on_progress and now - self._last_report >= self.progress_interval:
+                self._last_report = now
+                on_progress(self)
+
+        try:
+            files = plan(self.src_path)
+            self.total = sum(size for _, _, size in files)
+            os.makedirs(work_path)
+            for rel, method, size in files:
+                self.check()
+                src, dst = os.path.join(self.src_path, rel), os.path.join(work_path, rel)
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                if method == "hardlink":
+                    try:
+                        os.link(src, dst)
+                        advance(size)
+                    except OSError:
+                        method = copy_file(src, dst, advance, self.check)
+                elif method == "backup":
+                    method = self._backup(src, dst, size, advance)
+                else:
+                    method = copy_file(src, dst, advance, self.check)
+                self.methods[method] = self.methods.get(method, 0) + 1
+            self.check()
+            os.rename(work_path, self.target_path)
+            self.status = "done"
+        except Cancelled:
+            self.status = "cancelled"
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+        finally:
+            if self.status != "done":
+                shutil.rmtree(work_path, ignore_errors=True)
+        return self.status
+
+    def _backup(self, src, dst, size, advance):
+        copied = [0]
+
+        def progress(remaining, total):
+            # Pages, scaled onto the file's size (the WAL can make the DB bigger)
+            self.check()
+            now = size * (total - remaining) // total if total else size
+            advance(now - copied[0])
+            copied[0] = now
+
+        snapshots.backup(src, dst, pages=BACKUP_PAGES, progress=progress)
+        advance(size - copied[0])
+        return "backup"
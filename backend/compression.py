@@ -0,0 +1,116 @@
+import asyncio
+import gzip
+
+from starlette.datastructures import Headers, MutableHeaders
+
+# Optional codecs: used when installed, otherwise gzip only
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Response compression, negotiated from Accept-Encoding.
+#
+# Only complete bodies are compressed: a response whose first body message says
+# more follows (SSE, file streams) passes through untouched, as does anything
+# below the size threshold or already encoded. Levels favour speed: payloads are
+# JSON over a local or LAN link, where a fast codec wins over a dense one.
+
+def _gzip(data):
+    return gzip.compress(data, compresslevel=1, mtime=0)
+
+# Server preference, best first
+ENCODERS = {}
+if zstandard is not None:
+    ENCODERS["zstd"] = zstandard.ZstdCompressor(level=3).compress
+if brotli is not None:
+    ENCODERS["br"] = lambda data: brotli.compress(data, quality=4)
+ENCODERS["gzip"] = _gzip
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+# Bodies at least this big are compressed on a worker thread, off the event loop
+THREAD_THRESHOLD = 256 * 1024
+
+def negotiate(accept_encoding, encoders=ENCODERS):
+    """The encoder name to use for an Accept-Encoding header value, or None."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[name] = q
+
+    best, best_q = None, 0.0
+    for name in encoders:
+        q = weights.get(name, weights.get("*", 0.0))
+        # Ties go to the server's preference (dict order)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+def is_compressible(content_type):
+    return content_type is not None and content_type.startswith(COMPRESSIBLE_TYPES)
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size=1024):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                # Held until the first body message shows whether the body is complete
+                start = message
+                return
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            start_message, start = start, None
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            if not is_compressible(headers.get("content-type")) or "content-encoding" in headers:
+                await send(start_message)
+                await send(message)
+                return
+            headers.add_vary_header("Accept-Encoding")
+            if encoding is None or message.get("more_body", False) or len(body) < self.minimum_size:
+                await send(start_message)
+                await send(message)
+                return
+
+            encoder = ENCODERS[encoding]
+            if len(body) >= THREAD_THRESHOLD:
+                body = await asyncio.get_running_loop().run_in_executor(None, encoder, body)
+            else:
+                body = encoder(body)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            # Same entity, different bytes: a strong validator no longer applies
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = "W/" + etag
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -1,32 +1,158 @@
 import asyncio
+import collections
+import itertools
 import json
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Optional
+
+# Per-client SSE queues are bounded, so a stalled browser tab cannot grow one
+# without limit. When a client's queue is full its overflow policy decides:
+#   drop_oldest   the oldest queued event makes room (the client misses it)
+#   coalesce      a queued event about the same thing (same type and id) is
+#                 superseded by the new one; with nothing to supersede, the
+#                 client is disconnected as below
+#   disconnect    the queue is emptied and the client gets a single
+#                 resync_required event, after which its stream ends; the
+#                 frontend reconnects and refetches everything
+# broadcast() only appends to queues and never awaits a client, so one slow
+# consumer cannot hold up the others.
+
+POLICIES = ("drop_oldest", "coalesce", "disconnect")
+RESYNC_REQUIRED = {"type": "resync_required"}
+# What an event is about, for coalescing: the first of these fields it has
+IDENTITY_FIELDS = ("atom_id", "atom_ids", "id", "ids", "job", "workspace")
+
+def format_event(data: Dict[str, Any]) -> str:
+    return f"data: {json.dumps(data)}\n\n"
+
+def coalesce_key(data: Dict[str, Any]) -> str:
+    for field in IDENTITY_FIELDS:
+        if field in data:
+            return json.dumps([data.get("type"), field, data[field]])
+    return json.dumps([data.get("type")])
+
+class ClientQueue:
+    """A bounded queue of SSE payloads for one client, with its depth metrics."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, maxsize: int = 256, policy: str = "coalesce"):
+        if maxsize < 1:
+            raise ValueError("SSE queue size must be at least 1")
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown SSE overflow policy '{policy}' (expected one of {', '.join(POLICIES)})")
+        self.id = next(self._ids)
+        self.maxsize = maxsize
+        self.policy = policy
+        self.connected_at = time.time()
+        self.closed = False
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.high_water = 0
+        self._items = collections.deque()  # (coalesce key, payload)
+        self._ready = asyncio.Event()
+
+    def qsize(self) -> int:
+        return len(self._items)
+
+    def empty(self) -> bool:
+        return not self._items
+
+    def put_nowait(self, payload: str, key: Optional[str] = None) -> bool:
+        """Queue payload, applying the overflow policy. False once the client has to resync."""
+        if self.closed:
+            return False
+        if len(self._items) >= self.maxsize:
+            if self.policy == "drop_oldest":
+                self._items.popleft()
+                self.dropped += 1
+            elif self.policy == "coalesce" and self._supersede(key):
+                self.coalesced += 1
+            else:
+                self._close()
+                return False
+        self._items.append((key, payload))
+        self.high_water = max(self.high_water, len(self._items))
+        self._ready.set()
+        return True
+
+    async def get(self) -> Optional[str]:
+        """The next payload; None once the stream should end (after resync_required)."""
+        while not self._items:
+            if self.closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        self.sent += 1
+        return self._items.popleft()[1]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "policy": self.policy,
+            "depth": len(self._items),
+            "maxsize": self.maxsize,
+            "high_water": self.high_water,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "closed": self.closed,
+            "connected_s": round(time.time() - self.connected_at, 1),
+        }
+
+    def _supersede(self, key: Optional[str]) -> bool:
+        # Newest first: an event just queued is the likeliest to be superseded
+        if key is None:
+            return False
+        for i in range(len(self._items) - 1, -1, -1):
+            if self._items[i][0] == key:
+                del self._items[i]
+                return True
+        return False
+
+    def _close(self):
+        self.dropped += len(self._items)
+        self._items.clear()
+        self._items.append((None, format_event(RESYNC_REQUIRED)))
+        self.closed = True
+        self._ready.set()
 
 class ConnectionManager:
-    def __init__(self):
-        self.clients: List[asyncio.Queue] = []
+    def __init__(self, maxsize: int = 256, policy: str = "coalesce"):
+        # Fail at startup rather than on the first connection
+        ClientQueue(maxsize, policy)
+        self.maxsize = maxsize
+        self.policy = policy
+        self.clients: List[ClientQueue] = []
         self.lock = asyncio.Lock()
+        self.resyncs = 0
 
-    async def connect(self) -> asyncio.Queue:
-        queue = asyncio.Queue()
+    async def connect(self) -> ClientQueue:
+        queue = ClientQueue(self.maxsize, self.policy)
         async with self.lock:
             self.clients.append(queue)
         return queue
 
-    async def disconnect(self, queue: asyncio.Queue):
+    async def disconnect(self, queue: ClientQueue):
         async with self.lock:
             if queue in self.clients:
                 self.clients.remove(queue)
 
     async def broadcast(self, data: Dict[str, Any]):
-        payload = f"data: {json.dumps(data)}\n\n"
-        # Snapshot clients to avoid holding lock during iteration if we wanted, 
-        # but asyncio lists are thread-safe(ish) in single event loop.
-        # However, it's safer to copy the list or iterate directly if we are careful.
-        # Let's use the lock to safe-guard the list access.
-        
-        async with self.lock:
-            current_clients = list(self.clients)
-            
-        for queue in current_clients:
-            await queue.put(payload)
+        payload = format_event(data)
+        key = coalesce_key(data)
+        # No awaits in here: the client list cannot change under us, and no
+        # client's queue can make the others wait
+        for queue in list(self.clients):
+            if not queue.put_nowait(payload, key):
+                self.clients.remove(queue)
+                self.resyncs += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "maxsize": self.maxsize,
+            "resyncs": self.resyncs,
+            "clients": [queue.as_dict() for queue in self.clients],
+        }
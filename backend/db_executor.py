@@ -0,0 +1,72 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+# Async access to the sentinel DB.
+#
+# Handlers never touch sqlite on the event loop. They hand a plain function
+# `func(conn, *args)` to one of two executors:
+#
+#     await db.read(func, ...)   # pool of reader threads, run concurrently (WAL)
+#     await db.write(func, ...)  # one writer thread, so writes never contend
+#     await db.write_raw(func, ...)  # the writer thread, no transaction (VACUUM, checkpoints)
+#
+# A write runs inside `with conn:` as one BEGIN IMMEDIATE transaction: committed
+# when func returns, rolled back when it raises. Each thread uses its own pooled
+# connection (see db_pool.py), so a slow query or a lock wait only ever blocks a
+# DB thread, never SSE delivery.
+
+READERS = int(os.environ.get('SPATIA_DB_READERS', '4'))
+
+class DatabaseExecutor:
+    def __init__(self, connect, readers=READERS):
+        self.connect = connect
+        self.readers = readers
+        self._lock = threading.Lock()
+        self._reader = None
+        self._writer = None
+
+    def _executors(self):
+        # Created lazily, so shutdown() at the end of one app lifespan does not
+        # break the next one (tests run many lifespans in a process)
+        with self._lock:
+            if self._writer is None:
+                self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='spatia-db-writer')
+                self._reader = ThreadPoolExecutor(max_workers=self.readers, thread_name_prefix='spatia-db-reader')
+            return self._reader, self._writer
+
+    def _read(self, func, args, kwargs):
+        return func(self.connect(), *args, **kwargs)
+
+    def _write(self, func, args, kwargs):
+        conn = self.connect()
+        with conn:
+            if not conn.in_transaction:
+                # Take the write lock up front: a read-then-write never fails to
+                # upgrade, and no other writer commits in the middle of ours
+                conn.execute("BEGIN IMMEDIATE")
+            return func(conn, *args, **kwargs)
+
+    async def read(self, func, *args, **kwargs):
+        reader, _ = self._executors()
+        return await asyncio.get_running_loop().run_in_executor(reader, partial(self._read, func, args, kwargs))
+
+    async def write(self, func, *args, **kwargs):
+        _, writer = self._executors()
+        return await asyncio.get_running_loop().run_in_executor(writer, partial(self._write, func, args, kwargs))
+
+    async def write_raw(self, func, *args, **kwargs):
+        """On the writer thread but outside a transaction, for statements that can't run in one."""
+        _, writer = self._executors()
+        return await asyncio.get_running_loop().run_in_executor(writer, partial(self._read, func, args, kwargs))
+
+    def shutdown(self):
+        """Wait for queued work and stop the DB threads (their connections become orphans for the pool to close)."""
+        with self._lock:
+            reader, writer = self._reader, self._writer
+            self._reader = self._writer = None
+        for executor in (writer, reader):
+            if executor is not None:
+                executor.shutdown(wait=True)
@@ -0,0 +1,116 @@
+import os
+import sqlite3
+import threading
+from typing import Dict, Optional, Tuple
+
+# Connection settings applied once per pooled connection
+PRAGMAS = (
+    ("journal_mode", "WAL"),       # readers never block the writer
+    ("synchronous", "NORMAL"),     # safe with WAL, no fsync per commit
+    ("busy_timeout", "5000"),      # wait for the CLI scripts' write locks instead of failing
+    ("mmap_size", "268435456"),    # 256 MiB of the DB file read through mmap
+    ("temp_store", "MEMORY"),
+)
+CACHED_STATEMENTS = 256
+
+class ConnectionPool:
+    """
+    Per-thread SQLite connections, opened on first use and reused afterwards.
+
+    Connections are thread-affine: each thread (the event loop, every executor
+    worker) gets its own, so no connection is ever used by two threads at once.
+    A connection is reopened when the database path changes, when the file it
+    points to is replaced (workspace switch swaps the symlink, tests recreate the
+    file), or after reset().
+
+    A connection is only ever closed by its own thread, or once that thread has
+    exited: closing it under a thread that is still stepping a statement crashes
+    the interpreter. Stale connections of live threads are closed by their owner
+    on its next connection() call.
+    """
+
+    def __init__(self, pragmas=PRAGMAS, cached_statements=CACHED_STATEMENTS):
+        self.pragmas = pragmas
+        self.cached_statements = cached_statements
+        self.generation = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._open: Dict[int, Tuple[threading.Thread, sqlite3.Connection]] = {}
+        self.opened = 0  # Total connections opened, for health/tests
+
+    @staticmethod
+    def identity(path) -> Tuple[int, int]:
+        st = os.stat(path)
+        return (st.st_dev, st.st_ino)
+
+    def _open_connection(self, path) -> sqlite3.Connection:
+        conn = sqlite3.connect(path, check_same_thread=False, cached_statements=self.cached_statements)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas:
+            conn.execute(f"PRAGMA {name} = {value}")
+        with self._lock:
+            self._open[id(conn)] = (threading.current_thread(), conn)
+            self.opened += 1
+        self._close_orphans()
+        return conn
+
+    def _close_orphans(self):
+        # Connections of threads that have exited (short-lived portal/worker threads)
+        with self._lock:
+            orphans = [key for key, (thread, _) in self._open.items() if not thread.is_alive()]
+            conns = [self._open.pop(key)[1] for key in orphans]
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def _discard(self, conn):
+        with self._lock:
+            self._open.pop(id(conn), None)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def connection(self, path) -> sqlite3.Connection:
+        """This thread's connection to `path` (raises FileNotFoundError if it is gone)."""
+        key = (os.path.abspath(path), self.identity(path), self.generation)
+        conn: Optional[sqlite3.Connection] = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.key == key:
+            return conn
+        if conn is not None:
+            self._discard(conn)
+            self._local.conn = None
+        conn = self._open_connection(path)
+        self._local.conn, self._local.key = conn, key
+        return conn
+
+    def reset(self):
+        """Invalidate every pooled connection; the calling thread's is closed now."""
+        with self._lock:
+            self.generation += 1
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._discard(conn)
+            self._local.conn = None
+
+    def close_all(self):
+        """
+        Close this thread's connection and those of exited threads, and invalidate
+        the rest so their threads reopen on next use. Called at shutdown.
+        """
+        self.reset()
+        self._close_orphans()
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._open)
+
+def checkpoint(path):
+    """Copy the WAL back into the database file so the file alone is complete."""
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
@@ -0,0 +1,18 @@
+# Query helpers shared by modules that batch lookups by ID (shatter, changelog).
+
+# Bound parameters per IN (...) lookup, well below SQLite's limit
+IN_CHUNK_SIZE = 500
+
+def fetch_rows(cursor, query, ids):
+    """
+    Run `query`, whose "{placeholders}" stands for the contents of an IN (...)
+    list, over `ids` in chunks; returns every row.
+    """
+    ids = list(ids)
+    rows = []
+    for i in range(0, len(ids), IN_CHUNK_SIZE):
+        chunk = ids[i:i + IN_CHUNK_SIZE]
+        placeholders = ", ".join("?" * len(chunk))
+        cursor.execute(query.format(placeholders=placeholders), chunk)
+        rows.extend(cursor.fetchall())
+    return rows
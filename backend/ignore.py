@@ -0,0 +1,233 @@
+import os
+import re
+
+# Ignore rules shared by the tree walkers that read project content (shatter and
+# the tree watcher). Eject walks everything: it must resolve every link.
+#
+# Rules come from three places, checked in this order:
+#   1. DEFAULT_RULES       Sentinel's own state and tool caches; always ignored and
+#                          cannot be re-included, so shatter never reads its own DB.
+#   2. .gitignore          at the root and in any subdirectory (scoped to that directory),
+#                          plus .git/info/exclude.
+#   3. .ctxignore          project-specific context rules, same syntax as .gitignore.
+#
+# Each rule file is compiled once into a handful of regexes: consecutive patterns with
+# the same sign (ignore / negate) are joined into a single alternation, and the runs
+# are tried from last to first, so "last matching pattern wins" costs one regex search
+# per run instead of one per pattern. Directories are matched before they are entered,
+# which lets walk() prune whole subtrees.
+
+RULE_FILES = ('.gitignore', '.ctxignore')
+
+DEFAULT_RULES = (
+    '.git/', '.hg/', '.svn/', '.spatia/', '.agent/', '.devbox/', 'node_modules/', '__pycache__/',
+    '.pytest_cache/', '.mypy_cache/', '.venv/', '.coverage', 'test-results/',
+    '.DS_Store', '.env', 'sentinel.db', 'sentinel.db-journal', 'sentinel.db-wal', 'sentinel.db-shm',
+    # Editor swap and backup files
+    '*.sw[px]', '*~',
+)
+
+def translate(pattern):
+    """Translate one gitignore glob (already stripped of '!' and trailing '/') to a regex."""
+    anchored = '/' in pattern
+    pattern = pattern.lstrip('/')
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern.startswith('**', i):
+                at_start = i == 0 or pattern[i - 1] == '/'
+                i += 2
+                if at_start and pattern.startswith('/', i):
+                    out.append('(?:.*/)?')   # "**/" matches zero or more directories
+                    i += 1
+                else:
+                    out.append('.*')
+                continue
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i + 2 if pattern.startswith('[!', i) or pattern.startswith('[^', i) else i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    prefix = '' if anchored else '(?:.*/)?'
+    return prefix + ''.join(out)
+
+def parse_rules(lines):
+    """Yield (regex, negate, dir_only) for each pattern line, in file order."""
+    for line in lines:
+        line = line.rstrip('\n')
+        if not line.endswith('\\ '):
+            line = line.rstrip()
+        if not line or line.startswith('#'):
+            continue
+        negate = line.startswith('!')
+        if negate:
+            line = line[1:]
+        elif line.startswith('\\'):
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            continue
+        yield translate(line), negate, dir_only
+
+def signature(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+class RuleSet:
+    """Compiled patterns from one rule file, matched against paths relative to its directory."""
+
+    def __init__(self, lines):
+        self.runs = []
+        current = None
+        for regex, negate, dir_only in parse_rules(lines):
+            if current is None or current[0] != negate:
+                current = (negate, [], [])
+                self.runs.append(current)
+            (current[2] if dir_only else current[1]).append(regex)
+        self.runs = [
+            (negate, self._compile(any_type), self._compile(any_type + dir_only))
+            for negate, any_type, dir_only in reversed(self.runs)
+        ]
+
+    @staticmethod
+    def _compile(patterns):
+        return re.compile('(?:' + '|'.join(patterns) + r')\Z') if patterns else None
+
+    def match(self, rel_path, is_dir):
+        """True/False when a rule decides `rel_path`, None when no rule applies."""
+        for negate, files, dirs in self.runs:
+            regex = dirs if is_dir else files
+            if regex is not None and regex.match(rel_path):
+                return not negate
+        return None
+
+    @classmethod
+    def from_file(cls, path):
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                return cls(f.readlines())
+        except OSError:
+            return None
+
+class IgnoreMatcher:
+    """Ignore rules for one project root. Paths are '/'-separated and relative to root."""
+
+    def __init__(self, root='.', rule_files=RULE_FILES):
+        self.root = os.path.abspath(root)
+        self.rule_files = rule_files
+        self.defaults = RuleSet(DEFAULT_RULES)
+        self._dir_rules = {}    # rel dir -> [RuleSet] declared in that directory
+        self._verdicts = {}     # rel dir -> ignored?
+        self._sources = {}      # every rule file consulted -> its signature when read
+        # Root rules apply to every path; reading them now also lets load() notice edits
+        self.rules_for('')
+
+    def rules_for(self, rel_dir):
+        """Rule sets declared in `rel_dir` ('' is the root), loaded on first use."""
+        rules = self._dir_rules.get(rel_dir)
+        if rules is None:
+            rules = []
+            directory = os.path.join(self.root, rel_dir)
+            sources = [os.path.join(directory, name) for name in self.rule_files]
+            if rel_dir == '':
+                sources.insert(1, os.path.join(self.root, '.git', 'info', 'exclude'))
+            for source in sources:
+                # Missing files too: creating one must invalidate the matcher
+                self._sources[source] = signature(source)
+                rule_set = RuleSet.from_file(source)
+                if rule_set is not None and rule_set.runs:
+                    rules.append(rule_set)
+            self._dir_rules[rel_dir] = rules
+        return rules
+
+    def _match(self, rel_path, is_dir):
+        if self.defaults.match(rel_path, is_dir):
+            return True
+        # Deeper rule files override shallower ones, later files override earlier ones
+        parent = rel_path.rpartition('/')[0]
+        scopes = ['']
+        if parent:
+            parts = parent.split('/')
+            scopes += ['/'.join(parts[:i + 1]) for i in range(len(parts))]
+        for scope in reversed(scopes):
+            local = rel_path[len(scope) + 1:] if scope else rel_path
+            for rule_set in reversed(self.rules_for(scope)):
+                verdict = rule_set.match(local, is_dir)
+                if verdict is not None:
+                    return verdict
+        return False
+
+    def is_dir_ignored(self, rel_dir):
+        verdict = self._verdicts.get(rel_dir)
+        if verdict is None:
+            parent = rel_dir.rpartition('/')[0]
+            verdict = (bool(parent) and self.is_dir_ignored(parent)) or self._match(rel_dir, True)
+            self._verdicts[rel_dir] = verdict
+        return verdict
+
+    def is_ignored(self, rel_path, is_dir=False):
+        """True when `rel_path` or any directory above it is ignored."""
+        rel_path = rel_path.replace(os.sep, '/').strip('/')
+        if not rel_path or rel_path == '.':
+            return False
+        if rel_path == '..' or rel_path.startswith('../'):
+            return True
+        if is_dir:
+            return self.is_dir_ignored(rel_path)
+        parent = rel_path.rpartition('/')[0]
+        if parent and self.is_dir_ignored(parent):
+            return True
+        return self._match(rel_path, False)
+
+    def walk(self, top=None):
+        """os.walk() over `top` (default: root) that never enters ignored directories
+        and drops ignored files from each listing."""
+        top = self.root if top is None else os.path.abspath(top)
+        for dirpath, dirs, files in os.walk(top):
+            rel_dir = os.path.relpath(dirpath, self.root).replace(os.sep, '/')
+            prefix = '' if rel_dir == '.' else rel_dir + '/'
+            dirs[:] = [d for d in dirs if not self.is_dir_ignored(prefix + d)]
+            files[:] = [f for f in files if not self._match(prefix + f, False)]
+            yield dirpath, dirs, files
+
+    def is_current(self):
+        """False once a rule file it consulted was created, changed or removed."""
+        return all(signature(source) == seen for source, seen in list(self._sources.items()))
+
+    def is_rule_file(self, rel_path):
+        return os.path.basename(rel_path) in self.rule_files
+
+    def watch_filter(self, change, path):
+        """watchfiles filter: accept changes to files that are not ignored."""
+        rel_path = os.path.relpath(path, self.root)
+        return not self.is_ignored(rel_path)
+
+_cache = {}
+
+def load(root='.'):
+    """Matcher for `root`, reused until one of the rule files it consulted changes."""
+    root = os.path.abspath(root)
+    matcher = _cache.get(root)
+    if matcher is None or not matcher.is_current():
+        matcher = _cache[root] = IgnoreMatcher(root)
+    return matcher
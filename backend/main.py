@@ -2,35 +2,125 @@ import asyncio # Touch to force reload
 import json
 from typing import Optional, List, Dict, Any
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException, Body, BackgroundTasks, Request
+from fastapi import FastAPI, HTTPException, Body, BackgroundTasks, Query, Request
 from fastapi.responses import StreamingResponse, Response, JSONResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
 import os
 import sqlite3
-import subprocess
 import datetime
-import shutil
-from pydantic import BaseModel
+import hashlib
+from pydantic import BaseModel, Field
 
 from watchfiles import awatch
 from backend.projector import Projector
+from backend import blobs, changelog, clone, compression, db_executor, db_pool, fastjson, ignore, maintenance, migrations, readmodel, search, shatter, snapshots
 
 projector = Projector()
 
 DB_PATH = '.spatia/sentinel.db'
-SHATTER_SCRIPT = '.spatia/bin/spatia-shatter.py'
+
+# Per-thread connections to DB_PATH (see backend/db_pool.py)
+pool = db_pool.ConnectionPool()
+
+# All DB work runs here, off the event loop (see backend/db_executor.py)
+db = db_executor.DatabaseExecutor(lambda: get_db_connection())
+
+# Optional project tree watcher (continuous shatter)
+TREE_WATCH_ENABLED = os.environ.get('SPATIA_TREE_WATCH', '0') == '1'
+TREE_WATCH_DEBOUNCE_MS = int(os.environ.get('SPATIA_TREE_WATCH_DEBOUNCE_MS', '300'))
+
+# Responses at least this big are compressed (see backend/compression.py)
+COMPRESS_MIN_BYTES = int(os.environ.get('SPATIA_COMPRESS_MIN_BYTES', '1024'))
+
+# Change-log poll interval (a MAX(seq) lookup when nothing changed)
+DB_WATCH_INTERVAL = int(os.environ.get('SPATIA_DB_WATCH_MS', '250')) / 1000
+
+# Typed events for DB changes, minus those the backend announced itself (see backend/changelog.py)
+feed = changelog.ChangeFeed()
+
+# Atom metadata, threads and envelopes in memory, kept current from the change log (see backend/readmodel.py)
+graph = readmodel.ReadModel()
+
+# Part of every ETag: the change seq alone does not tell workspaces apart
+etag_epoch = os.urandom(4).hex()
+
+# Background DB upkeep (see backend/maintenance.py): every MAINTENANCE_INTERVAL
+# seconds (0 = on demand only), once no request came in for MAINTENANCE_IDLE
+MAINTENANCE_INTERVAL = int(os.environ.get('SPATIA_MAINTENANCE_INTERVAL_S', '3600'))
+MAINTENANCE_IDLE = int(os.environ.get('SPATIA_MAINTENANCE_IDLE_S', '30'))
+# Fossil retention: the newest SPATIA_FOSSIL_KEEP_LAST per atom (0 = keep all),
+# older ones thinned per SPATIA_FOSSIL_THIN (age:interval tiers)
+FOSSIL_RETENTION = maintenance.RetentionPolicy.parse(
+    os.environ.get('SPATIA_FOSSIL_KEEP_LAST', '50'),
+    os.environ.get('SPATIA_FOSSIL_THIN', '7d:1d,90d:1w'),
+)
+
+activity = maintenance.Activity()
+maintainer = maintenance.Scheduler(db, activity, FOSSIL_RETENTION, interval=MAINTENANCE_INTERVAL, idle_after=MAINTENANCE_IDLE)
 
 async def watch_sentinel_db():
     print(f"Starting Sentinel DB Watcher on {DB_PATH}...")
     try:
-        # Debounce/Batched updates are handled by awatch yielding a set of changes
-        async for changes in awatch(DB_PATH, step=500): # Check every 500ms
-            print(f"Sentinel DB Changed: {changes}")
-            # Broadcast a generic 'db_update' event to trigger refetch
-            await broadcast_event({"type": "db_update"})
+        while True:
+            try:
+                events = await db.read(feed.poll)
+            except (sqlite3.Error, HTTPException):
+                # No database (yet), or one still missing the change log
+                events = []
+            for event in events:
+                await broadcast_event(event)
+            await asyncio.sleep(DB_WATCH_INTERVAL)
     except Exception as e:
         print(f"Watcher Error: {e}")
 
+def place_atoms(conn, atom_ids):
+    # New atoms need geometry to show up on the canvas
+    conn.executemany("INSERT OR IGNORE INTO geometry (atom_id, x, y) VALUES (?, 0, 0)", [(a,) for a in atom_ids])
+
+def announce_atoms(conn, atom_ids):
+    # The caller broadcasts these atoms itself; keep the change feed from echoing them
+    feed.announce(conn, [("atom", atom_id) for atom_id in atom_ids])
+
+def reshatter_and_place(conn, paths: List[str]) -> List[str]:
+    # The caller's transaction: atoms, geometry and announcements commit together
+    result = shatter.shatter_paths(conn, paths, commit=False)
+    place_atoms(conn, result['atom_ids'])
+    announce_atoms(conn, result['atom_ids'])
+    return result['atom_ids']
+
+async def reshatter_paths(paths: List[str]) -> List[str]:
+    """
+    Re-shatter just the given project-relative paths on the DB writer and
+    announce exactly the atoms whose content changed.
+    """
+    atom_ids = await db.write(reshatter_and_place, paths)
+    for atom_id in atom_ids:
+        await broadcast_event({"type": "update", "atom_id": atom_id})
+    return atom_ids
+
+async def watch_project_tree(root: str = "."):
+    project_root = os.path.abspath(root)
+    print(f"Starting Project Tree Watcher on {project_root}...")
+    # Same ignore rules as shatter, so ignored trees never wake the watcher
+    matcher = ignore.IgnoreMatcher(project_root)
+
+    def watch_filter(change, path):
+        return matcher.watch_filter(change, path)
+
+    try:
+        # awatch debounces: a burst of edits arrives as one set of changes
+        async for changes in awatch(project_root, watch_filter=watch_filter, debounce=TREE_WATCH_DEBOUNCE_MS, step=50):
+            paths = sorted({os.path.relpath(path, project_root) for _, path in changes})
+            if any(matcher.is_rule_file(path) for path in paths):
+                matcher = ignore.IgnoreMatcher(project_root)
+            try:
+                atom_ids = await reshatter_paths(paths)
+                print(f"Tree Watcher: {len(paths)} path(s) changed, {len(atom_ids)} atom(s) updated")
+            except (HTTPException, sqlite3.Error, OSError) as e:
+                print(f"Tree Watcher: Shatter failed: {getattr(e, 'detail', e)}")
+    except Exception as e:
+        print(f"Tree Watcher Error: {e}")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: Reset Zombie Atoms (Status 2 -> 1)
@@ -51,75 +141,41 @@ async def lifespan(app: FastAPI):
             # Table probably doesn't exist yet, which is fine
             pass
         
-        # 2. Ensure Schema
-        
-        # Ensure atoms table exists (missing from original lifespan, maybe it was manual?)
-        # Adding it for completeness/tests
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS atoms (
-                id TEXT PRIMARY KEY,
-                type TEXT,
-                domain TEXT,
-                content TEXT,
-                status INTEGER DEFAULT 0,
-                hash TEXT,
-                last_witnessed TEXT
-            )
-        """)
-
-        # Ensure threads table exists
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS threads (
-                id TEXT PRIMARY KEY,
-                source TEXT,
-                target TEXT
-            )
-        """)
-        
-        # Ensure portals table exists
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS portals (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                atom_id TEXT,
-                path TEXT,
-                description TEXT,
-                created_at TEXT
-            )
-        """)
-
-        # Ensure envelopes table exists (Phase II)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS envelopes (
-                id TEXT PRIMARY KEY,
-                domain TEXT,
-                x INTEGER,
-                y INTEGER,
-                w INTEGER,
-                h INTEGER
-            )
-        """)
-        
-        # Ensure geometry table (used in main.py but not in original setup?)
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS geometry (
-                atom_id TEXT PRIMARY KEY,
-                x INTEGER,
-                y INTEGER
-            )
-        """)
-        
+        # 2. Ensure Schema (every entry point shares backend/migrations.py)
+        migrations.migrate(conn)
         conn.commit()
+
         conn.close()
     except Exception as e:
         print(f"Startup Error: Failed to init DB: {e}")
     
     # Start Background Watcher
-    global watcher_task
+    global watcher_task, tree_watcher_task, maintenance_task
     watcher_task = asyncio.create_task(watch_sentinel_db())
+    if TREE_WATCH_ENABLED:
+        tree_watcher_task = asyncio.create_task(watch_project_tree())
+    if MAINTENANCE_INTERVAL > 0:
+        maintenance_task = asyncio.create_task(maintainer.run_forever())
     
     yield
     
     # Shutdown
+    if maintenance_task:
+        maintenance_task.cancel()
+        try:
+            await maintenance_task
+        except asyncio.CancelledError:
+            print("Maintenance Scheduler Stopped")
+        maintenance_task = None
+
+    if tree_watcher_task:
+        tree_watcher_task.cancel()
+        try:
+            await tree_watcher_task
+        except asyncio.CancelledError:
+            print("Project Tree Watcher Stopped")
+        tree_watcher_task = None
+
     watcher_task.cancel()
     try:
         await watcher_task
@@ -131,9 +187,16 @@ async def lifespan(app: FastAPI):
     except asyncio.CancelledError:
         print("Sentinel Watcher Stopped")
 
+    # Stop the DB threads, then close the connections they leave behind
+    await run_in_thread(db.shutdown)
+    pool.close_all()
+
 # Refactored Connection Manager
 from backend.connection_manager import ConnectionManager
-manager = ConnectionManager()
+# Events a client may fall behind by, and what happens past that (see backend/connection_manager.py)
+SSE_QUEUE_SIZE = int(os.environ.get('SPATIA_SSE_QUEUE_SIZE', '256'))
+SSE_OVERFLOW = os.environ.get('SPATIA_SSE_OVERFLOW', 'coalesce')
+manager = ConnectionManager(SSE_QUEUE_SIZE, SSE_OVERFLOW)
 
 async def broadcast_event(data: dict):
     await manager.broadcast(data)
@@ -147,6 +210,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_headers=["*"],
 )
+app.add_middleware(compression.CompressionMiddleware, minimum_size=COMPRESS_MIN_BYTES)
+app.add_middleware(maintenance.ActivityMiddleware, activity=activity)
 
 from fastapi import Request
 from fastapi.responses import JSONResponse
@@ -162,12 +227,16 @@ async def run_in_thread(func, *args, **kwargs):
 # Global Locks
 workspace_lock = asyncio.Lock()
 watcher_task: Optional[asyncio.Task] = None
+tree_watcher_task: Optional[asyncio.Task] = None
+maintenance_task: Optional[asyncio.Task] = None
 
 @app.get("/api/workspaces")
 async def get_workspaces():
     workspaces = []
     if os.path.exists("workspaces"):
         for name in os.listdir("workspaces"):
+            if name.startswith("."):
+                continue  # Clones still being built
             ws_path = os.path.join("workspaces", name)
             if os.path.isdir(ws_path):
                 # Only include if it has sentinel.db (i.e. it is a Spatia workspace)
@@ -239,6 +308,25 @@ async def switch_workspace(req: WorkspaceSwitch):
             
         print(f"Symlinks updated to {target_ws}")
 
+        # Drop connections to the previous workspace's database
+        pool.reset()
+        feed.reset()
+        global etag_epoch
+        etag_epoch = os.urandom(4).hex()
+
+        # Workspaces created by older versions may be behind on schema
+        try:
+            await db.write(migrations.migrate)
+        except Exception as e:
+            print(f"Migration Error: {e}")
+
+        # Rebuild the read model from the new workspace now rather than on the first request
+        graph.reset()
+        try:
+            await db.read(graph.sync)
+        except Exception as e:
+            print(f"Read Model Error: {e}")
+
         # 3. Restart Watcher
         watcher_task = asyncio.create_task(watch_sentinel_db())
         
@@ -262,35 +350,112 @@ async def create_workspace(req: WorkspaceSwitch):
     
     return {"status": "created", "workspace": name, "output": output}
 
-@app.post("/api/workspaces/{name}/snapshot")
-async def snapshot_workspace(name: str):
+class SnapshotRequest(BaseModel):
+    format: str = Field(default="full", pattern="^(full|incremental)$")
+
+def workspace_db(name: str) -> str:
     ws_path = os.path.join("workspaces", name)
     if not os.path.isdir(ws_path):
         raise HTTPException(status_code=404, detail="Workspace not found")
-        
-    db_path = os.path.join(ws_path, "sentinel.db")
-    if not os.path.exists(db_path):
+    if not os.path.exists(os.path.join(ws_path, "sentinel.db")):
         raise HTTPException(status_code=404, detail="Sentinel DB not found in workspace")
-        
-    timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-    snap_path = os.path.join(ws_path, f"sentinel.snap.{timestamp}.db")
-    
+    return ws_path
+
+@app.post("/api/workspaces/{name}/snapshot")
+async def snapshot_workspace(name: str, req: Optional[SnapshotRequest] = None):
+    ws_path = workspace_db(name)
+    format = req.format if req else "full"
+
     try:
-        await run_in_thread(shutil.copy2, db_path, snap_path)
+        # Backup API: a consistent copy (WAL included) that doesn't hold up writers
+        snapshot = await run_in_thread(snapshots.take, ws_path, format)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to snapshot: {e}")
-        
-    return {"status": "snapshotted", "workspace": name, "snapshot": f"sentinel.snap.{timestamp}.db"}
+
+    name_on_disk = f"sentinel.snap.{snapshot['id']}.db" if format == "full" else snapshot["id"]
+    return {"status": "snapshotted", "workspace": name, "snapshot": name_on_disk, **snapshot}
+
+@app.get("/api/workspaces/{name}/snapshots")
+async def list_snapshots(name: str):
+    ws_path = workspace_db(name)
+    return await run_in_thread(snapshots.list_snapshots, ws_path)
+
+def is_active_workspace(ws_path: str) -> bool:
+    return os.path.exists(DB_PATH) and os.path.realpath(DB_PATH) == os.path.realpath(os.path.join(ws_path, "sentinel.db"))
+
+@app.post("/api/workspaces/{name}/snapshots/{snapshot_id}/restore")
+async def restore_snapshot(name: str, snapshot_id: str):
+    ws_path = workspace_db(name)
+    async with workspace_lock:
+        try:
+            format = await run_in_thread(snapshots.restore, ws_path, snapshot_id)
+        except snapshots.SnapshotNotFound:
+            raise HTTPException(status_code=404, detail="Snapshot not found")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to restore: {e}")
+
+        if is_active_workspace(ws_path):
+            # Same file, different history: start over as after a workspace switch
+            pool.reset()
+            feed.reset()
+            global etag_epoch
+            etag_epoch = os.urandom(4).hex()
+            try:
+                await db.write(migrations.migrate)
+            except Exception as e:
+                print(f"Migration Error: {e}")
+            graph.reset()
+            try:
+                await db.read(graph.sync)
+            except Exception as e:
+                print(f"Read Model Error: {e}")
+            await broadcast_event({"type": "world_reset"})
+
+    return {"status": "restored", "workspace": name, "snapshot": snapshot_id, "format": format}
+
+@app.delete("/api/workspaces/{name}/snapshots/{snapshot_id}")
+async def delete_snapshot(name: str, snapshot_id: str):
+    ws_path = workspace_db(name)
+    try:
+        format = await run_in_thread(snapshots.delete, ws_path, snapshot_id)
+    except snapshots.SnapshotNotFound:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return {"status": "deleted", "workspace": name, "snapshot": snapshot_id, "format": format}
 
 class CloneRequest(BaseModel):
     new_name: Optional[str] = None
 
+# Clone jobs by id; finished ones are kept (the latest CLONE_JOBS_KEPT) for status lookups
+clone_jobs: Dict[str, clone.CloneJob] = {}
+CLONE_JOBS_KEPT = 20
+
+def clone_event(job: clone.CloneJob, event_type: str) -> dict:
+    return {"type": event_type, **job.as_dict()}
+
+async def run_clone(job: clone.CloneJob):
+    loop = asyncio.get_running_loop()
+
+    def report(job):
+        # Called on the worker thread
+        asyncio.run_coroutine_threadsafe(broadcast_event(clone_event(job, "clone_progress")), loop)
+
+    await broadcast_event(clone_event(job, "clone_started"))
+    status = await run_in_thread(job.run, report)
+    await broadcast_event(clone_event(job, f"clone_{status}"))
+
+    finished = [job_id for job_id, j in clone_jobs.items() if j.status not in ("pending", "running")]
+    for job_id in finished[:-CLONE_JOBS_KEPT]:
+        del clone_jobs[job_id]
+
 @app.post("/api/workspaces/{name}/clone")
-async def clone_workspace(name: str, req: CloneRequest = Body(default=None)):
+async def clone_workspace(name: str, req: CloneRequest = Body(default=None), wait: bool = True):
     src_path = os.path.join("workspaces", name)
     if not os.path.isdir(src_path):
          raise HTTPException(status_code=404, detail="Workspace not found")
-         
+
+    # Targets of clones still in flight are taken, though not on disk yet
+    pending = {job.target for job in clone_jobs.values() if job.status in ("pending", "running")}
+
     if req and req.new_name:
         target_name = req.new_name
     else:
@@ -301,22 +466,51 @@ async def clone_workspace(name: str, req: CloneRequest = Body(default=None)):
     # Handle collision if auto-generated, or error if explicit?
     # If explicit name provided, we should probably fail if it exists or handle it?
     # Let's keep collision handling for auto, but for explicit, let's fail if exists to be safe/clear.
-    if req and req.new_name and os.path.exists(target_path):
+    if req and req.new_name and (os.path.exists(target_path) or target_name in pending):
          raise HTTPException(status_code=409, detail="Target workspace already exists")
     
     # Auto-generation collision handling
     counter = 1
-    while os.path.exists(target_path):
+    while os.path.exists(target_path) or target_name in pending:
         target_name = f"{name}-copy-{counter}"
         target_path = os.path.join("workspaces", target_name)
         counter += 1
+
+    job = clone.CloneJob(name, target_name, src_path, target_path)
+    clone_jobs[job.id] = job
+    task = asyncio.create_task(run_clone(job))
+    if not wait:
+        # Follow it through the clone_* SSE events or GET /api/clones/{job}
+        return JSONResponse(status_code=202, content={"status": "cloning", "source": name, "target": target_name, "job": job.id})
+
+    await asyncio.shield(task)
+    if job.status == "cancelled":
+        raise HTTPException(status_code=409, detail="Clone cancelled")
+    if job.status != "done":
+        raise HTTPException(status_code=500, detail=f"Failed to clone: {job.error}")
         
-    try:
-        await run_in_thread(shutil.copytree, src_path, target_path)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to clone: {e}")
-        
-    return {"status": "cloned", "source": name, "target": target_name}
+    return {"status": "cloned", "source": name, "target": target_name, "job": job.id}
+
+@app.get("/api/clones")
+async def list_clones():
+    return [job.as_dict() for job in clone_jobs.values()]
+
+@app.get("/api/clones/{job_id}")
+async def get_clone(job_id: str):
+    job = clone_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Clone job not found")
+    return job.as_dict()
+
+@app.post("/api/clones/{job_id}/cancel")
+async def cancel_clone(job_id: str):
+    job = clone_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Clone job not found")
+    if job.status not in ("pending", "running"):
+        raise HTTPException(status_code=409, detail=f"Clone already {job.status}")
+    job.cancel()
+    return {"status": "cancelling", "job": job_id}
 
 @app.post("/api/workspaces/{name}/eject")
 async def eject_workspace(name: str):
@@ -329,12 +523,13 @@ async def eject_workspace(name: str):
     await broadcast_event({"type": "world_ejected", "workspace": name})
     return {"status": "ejected", "workspace": name, "output": output}
 
-SHATTER_SCRIPT = '.spatia/bin/spatia-shatter.py'
-
 class ShatterRequest(BaseModel):
     path: str
     content: Optional[str] = None
 
+class ShatterBatchRequest(BaseModel):
+    items: List[ShatterRequest]
+
 class GeometryUpdate(BaseModel):
     atom_id: str
     x: int
@@ -386,39 +581,24 @@ async def run_subprocess_async(cmd, env=None):
 def get_db_connection():
     if not os.path.exists(DB_PATH):
         raise HTTPException(status_code=500, detail="Sentinel DB not found")
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    return pool.connection(DB_PATH)
+
+def shatter_and_place(conn, items):
+    """Shatter items and place new atoms in a single transaction."""
+    result = shatter.shatter_items(conn, items)
+    place_atoms(conn, result['atom_ids'])
+    announce_atoms(conn, result['atom_ids'])
+    return result
 
 @app.post("/api/shatter")
 async def shatter_atom(request: ShatterRequest):
     print(f"Received Shatter Request: {request}")
     try:
-        cmd = [SHATTER_SCRIPT, '--path', request.path]
-        if request.content is not None:
-            cmd.extend(['--content', request.content])
-        
-        output = await run_subprocess_async(cmd)
-        
-        # Parse output for ATOM_ID: <id>
-        atom_id = None
-        for line in output.split('\n'):
-            if line.startswith('ATOM_ID:'):
-                atom_id = line.split(':', 1)[1].strip()
-                break
-                
-        if not atom_id:
-            # Fallback if script didn't output ID cleanly (shouldn't happen with our update)
-            # Or if it was a re-shatter of existing file, maybe we just use request.path
-            # But we want to be sure.
-            raise HTTPException(status_code=500, detail=f"Could not determine atom_id from script output: {output}")
-
-        # Ensure geometry exists
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("INSERT OR IGNORE INTO geometry (atom_id, x, y) VALUES (?, 0, 0)", (atom_id,))
-            conn.commit()
+        result = await db.write(shatter_and_place, [(request.path, request.content)])
+        if result['errors']:
+            raise HTTPException(status_code=500, detail=result['errors'][0][1])
 
+        atom_id = result['atom_ids'][0]
         await broadcast_event({"type": "update", "atom_id": atom_id})
         return {"atom_id": atom_id}
     except Exception as e:
@@ -427,28 +607,267 @@ async def shatter_atom(request: ShatterRequest):
         print(f"SHATTER EXCEPTION: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/shatter/batch")
+async def shatter_batch(request: ShatterBatchRequest):
+    """
+    Ingest many files and/or hollow constructs in one transaction and announce
+    them with a single event.
+    """
+    if not request.items:
+        raise HTTPException(status_code=400, detail="No items to shatter")
+    result = await db.write(shatter_and_place, [(item.path, item.content) for item in request.items])
+
+    if result['atom_ids']:
+        await broadcast_event({"type": "update", "atom_ids": result['atom_ids']})
+    return {
+        "atom_ids": result['atom_ids'],
+        "changed": result['changed'],
+        "fossilized": result['fossilized'],
+        "errors": [{"path": path, "error": error} for path, error in result['errors']],
+    }
+
+# --- Conditional GETs ---
+#
+# Read endpoints send a strong ETag derived from the change seq (see
+# backend/changelog.py): any write to a logged table bumps it, so an unchanged
+# seq means an unchanged body. A matching If-None-Match gets a 304 after one
+# MAX(seq) lookup, without running the endpoint's query.
+
+NOT_MODIFIED = object()
+
+def make_etag(request: Request, version) -> str:
+    # The query string selects the representation (fields, filters, page)
+    key = f"{etag_epoch}:{version}:{request.url.path}?{request.url.query}"
+    return '"' + hashlib.sha1(key.encode('utf-8')).hexdigest()[:20] + '"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    # If-None-Match compares weakly: W/"x" matches "x"
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in header.split(","))
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+def set_etag(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    # Cacheable, but revalidated on every use
+    response.headers["Cache-Control"] = "no-cache"
+
+async def conditional_read(request: Request, query):
+    """
+    Run `query` on the DB executor unless the client's If-None-Match is still
+    current. Returns (etag, result), result being NOT_MODIFIED in that case and
+    etag None for databases without a change log.
+    """
+    def read(conn):
+        try:
+            etag = make_etag(request, changelog.current_seq(conn))
+        except sqlite3.OperationalError:
+            return None, query(conn)
+        if etag_matches(request, etag):
+            return etag, NOT_MODIFIED
+        return etag, query(conn)
+
+    return await db.read(read)
+
+FOSSIL_COLUMNS = "atom_id, ts, hash, type, domain, last_witnessed, COALESCE(x, 0) as x, COALESCE(y, 0) as y"
+
+def fossils_as_atoms(cursor, rows, with_content=True):
+    """Shape fossils rows like atoms (status 4, ID "<atom_id>@<ts>") with content from the blob store."""
+    contents = blobs.get_blobs(cursor, [row['hash'] for row in rows if row['hash']]) if with_content else {}
+    return [{
+        "id": f"{row['atom_id']}@{row['ts']}",
+        "type": row['type'],
+        "domain": row['domain'],
+        "content": contents.get(row['hash']),
+        "status": 4,
+        "hash": row['hash'],
+        "last_witnessed": row['last_witnessed'],
+        "x": row['x'],
+        "y": row['y'],
+    } for row in rows]
+
+# Selectable atom fields for GET /api/atoms?fields=... (geometry is joined in)
+ATOM_FIELDS = {
+    "id": "a.id",
+    "type": "a.type",
+    "domain": "a.domain",
+    "content": "a.content",
+    "status": "a.status",
+    "hash": "a.hash",
+    "last_witnessed": "a.last_witnessed",
+    "parent_project": "a.parent_project",
+    "x": "COALESCE(g.x, 0) as x",
+    "y": "COALESCE(g.y, 0) as y",
+}
+
+# Listing is metadata only; content is fetched per atom from GET /api/atoms/{id}
+DEFAULT_ATOM_FIELDS = ("id", "domain", "status", "hash", "x", "y")
+
+def parse_fields(fields):
+    if not fields:
+        return list(DEFAULT_ATOM_FIELDS)
+    requested = [f.strip() for f in fields.split(',') if f.strip()]
+    unknown = [f for f in requested if f not in ATOM_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown field(s): {', '.join(unknown)}")
+    # The ID is always returned (it is also the pagination key)
+    return ["id"] + [f for f in dict.fromkeys(requested) if f != "id"]
+
+def parse_bbox(bbox):
+    try:
+        x0, y0, x1, y1 = (int(v) for v in bbox.split(','))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be x0,y0,x1,y1")
+    return min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)
+
 @app.get("/api/atoms")
-async def get_atoms():
-    with get_db_connection() as conn:
+async def get_atoms(
+    request: Request,
+    fields: Optional[str] = None,
+    status: Optional[int] = None,
+    domain: Optional[str] = None,
+    bbox: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=10000),
+    include_fossils: bool = False,
+):
+    # Keyset pagination by ID: when more atoms follow, the X-Next-After header
+    # holds the value to pass as `after` for the next page
+    selected = parse_fields(fields)
+    box = parse_bbox(bbox) if bbox else None
+    in_memory = graph.covers(selected) and not include_fossils
+
+    def query(conn):
+        if in_memory and graph.sync(conn):
+            return graph.list_atoms(selected, status, domain, box, after, limit)
         cursor = conn.cursor()
-        # Ensure we select status and domain as requested
-        cursor.execute("""
-            SELECT a.*, COALESCE(g.x, 0) as x, COALESCE(g.y, 0) as y 
-            FROM atoms a 
-            LEFT JOIN geometry g ON a.id = g.atom_id
-        """)
-        atoms = [dict(row) for row in cursor.fetchall()]
-        
-        # Also fetch geometry to merge? User just asked ensure status/domain.
-        # But for frontend rendering, geometry matches are usually needed.
-        # The prompt only said "GET /api/atoms endpoint that performs a direct SELECT * FROM atoms".
-        # It didn't say join geometry.
-        
-    return atoms
+        where, params = [], []
+        if status is not None:
+            where.append("a.status = ?")
+            params.append(status)
+        if domain is not None:
+            where.append("a.domain = ?")
+            params.append(domain)
+        if box:
+            where.append("COALESCE(g.x, 0) BETWEEN ? AND ? AND COALESCE(g.y, 0) BETWEEN ? AND ?")
+            params.extend((box[0], box[2], box[1], box[3]))
+        if after is not None:
+            where.append("a.id > ?")
+            params.append(after)
+        sql = f"SELECT {', '.join(ATOM_FIELDS[f] for f in selected)} FROM atoms a LEFT JOIN geometry g ON a.id = g.atom_id"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY a.id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+        cursor.execute(sql, params)
+        atoms = fastjson.row_dicts(cursor)
+
+        next_after = None
+        if limit is not None and len(atoms) > limit:
+            atoms = atoms[:limit]
+            next_after = atoms[-1]['id']
+
+        # History lives in its own table; only Ghost Mode asks for it (after the last page)
+        if include_fossils and next_after is None and status in (None, 4):
+            fossil_where, fossil_params = [], []
+            if domain is not None:
+                fossil_where.append("domain = ?")
+                fossil_params.append(domain)
+            if box:
+                fossil_where.append("COALESCE(x, 0) BETWEEN ? AND ? AND COALESCE(y, 0) BETWEEN ? AND ?")
+                fossil_params.extend((box[0], box[2], box[1], box[3]))
+            fossil_sql = f"SELECT {FOSSIL_COLUMNS} FROM fossils"
+            if fossil_where:
+                fossil_sql += " WHERE " + " AND ".join(fossil_where)
+            cursor.execute(fossil_sql + " ORDER BY atom_id, ts", fossil_params)
+            fossils = fossils_as_atoms(cursor, cursor.fetchall(), with_content="content" in selected)
+            atoms.extend({f: fossil.get(f) for f in selected} for fossil in fossils)
+        return atoms, next_after
+
+    etag, result = await conditional_read(request, query)
+    if result is NOT_MODIFIED:
+        return not_modified(etag)
+    atoms, next_after = result
+    # Serialized with orjson: 10k-atom listings are common (see backend/fastjson.py)
+    response = fastjson.JSONBytes(atoms)
+    if etag:
+        set_etag(response, etag)
+    if next_after is not None:
+        response.headers["X-Next-After"] = next_after
+    return response
+
+@app.get("/api/changes")
+async def get_changes(since: Optional[int] = Query(None, ge=0), limit: int = Query(1000, ge=1, le=10000), fields: Optional[str] = None):
+    # Without `since`: just the current seq, to take before a full fetch.
+    # Otherwise the rows changed after `since` (atoms projected by `fields`, as in
+    # GET /api/atoms) and tombstones; pass the returned seq as the next `since`.
+    # reset means `since` comes from another DB (workspace switch): refetch all.
+    selected = parse_fields(fields)
+    atom_query = f"SELECT {', '.join(ATOM_FIELDS[f] for f in selected)} FROM atoms a LEFT JOIN geometry g ON a.id = g.atom_id WHERE a.id IN ({{placeholders}})"
+
+    def query(conn):
+        seq = changelog.current_seq(conn)
+        if since is None or since > seq:
+            return {"seq": seq, "reset": since is not None, "more": False, "changes": []}
+        changes = changelog.changes_since(conn, since, limit + 1, atom_query)
+        more = len(changes) > limit
+        changes = changes[:limit]
+        return {
+            "seq": changes[-1]["seq"] if changes else since,
+            "reset": False,
+            "more": more,
+            "changes": changes,
+        }
+
+    return fastjson.JSONBytes(await db.read(query))
+
+@app.get("/api/search")
+async def search_atoms(
+    q: str,
+    domain: Optional[str] = None,
+    status: Optional[int] = None,
+    fossils: bool = False,
+    syntax: str = Query("simple", pattern="^(simple|fts)$"),
+    limit: int = Query(20, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+):
+    # Ranked full-text search over live atoms (IDs and content), and with
+    # fossils=true over fossil content too (see backend/search.py)
+    if fossils:
+        # Index fossils written since the last history search
+        await db.write(search.index_fossils)
+    try:
+        return await db.read(search.search, q, domain=domain, status=status, limit=limit, offset=offset, syntax=syntax, fossils=fossils)
+    except search.QueryError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid search query: {e}")
+
+@app.get("/api/atoms/{atom_id:path}/fossils")
+async def get_atom_fossils(atom_id: str, limit: int = Query(50, ge=1, le=500), before: Optional[str] = None):
+    # Keyset pagination, newest first: pass the returned `next` as `before` for the
+    # following page. Each page is one range scan of the (atom_id, ts) primary key.
+    def query(conn):
+        cursor = conn.cursor()
+        if before is None:
+            cursor.execute(f"SELECT {FOSSIL_COLUMNS} FROM fossils WHERE atom_id = ? ORDER BY ts DESC LIMIT ?", (atom_id, limit + 1))
+        else:
+            cursor.execute(f"SELECT {FOSSIL_COLUMNS} FROM fossils WHERE atom_id = ? AND ts < ? ORDER BY ts DESC LIMIT ?", (atom_id, before, limit + 1))
+        rows = cursor.fetchall()
+        page = rows[:limit]
+        return {
+            "fossils": fossils_as_atoms(cursor, page),
+            "next": page[-1]['ts'] if len(rows) > limit else None,
+        }
+
+    return await db.read(query)
 
 @app.post("/api/geometry")
 async def update_geometry(updates: List[GeometryUpdate]):
-    with get_db_connection() as conn:
+    def write(conn):
         cursor = conn.cursor()
         for update in updates:
             cursor.execute("""
@@ -458,20 +877,31 @@ async def update_geometry(updates: List[GeometryUpdate]):
                     x = excluded.x,
                     y = excluded.y
             """, (update.atom_id, update.x, update.y))
-        conn.commit()
+
+    await db.write(write)
     return {"status": "ok"}
 
 @app.get("/api/threads")
-async def get_threads():
-    with get_db_connection() as conn:
+async def get_threads(request: Request):
+    def query(conn):
+        if graph.sync(conn):
+            return graph.list_threads()
         cursor = conn.cursor()
-        cursor.execute("SELECT source, target FROM threads")
-        return [dict(row) for row in cursor.fetchall()]
+        cursor.execute("SELECT id, source, target FROM threads")
+        return fastjson.row_dicts(cursor)
+
+    etag, threads = await conditional_read(request, query)
+    if threads is NOT_MODIFIED:
+        return not_modified(etag)
+    response = fastjson.JSONBytes(threads)
+    if etag:
+        set_etag(response, etag)
+    return response
 
 @app.post("/api/threads")
 async def create_thread(thread: Thread):
     import uuid
-    with get_db_connection() as conn:
+    def write(conn):
         cursor = conn.cursor()
         # Check if exists first to avoid duplicate logic with different ID
         # (Though PK is ID, we might want unique source-target pair?)
@@ -483,29 +913,37 @@ async def create_thread(thread: Thread):
         if not existing:
              new_id = str(uuid.uuid4())
              cursor.execute("INSERT INTO threads (id, source, target) VALUES (?, ?, ?)", (new_id, thread.source, thread.target))
-             conn.commit()
-    
+             feed.announce(conn, [("thread", new_id)])
+
+    await db.write(write)
     await broadcast_event({"type": "thread_new", "source": thread.source, "target": thread.target})
     return {"status": "ok"}
 
 @app.get("/api/portals/{atom_id}")
-async def get_portals(atom_id: str):
-    with get_db_connection() as conn:
+async def get_portals(atom_id: str, request: Request, response: Response):
+    def query(conn):
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM portals WHERE atom_id = ?", (atom_id,))
         return [dict(row) for row in cursor.fetchall()]
 
+    etag, portals = await conditional_read(request, query)
+    if portals is NOT_MODIFIED:
+        return not_modified(etag)
+    if etag:
+        set_etag(response, etag)
+    return portals
+
 @app.post("/api/portals")
 async def create_portal(portal: PortalCreate):
-    with get_db_connection() as conn:
+    def write(conn):
         cursor = conn.cursor()
-        import datetime
         created_at = datetime.datetime.now().isoformat()
         cursor.execute(
             "INSERT INTO portals (atom_id, path, description, created_at) VALUES (?, ?, ?, ?)",
             (portal.atom_id, portal.path, portal.description, created_at)
         )
-        conn.commit()
+
+    await db.write(write)
     return {"status": "ok"}
 
 @app.post("/api/summon")
@@ -514,7 +952,7 @@ async def summon_atom(request: SummonRequest, background_tasks: BackgroundTasks)
     
     # 1. OPTIMISTIC LOCKING: Reserve access (Status 0 -> 2)
     # Status 2 (Witnessing) also serves as "Processing/Busy" here
-    with get_db_connection() as conn:
+    def reserve(conn):
         cursor = conn.cursor()
         
         # Check current status first for better error message
@@ -528,31 +966,38 @@ async def summon_atom(request: SummonRequest, background_tasks: BackgroundTasks)
 
         # Attempt atomic reservation
         cursor.execute("UPDATE atoms SET status = 2 WHERE id = ? AND status = 0", (atom_id,))
-        conn.commit()
         
         if cursor.rowcount == 0:
             # Race condition hit - someone else just took it or it changed status
             raise HTTPException(status_code=409, detail="Atom was modified by another process (Optimistic lock failed)")
+        announce_atoms(conn, [atom_id])
+
+    def fetch_context(conn):
+        cursor = conn.cursor()
+        
+        # Fetch content again? Yes, it should be safe now we have lock.
+        cursor.execute("SELECT content, domain FROM atoms WHERE id = ?", (atom_id,))
+        row = cursor.fetchone()
+        
+        cursor.execute("SELECT * FROM portals WHERE atom_id = ?", (atom_id,))
+        portals = [dict(r) for r in cursor.fetchall()]
+        
+        cursor.execute("SELECT target FROM threads WHERE source = ?", (atom_id,))
+        neighbors = [r['target'] for r in cursor.fetchall()]
+        return row['content'], row['domain'], portals, neighbors
+
+    def set_status(conn, status):
+        conn.execute("UPDATE atoms SET status = ? WHERE id = ?", (status, atom_id))
+        announce_atoms(conn, [atom_id])
+
+    await db.write(reserve)
 
     # Notify we are starting (processing)
     await broadcast_event({"type": "update", "atom_id": atom_id})
     
     try:
         # 2. Fetch Context Data
-        with get_db_connection() as conn:
-             cursor = conn.cursor()
-             
-             # Fetch content again? Yes, it should be safe now we have lock.
-             cursor.execute("SELECT content, domain FROM atoms WHERE id = ?", (atom_id,))
-             row = cursor.fetchone()
-             content = row['content']
-             domain = row['domain']
-             
-             cursor.execute("SELECT * FROM portals WHERE atom_id = ?", (atom_id,))
-             portals = [dict(r) for r in cursor.fetchall()]
-             
-             cursor.execute("SELECT target FROM threads WHERE source = ?", (atom_id,))
-             neighbors = [r['target'] for r in cursor.fetchall()]
+        content, domain, portals, neighbors = await db.read(fetch_context)
 
         # 3. Generate Content (Offloaded to avoid blocking main loop)
         new_content = await run_in_thread(
@@ -568,10 +1013,12 @@ async def summon_atom(request: SummonRequest, background_tasks: BackgroundTasks)
              new_content = "\n".join(lines)
         
         # 4. Update DB (Status 2 -> 1 Claim)
-        with get_db_connection() as conn:
+        def claim(conn):
             cursor = conn.cursor()
-            cursor.execute("UPDATE atoms SET content = ?, status = 1 WHERE id = ?", (new_content, atom_id))
-            conn.commit()
+            cursor.execute("UPDATE atoms SET content = ?, hash = ?, status = 1 WHERE id = ?", (new_content, blobs.calculate_hash(new_content), atom_id))
+            announce_atoms(conn, [atom_id])
+
+        await db.write(claim)
 
         # Broadcast Claim
         await broadcast_event({"type": "update", "atom_id": atom_id})
@@ -585,9 +1032,7 @@ async def summon_atom(request: SummonRequest, background_tasks: BackgroundTasks)
 
         # 6. Trigger Witness (Status 1 -> 2 -> 3)
         # Note: We just set it to 1. Now we trigger witness which sets it to 2 again.
-        with get_db_connection() as conn:
-             conn.execute("UPDATE atoms SET status = 2 WHERE id = ?", (atom_id,))
-             conn.commit()
+        await db.write(set_status, 2)
              
         background_tasks.add_task(run_witness_process, atom_id)
         
@@ -600,13 +1045,11 @@ async def summon_atom(request: SummonRequest, background_tasks: BackgroundTasks)
         # If we failed during generation, it acts like it never happened?
         # Revert to 1 (Claim) with old content? OR 0 (Hollow)?
         # If we revert to 0, user can try again easily.
-        with get_db_connection() as conn:
-             try:
-                 # Check what status is now? We held it at 2 (since we set it).
-                 conn.execute("UPDATE atoms SET status = 0 WHERE id = ?", (atom_id,))
-                 conn.commit()
-             except:
-                 pass
+        try:
+            # Check what status is now? We held it at 2 (since we set it).
+            await db.write(set_status, 0)
+        except:
+            pass
         
         await broadcast_event({"type": "update", "atom_id": atom_id})
         raise HTTPException(status_code=500, detail=f"Summon failed: {e}")
@@ -645,18 +1088,22 @@ async def run_witness_process(atom_id: str):
         
         new_status = 3 if exit_code == 0 else 1
         
-        with get_db_connection() as conn:
+        def record(conn):
             cursor = conn.cursor()
             cursor.execute("UPDATE atoms SET status = ? WHERE id = ?", (new_status, atom_id))
-            conn.commit()
+            announce_atoms(conn, [atom_id])
+
+        await db.write(record)
             
     except Exception as e:
         print(f"Background: Witness failed to execute: {e}")
         # Revert to Claim on system failure
-        with get_db_connection() as conn:
+        def revert(conn):
             cursor = conn.cursor()
             cursor.execute("UPDATE atoms SET status = 1 WHERE id = ?", (atom_id,))
-            conn.commit()
+            announce_atoms(conn, [atom_id])
+
+        await db.write(revert)
 
     # Notify completion
     await broadcast_event({"type": "update", "atom_id": atom_id})
@@ -664,12 +1111,14 @@ async def run_witness_process(atom_id: str):
 @app.post("/api/witness")
 async def witness_atom(request: WitnessRequest, background_tasks: BackgroundTasks):
     # 1. Immediate Transition to Status 2 (Witnessing)
-    with get_db_connection() as conn:
+    def begin(conn):
         cursor = conn.cursor()
         cursor.execute("UPDATE atoms SET status = 2 WHERE id = ?", (request.atom_id,))
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Atom not found")
-        conn.commit()
+        announce_atoms(conn, [request.atom_id])
+
+    await db.write(begin)
         
     # 2. Schedule Background Logic
     background_tasks.add_task(run_witness_process, request.atom_id)
@@ -677,9 +1126,6 @@ async def witness_atom(request: WitnessRequest, background_tasks: BackgroundTask
     # Notify immediate change
     await broadcast_event({"type": "update", "atom_id": request.atom_id})
 
-    # Notify immediate change
-    await broadcast_event({"type": "update", "atom_id": request.atom_id})
-
     return {"status": "witnessing", "atom_id": request.atom_id}
 
 class ReviveRequest(BaseModel):
@@ -692,39 +1138,38 @@ async def revive_atom(request: ReviveRequest):
     if '@' not in fossil_id:
         raise HTTPException(status_code=400, detail="Invalid fossil ID format")
         
-    original_id = fossil_id.split('@')[0]
+    # Timestamps never contain '@', atom IDs might
+    original_id, _, fossil_ts = fossil_id.rpartition('@')
     
-    with get_db_connection() as conn:
+    def revive(conn):
         cursor = conn.cursor()
         
-        # 1. Fetch Fossil Content
-        cursor.execute("SELECT content, hash, last_witnessed FROM atoms WHERE id = ?", (fossil_id,))
+        # 1. Fetch Fossil Content (from the blob store)
+        cursor.execute("SELECT hash FROM fossils WHERE atom_id = ? AND ts = ?", (original_id, fossil_ts))
         fossil = cursor.fetchone()
         if not fossil:
              raise HTTPException(status_code=404, detail="Fossil not found")
-        fossil_content, fossil_hash, fossil_last_witnessed = fossil
+        fossil_hash = fossil[0]
+        fossil_content = blobs.get_blob(cursor, fossil_hash)
         
         # 2. Fetch Current Content (to fossilize it)
-        cursor.execute("SELECT content, hash, last_witnessed FROM atoms WHERE id = ?", (original_id,))
+        cursor.execute("""
+            SELECT a.content, a.type, a.domain, a.last_witnessed, g.x, g.y
+            FROM atoms a LEFT JOIN geometry g ON g.atom_id = a.id
+            WHERE a.id = ?
+        """, (original_id,))
         current = cursor.fetchone()
         
         if current:
-            curr_content, curr_hash, curr_last_witnessed = current
+            curr_content, curr_type, curr_domain, curr_last_witnessed, x, y = current
             
-            # Fossilize current state
+            # Fossilize current state (keeping its position on the canvas)
             new_fossil_ts = datetime.datetime.now().isoformat()
-            new_fossil_id = f"{original_id}@{new_fossil_ts}"
-            
+            new_fossil_hash = blobs.fossilize(cursor, curr_content, fossil_content)
             cursor.execute("""
-                INSERT INTO atoms (id, type, content, hash, last_witnessed, status)
-                VALUES (?, 'file', ?, ?, ?, 4)
-            """, (new_fossil_id, curr_content, curr_hash, curr_last_witnessed))
-            
-            # Copy Geometry
-            cursor.execute("SELECT x, y FROM geometry WHERE atom_id = ?", (original_id,))
-            geo = cursor.fetchone()
-            if geo:
-                 cursor.execute("INSERT INTO geometry (atom_id, x, y) VALUES (?, ?, ?)", (new_fossil_id, geo[0], geo[1]))
+                INSERT INTO fossils (atom_id, ts, hash, type, domain, last_witnessed, x, y)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (original_id, new_fossil_ts, new_fossil_hash, curr_type, curr_domain, curr_last_witnessed, x, y))
                  
         # 3. Promote Fossil to Current (Status 1 - Claim, needing verification if it was endorsed? Yes, revive -> Claim)
         # We update the content to match the fossil.
@@ -734,8 +1179,9 @@ async def revive_atom(request: ReviveRequest):
             SET content = ?, hash = ?, status = 1 
             WHERE id = ?
         """, (fossil_content, fossil_hash, original_id))
-        
-        conn.commit()
+        announce_atoms(conn, [original_id])
+
+    await db.write(revive)
     
     # 4. Trigger Materialization (write to disk)
     MATERIALIZE_SCRIPT = '.spatia/bin/spatia-materialize.py'
@@ -756,6 +1202,9 @@ async def sse_endpoint():
             await asyncio.sleep(0.01) # Yield control to allow flush
             while True:
                 data = await queue.get()
+                if data is None:
+                    # Fell too far behind: resync_required was its last event
+                    break
                 yield data
         except asyncio.CancelledError:
             pass
@@ -763,19 +1212,53 @@ async def sse_endpoint():
             await manager.disconnect(queue)
     return StreamingResponse(event_generator(), media_type="text/event-stream")
 
+@app.get("/api/events/stats")
+async def sse_stats():
+    """Queue depth, high-water mark and drop/coalesce counts per connected SSE client."""
+    return manager.stats()
+
 @app.get("/api/atoms/{atom_id}/logs")
-async def get_atom_logs(atom_id: str):
+async def get_atom_logs(atom_id: str, request: Request, response: Response):
     log_path = f".spatia/logs/{atom_id}.log"
     if not os.path.exists(log_path):
         raise HTTPException(status_code=404, detail="Logs not found for this atom")
-    
+
     try:
+        # Logs are files, not DB rows: version them by mtime and size
+        stat = os.stat(log_path)
+        etag = make_etag(request, f"{stat.st_mtime_ns}-{stat.st_size}")
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+
         with open(log_path, "r") as f:
             content = f.read()
         return {"atom_id": atom_id, "logs": content}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to read logs: {e}")
 
+# Declared after the /fossils and /logs routes, which it would otherwise shadow
+@app.get("/api/atoms/{atom_id:path}")
+async def get_atom(atom_id: str, request: Request, response: Response):
+    def query(conn):
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT a.*, COALESCE(g.x, 0) as x, COALESCE(g.y, 0) as y
+            FROM atoms a
+            LEFT JOIN geometry g ON a.id = g.atom_id
+            WHERE a.id = ?
+        """, (atom_id,))
+        return cursor.fetchone()
+
+    etag, row = await conditional_read(request, query)
+    if row is NOT_MODIFIED:
+        return not_modified(etag)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Atom not found")
+    if etag:
+        set_etag(response, etag)
+    return dict(row)
+
 
 class EnvelopeCreate(BaseModel):
     id: str
@@ -817,8 +1300,10 @@ async def echo_request(request: Request):
     return {"status": "ok", "server_timestamp": server_ts}
 
 @app.get("/api/envelopes")
-async def get_envelopes():
-    with get_db_connection() as conn:
+async def get_envelopes(request: Request, response: Response):
+    def query(conn):
+        if graph.sync(conn):
+            return graph.list_envelopes()
         cursor = conn.cursor()
         try:
             cursor.execute("SELECT * FROM envelopes")
@@ -826,54 +1311,64 @@ async def get_envelopes():
         except sqlite3.OperationalError:
             return []
 
+    etag, envelopes = await conditional_read(request, query)
+    if envelopes is NOT_MODIFIED:
+        return not_modified(etag)
+    if etag:
+        set_etag(response, etag)
+    return envelopes
+
 @app.post("/api/envelopes")
 async def create_envelope(env: EnvelopeCreate):
-    with get_db_connection() as conn:
+    def write(conn):
         cursor = conn.cursor()
         try:
             cursor.execute("""
                 INSERT INTO envelopes (id, domain, x, y, w, h)
                 VALUES (?, ?, ?, ?, ?, ?)
             """, (env.id, env.domain, env.x, env.y, env.w, env.h))
-            conn.commit()
         except sqlite3.IntegrityError:
              raise HTTPException(status_code=409, detail="Envelope ID already exists")
+        feed.announce(conn, [("envelope", env.id)])
+
+    await db.write(write)
     
     await broadcast_event({"type": "envelope_update", "id": env.id})
     return {"status": "created", "envelope": env.model_dump()}
 
 @app.put("/api/envelopes/{env_id}")
 async def update_envelope(env_id: str, updates: EnvelopeUpdate):
-    with get_db_connection() as conn:
+    # Build dynamic query
+    fields = []
+    values = []
+    if updates.domain is not None:
+        fields.append("domain = ?")
+        values.append(updates.domain)
+    if updates.x is not None:
+        fields.append("x = ?")
+        values.append(updates.x)
+    if updates.y is not None:
+        fields.append("y = ?")
+        values.append(updates.y)
+    if updates.w is not None:
+        fields.append("w = ?")
+        values.append(updates.w)
+    if updates.h is not None:
+        fields.append("h = ?")
+        values.append(updates.h)
+
+    if not fields:
+        return {"status": "no_change"}
+
+    values.append(env_id)
+
+    def write(conn):
         cursor = conn.cursor()
-        
-        # Build dynamic query
-        fields = []
-        values = []
-        if updates.domain is not None:
-            fields.append("domain = ?")
-            values.append(updates.domain)
-        if updates.x is not None:
-            fields.append("x = ?")
-            values.append(updates.x)
-        if updates.y is not None:
-            fields.append("y = ?")
-            values.append(updates.y)
-        if updates.w is not None:
-            fields.append("w = ?")
-            values.append(updates.w)
-        if updates.h is not None:
-            fields.append("h = ?")
-            values.append(updates.h)
-            
-        if not fields:
-            return {"status": "no_change"}
-            
-        values.append(env_id)
-        
         cursor.execute(f"UPDATE envelopes SET {', '.join(fields)} WHERE id = ?", values)
-        conn.commit()
-    
+        feed.announce(conn, [("envelope", env_id)])
+
+    await db.write(write)
+
     await broadcast_event({"type": "envelope_update", "id": env_id})
     return {"status": "updated", "id": env_id}
 
@@ -891,10 +1386,8 @@ async def health_check():
     try:
         # Check if we can connect
         if os.path.exists(DB_PATH):
-           with sqlite3.connect(DB_PATH) as conn:
-               cursor = conn.cursor()
-               cursor.execute("SELECT 1")
-               db_status = "connected"
+           await db.read(lambda conn: conn.execute("SELECT 1").fetchone())
+           db_status = "connected"
     except Exception as e:
         db_status = f"error: {str(e)}"
         
@@ -917,9 +1410,24 @@ async def health_check():
         "service": "spatia-backend",
         "db_status": db_status,
         "workspace": workspace_name,
+        "tree_watch": bool(tree_watcher_task and not tree_watcher_task.done()),
         "timestamp": datetime.datetime.now().isoformat()
     }
 
+@app.get("/api/maintenance")
+async def get_maintenance():
+    """Schedule, retention policy and the stats of the last maintenance run."""
+    return maintainer.status()
+
+@app.post("/api/maintenance/run")
+async def run_maintenance():
+    try:
+        return await maintainer.run("manual")
+    except maintenance.AlreadyRunning:
+        raise HTTPException(status_code=409, detail="Maintenance already running")
+    except (sqlite3.Error, OSError) as e:
+        raise HTTPException(status_code=500, detail=f"Maintenance failed: {e}")
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     print(f"Global Exception: {exc}")
@@ -956,12 +1464,14 @@ async def http_exception_handler(request: Request, exc: StarletteHTTPException):
 
 @app.delete("/api/envelopes/{envelope_id}")
 async def delete_envelope(envelope_id: str):
-    with get_db_connection() as conn:
+    def write(conn):
         cursor = conn.cursor()
         cursor.execute("DELETE FROM envelopes WHERE id = ?", (envelope_id,))
         if cursor.rowcount == 0:
             raise HTTPException(status_code=404, detail="Envelope not found")
-        conn.commit()
+        feed.announce(conn, [("envelope", envelope_id)])
+
+    await db.write(write)
     
     await broadcast_event({"type": "envelope_delete", "id": envelope_id})
 
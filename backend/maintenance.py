@@ -0,0 +1,348 @@
+import asyncio
+import datetime
+import itertools
+import re
+import time
+
+from backend import blobs, search
+
+# Background upkeep of the sentinel DB, run on a schedule once the API is idle
+# (Scheduler) or on demand:
+#
+#   retention   fossils beyond the newest keep_last of each atom are thinned by
+#               age (RetentionPolicy), together with their fossils_fts entries
+#   blobs       blobs no fossil or atom reaches any more, directly or as the base
+#               of a delta, are deleted
+#   search      FTS5 segments merged, a bounded amount of work per step
+#   analyze     ANALYZE the first time, PRAGMA optimize after that
+#   vacuum      free pages returned to the filesystem with incremental_vacuum;
+#               a DB created without auto_vacuum = INCREMENTAL is converted once,
+#               with a full VACUUM, when enough of it is free space
+#   checkpoint  the WAL folded back and truncated
+#
+# Every step is a short write transaction of its own, and the scheduler waits
+# for interactive requests to finish before each one, so maintenance only ever
+# holds the writer between requests.
+
+FOSSIL_ATOMS_PER_STEP = 200
+VACUUM_PAGES_PER_STEP = 2048
+FTS_MERGE_PAGES = 500
+ANALYSIS_LIMIT = 1000
+# Free space (fraction of the file) that justifies the one-off full VACUUM
+CONVERT_FREE_RATIO = 0.1
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+def parse_duration(text):
+    """Seconds in a duration like "90s", "12h", "7d" or "2w"."""
+    m = re.fullmatch(r"\s*(\d+)\s*([smhdw])\s*", text)
+    if not m:
+        raise ValueError(f"Invalid duration: {text!r}")
+    return int(m.group(1)) * DURATION_UNITS[m.group(2)]
+
+class RetentionPolicy:
+    """
+    Which fossils to keep: the newest `keep_last` of every atom, and of the older
+    ones the newest per `interval` once they are older than `age`. `tiers` are
+    (age, interval) pairs in seconds; the tier with the greatest age that applies
+    wins, and fossils younger than every tier are kept. keep_last = 0 keeps
+    everything.
+    """
+    def __init__(self, keep_last=0, tiers=()):
+        self.keep_last = keep_last
+        self.tiers = sorted(tiers)
+
+    @classmethod
+    def parse(cls, keep_last, spec):
+        """From a keep count and a tier spec like "7d:1d,90d:1w" (age:interval, comma-separated)."""
+        tiers = []
+        for part in filter(None, (p.strip() for p in spec.split(","))):
+            age, _, interval = part.partition(":")
+            tiers.append((parse_duration(age), parse_duration(interval)))
+        return cls(int(keep_last), tiers)
+
+    @property
+    def enabled(self):
+        return self.keep_last > 0
+
+    def as_dict(self):
+        return {"keep_last": self.keep_last, "tiers": [{"age": age, "interval": interval} for age, interval in self.tiers]}
+
+    def expired(self, timestamps, now):
+        """The timestamps (one atom's fossils, newest first) this policy drops."""
+        if not self.enabled:
+            return []
+        dropped, buckets = [], set()
+        for ts in timestamps[self.keep_last:]:
+            try:
+                when = datetime.datetime.fromisoformat(ts)
+            except ValueError:
+                continue  # Not a timestamp we wrote: keep
+            age = (now - when).total_seconds()
+            tier = next((i for i in reversed(range(len(self.tiers))) if age >= self.tiers[i][0]), None)
+            if tier is None:
+                continue
+            bucket = (tier, int(when.timestamp() // self.tiers[tier][1]))
+            if bucket in buckets:
+                dropped.append(ts)
+            else:
+                buckets.add(bucket)
+        return dropped
+
+def indexed_fossil_rowid(cursor):
+    row = cursor.execute("SELECT rowid FROM fossils_fts ORDER BY rowid DESC LIMIT 1").fetchone()
+    return row[0] if row else 0
+
+def thin_fossils(conn, policy, after="", atoms=FOSSIL_ATOMS_PER_STEP, now=None):
+    """
+    Apply `policy` to the fossils of the next `atoms` atoms (by ID) after `after`.
+    Returns (fossils deleted, last atom ID seen, or None when done).
+    """
+    now = now or datetime.datetime.now()
+    cursor = conn.cursor()
+    atom_ids = [row[0] for row in cursor.execute(
+        "SELECT DISTINCT atom_id FROM fossils WHERE atom_id > ? ORDER BY atom_id LIMIT ?", (after, atoms))]
+    if not atom_ids:
+        return 0, None
+
+    placeholders = ",".join("?" * len(atom_ids))
+    rows = cursor.execute(
+        f"SELECT rowid, atom_id, ts, hash FROM fossils WHERE atom_id IN ({placeholders}) ORDER BY atom_id, ts DESC", atom_ids).fetchall()
+    doomed = []
+    for _, group in itertools.groupby(rows, key=lambda row: row[1]):
+        group = list(group)
+        expired = set(policy.expired([row[2] for row in group], now))
+        doomed.extend(row for row in group if row[2] in expired)
+    if doomed:
+        # Contentless FTS5 forgets a row only when told the content it indexed
+        indexed = indexed_fossil_rowid(cursor)
+        in_index = [row for row in doomed if row[0] <= indexed]
+        contents = blobs.get_blobs(cursor, [row[3] for row in in_index if row[3]])
+        cursor.executemany("INSERT INTO fossils_fts (fossils_fts, rowid, content) VALUES ('delete', ?, ?)",
+                           [(row[0], contents.get(row[3]) or "") for row in in_index])
+        cursor.executemany("DELETE FROM fossils WHERE rowid = ?", [(row[0],) for row in doomed])
+    return len(doomed), atom_ids[-1]
+
+def collect_blobs(conn):
+    """
+    Delete blobs unreachable from fossils and atoms. Mark and sweep happen in one
+    transaction: a blob found garbage could otherwise be picked up again (by its
+    content hash) before it is deleted. Returns (blobs deleted, bytes freed).
+    """
+    cursor = conn.cursor()
+    reachable = {row[0] for row in cursor.execute(
+        "SELECT hash FROM fossils WHERE hash IS NOT NULL UNION SELECT hash FROM atoms WHERE hash IS NOT NULL")}
+    bases = dict(cursor.execute("SELECT hash, base FROM blobs WHERE base IS NOT NULL").fetchall())
+    stack = list(reachable)
+    while stack:
+        base = bases.get(stack.pop())
+        if base is not None and base not in reachable:
+            reachable.add(base)
+            stack.append(base)
+    garbage = [(blob_hash, size) for blob_hash, size in cursor.execute(
+        "SELECT hash, COALESCE(LENGTH(data), 0) + COALESCE(LENGTH(content), 0) FROM blobs") if blob_hash not in reachable]
+    cursor.executemany("DELETE FROM blobs WHERE hash = ?", [(blob_hash,) for blob_hash, _ in garbage])
+    return len(garbage), sum(size for _, size in garbage)
+
+def merge_search_index(conn, table, pages=FTS_MERGE_PAGES, first=False):
+    """
+    One bounded FTS5 merge step; True while there is more to merge. The first step
+    (negative page count) puts every segment up for merging, as 'optimize' would.
+    """
+    # A merge always rewrites the structure record, so total_changes can't tell
+    # when it is done; the segment data pages settle instead
+    count = f"SELECT COUNT(*) FROM {table}_data"
+    before = conn.execute(count).fetchone()[0]
+    conn.execute(f"INSERT INTO {table} ({table}, rank) VALUES ('merge', ?)", (-pages if first else pages,))
+    return conn.execute(count).fetchone()[0] != before
+
+def analyze(conn):
+    """Full ANALYZE (bounded per index) when there are no statistics yet, PRAGMA optimize after that."""
+    conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT}")
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone() is None:
+        conn.execute("ANALYZE")
+        return "analyze"
+    conn.execute("PRAGMA optimize")
+    return "optimize"
+
+def space(conn):
+    """(page_size, page_count, freelist_count, auto_vacuum)"""
+    return tuple(conn.execute(f"PRAGMA {name}").fetchone()[0] for name in ("page_size", "page_count", "freelist_count", "auto_vacuum"))
+
+def vacuum_step(conn, pages=VACUUM_PAGES_PER_STEP):
+    """Return up to `pages` free pages to the filesystem. Returns how many were freed."""
+    before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    conn.execute(f"PRAGMA incremental_vacuum({pages})").fetchall()
+    return before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+def convert_to_incremental(conn):
+    """
+    Switch the DB to auto_vacuum = INCREMENTAL, which takes a full VACUUM (outside
+    any transaction). VACUUM may renumber rowids, and both search indexes are keyed
+    by rowid, so they are rebuilt.
+    """
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    with conn:
+        conn.execute("INSERT INTO atoms_fts (atoms_fts) VALUES ('rebuild')")
+        conn.execute("INSERT INTO fossils_fts (fossils_fts) VALUES ('delete-all')")
+        search.index_fossils(conn)
+
+def checkpoint(conn):
+    return conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+
+class Activity:
+    """Requests in flight and when the last one started or finished."""
+    def __init__(self):
+        self.inflight = 0
+        self.last = time.monotonic()
+
+    def idle_for(self):
+        return 0.0 if self.inflight else time.monotonic() - self.last
+
+class ActivityMiddleware:
+    """Counts interactive requests into an Activity. Long-lived streams and polling don't count."""
+    def __init__(self, app, activity, exclude=("/api/events", "/api/health", "/api/maintenance")):
+        self.app = app
+        self.activity = activity
+        self.exclude = exclude
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exclude):
+            await self.app(scope, receive, send)
+            return
+        self.activity.inflight += 1
+        self.activity.last = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.activity.inflight -= 1
+            self.activity.last = time.monotonic()
+
+class AlreadyRunning(RuntimeError):
+    pass
+
+class Scheduler:
+    """
+    Runs maintenance through `db` (a db_executor.DatabaseExecutor) every
+    `interval` seconds, once the API has been idle for `idle_after` seconds, and
+    on demand through run(). Before each step it waits until no request has been
+    in flight for `yield_after` seconds.
+    """
+    def __init__(self, db, activity, policy, interval=3600, idle_after=30, yield_after=0.2):
+        self.db = db
+        self.activity = activity
+        self.policy = policy
+        self.interval = interval
+        self.idle_after = idle_after
+        self.yield_after = yield_after
+        self.last_run = None
+        self.next_due = time.time() + interval
+        self._running = asyncio.Lock()
+        self._stats = None
+
+    @property
+    def running(self):
+        return self._running.locked()
+
+    def status(self):
+        return {
+            "enabled": self.interval > 0,
+            "interval": self.interval,
+            "idle_after": self.idle_after,
+            "running": self.running,
+            "next_due": datetime.datetime.fromtimestamp(self.next_due).isoformat() if self.interval > 0 else None,
+            "retention": self.policy.as_dict(),
+            "last_run": self.last_run,
+        }
+
+    async def run_forever(self, poll=5):
+        while True:
+            await asyncio.sleep(poll)
+            if time.time() < self.next_due or self.activity.idle_for() < self.idle_after or self.running:
+                continue
+            try:
+                await self.run("schedule")
+            except Exception as e:
+                print(f"Maintenance Error: {e}")
+
+    async def _yield(self):
+        while self.activity.idle_for() < self.yield_after:
+            self._stats["yields"] += 1
+            await asyncio.sleep(self.yield_after)
+
+    async def _step(self, func, *args, transaction=True):
+        await self._yield()
+        if transaction:
+            return await self.db.write(func, *args)
+        return await self.db.write_raw(func, *args)
+
+    async def run(self, trigger="manual"):
+        """One full pass; returns its stats (also kept as last_run). Raises AlreadyRunning."""
+        if self.running:
+            raise AlreadyRunning()
+        async with self._running:
+            started = time.monotonic()
+            self._stats = stats = {
+                "trigger": trigger,
+                "started": datetime.datetime.now().isoformat(),
+                "finished": None,
+                "duration_s": None,
+                "fossils_deleted": 0,
+                "blobs_deleted": 0,
+                "blob_bytes_freed": 0,
+                "fossils_indexed": 0,
+                "search_merge_steps": 0,
+                "analyze": None,
+                "converted_to_incremental": False,
+                "pages_vacuumed": 0,
+                "bytes_before": None,
+                "bytes_after": None,
+                "bytes_reclaimed": None,
+                "yields": 0,
+                "error": None,
+            }
+            try:
+                await self._run(stats)
+            except Exception as e:
+                stats["error"] = str(e)
+                raise
+            finally:
+                stats["finished"] = datetime.datetime.now().isoformat()
+                stats["duration_s"] = round(time.monotonic() - started, 3)
+                self.last_run = stats
+                self.next_due = time.time() + self.interval
+        return stats
+
+    async def _run(self, stats):
+        page_size, page_count, _, _ = await self.db.read(space)
+        stats["bytes_before"] = page_size * page_count
+
+        if self.policy.enabled:
+            after = ""
+            while after is not None:
+                deleted, after = await self._step(thin_fossils, self.policy, after)
+                stats["fossils_deleted"] += deleted
+        stats["blobs_deleted"], stats["blob_bytes_freed"] = await self._step(collect_blobs)
+
+        stats["fossils_indexed"] = await self._step(search.index_fossils)
+        for table in ("atoms_fts", "fossils_fts"):
+            first = True
+            while await self._step(merge_search_index, table, FTS_MERGE_PAGES, first):
+                first = False
+                stats["search_merge_steps"] += 1
+        stats["analyze"] = await self._step(analyze)
+
+        page_size, page_count, free, auto_vacuum = await self.db.read(space)
+        if auto_vacuum != 2 and free and free >= page_count * CONVERT_FREE_RATIO:
+            await self._step(convert_to_incremental, transaction=False)
+            stats["converted_to_incremental"] = True
+            auto_vacuum = 2  # Rebuilding the search index leaves free pages of its own
+        if auto_vacuum == 2:
+            while freed := await self._step(vacuum_step):
+                stats["pages_vacuumed"] += freed
+        await self._step(checkpoint, transaction=False)
+
+        page_size, page_count, _, _ = await self.db.read(space)
+        stats["bytes_after"] = page_size * page_count
+        stats["bytes_reclaimed"] = stats["bytes_before"] - stats["bytes_after"]
@@ -0,0 +1,319 @@
+import argparse
+import datetime
+import hashlib
+import sqlite3
+
+# Versioned schema for sentinel.db.
+#
+# MIGRATIONS is ordered: applying entry N moves a database from version N-1 to N.
+# Applied versions are recorded in schema_version, so migrate() only runs what is
+# missing and is cheap to call from every entry point (backend startup, workspace
+# switch, init-workspace, shatter, the projector, `make setup`).
+#
+# Databases created before this module exist at version 0 with some or all of the
+# tables already present, so every migration must tolerate its own work having
+# been done by older code (CREATE ... IF NOT EXISTS, add only missing columns).
+
+def add_missing_columns(conn, table, columns):
+    """Bring a table created by older code up to date with `columns` ((name, decl) pairs)."""
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for column, decl in columns:
+        if column not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+ATOM_COLUMNS = (
+    ("type", "TEXT"),
+    ("domain", "TEXT"),
+    ("content", "TEXT"),
+    ("status", "INTEGER DEFAULT 0"),
+    ("hash", "TEXT"),
+    ("last_witnessed", "TEXT"),
+    ("parent_project", "TEXT"),
+)
+
+def create_core_tables(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS atoms (
+            id TEXT PRIMARY KEY,
+            type TEXT,
+            domain TEXT,
+            content TEXT,
+            status INTEGER DEFAULT 0,
+            hash TEXT,
+            last_witnessed TEXT,
+            parent_project TEXT
+        )
+    """)
+    add_missing_columns(conn, "atoms", ATOM_COLUMNS)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS geometry (
+            atom_id TEXT PRIMARY KEY,
+            x INTEGER,
+            y INTEGER
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS threads (
+            id TEXT PRIMARY KEY,
+            source TEXT,
+            target TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS portals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            atom_id TEXT,
+            path TEXT,
+            description TEXT,
+            created_at TEXT
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS envelopes (
+            id TEXT PRIMARY KEY,
+            domain TEXT,
+            x INTEGER,
+            y INTEGER,
+            w INTEGER,
+            h INTEGER
+        )
+    """)
+
+def create_blob_store(conn):
+    # See backend/blobs.py for the row shapes
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS blobs (
+            hash TEXT PRIMARY KEY,
+            content TEXT,
+            data BLOB,
+            base TEXT,
+            chain INTEGER DEFAULT 0
+        )
+    """)
+    # Blob tables created before delta compression only have (hash, content)
+    add_missing_columns(conn, "blobs", (("data", "BLOB"), ("base", "TEXT"), ("chain", "INTEGER DEFAULT 0")))
+
+def create_shatter_tables(conn):
+    # Stat manifest: lets incremental shatters skip files whose stat tuple is unchanged
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS shatter_manifest (
+            path TEXT PRIMARY KEY,
+            size INTEGER,
+            mtime_ns INTEGER,
+            inode INTEGER,
+            hash TEXT
+        )
+    """)
+    # Sync markers (e.g. the git HEAD the last --git shatter reached)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS shatter_state (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    """)
+
+def create_lookup_indexes(conn):
+    # A thread is identified by its endpoints; keep the oldest of any duplicates
+    conn.execute("""
+        DELETE FROM threads WHERE rowid NOT IN (
+            SELECT MIN(rowid) FROM threads GROUP BY source, target
+        )
+    """)
+    # Also serves `WHERE source = ?` (leftmost column)
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_threads_source_target ON threads (source, target)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_portals_atom_id ON portals (atom_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_atoms_status ON atoms (status)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_atoms_domain ON atoms (domain)")
+
+def move_fossils_out_of_atoms(conn, batch_size=500):
+    # Fossils used to be atoms rows with status 4 and an "<atom_id>@<ts>" ID, so
+    # every live-atom query had to step over the whole history.
+    # Keyed (atom_id, ts): one atom's history is a single index range, newest last.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS fossils (
+            atom_id TEXT NOT NULL,
+            ts TEXT NOT NULL,
+            hash TEXT,
+            type TEXT,
+            domain TEXT,
+            last_witnessed TEXT,
+            x INTEGER,
+            y INTEGER,
+            PRIMARY KEY (atom_id, ts)
+        )
+    """)
+    # Moved rows drop out of the predicate, so each pass picks up the next batch
+    while True:
+        rows = conn.execute("""
+            SELECT a.id, a.type, a.domain, a.content, a.hash, a.last_witnessed, g.x, g.y
+            FROM atoms a LEFT JOIN geometry g ON g.atom_id = a.id
+            WHERE a.status = 4 LIMIT ?
+        """, (batch_size,)).fetchall()
+        if not rows:
+            break
+        fossils = []
+        for fossil_id, atom_type, domain, content, content_hash, last_witnessed, x, y in rows:
+            # Timestamps never contain '@', atom IDs might
+            atom_id, sep, ts = fossil_id.rpartition('@')
+            if not sep:
+                atom_id, ts = fossil_id, ''
+            if content is not None:
+                # Inline fossil content becomes a plain blob (see backend/blobs.py)
+                content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+                conn.execute("INSERT OR IGNORE INTO blobs (hash, content) VALUES (?, ?)", (content_hash, content))
+            fossils.append((atom_id, ts or last_witnessed or '', content_hash, atom_type, domain, last_witnessed, x, y))
+        conn.executemany("""
+            INSERT OR IGNORE INTO fossils (atom_id, ts, hash, type, domain, last_witnessed, x, y)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, fossils)
+        ids = [(row[0],) for row in rows]
+        conn.executemany("DELETE FROM geometry WHERE atom_id = ?", ids)
+        conn.executemany("DELETE FROM atoms WHERE id = ?", ids)
+
+# Tables clients mirror, with the columns that identify a row (see backend/changelog.py)
+CHANGE_LOG_TABLES = (
+    ("atoms", ("id",)),
+    ("geometry", ("atom_id",)),
+    ("threads", ("id",)),
+    ("envelopes", ("id",)),
+    ("fossils", ("atom_id", "ts")),
+    ("portals", ("id",)),
+)
+
+def create_change_log(conn):
+    # One row per changed table row, re-stamped with a fresh seq on every change.
+    # AUTOINCREMENT: a seq is never reused, even after its row is replaced.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            tbl TEXT NOT NULL,
+            row_id TEXT NOT NULL,
+            op TEXT NOT NULL,
+            UNIQUE (tbl, row_id)
+        )
+    """)
+    # Triggers, so CLI scripts and other processes are logged too. The trigger
+    # deletes then inserts instead of INSERT OR REPLACE: an outer statement's
+    # conflict clause (INSERT OR IGNORE INTO threads ...) would override it.
+    for table, key in CHANGE_LOG_TABLES:
+        for op, ref in (("insert", "NEW"), ("update", "NEW"), ("delete", "OLD")):
+            row_id = " || '@' || ".join(f"{ref}.{column}" for column in key)
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS changes_{table}_{op} AFTER {op.upper()} ON {table}
+                BEGIN
+                    DELETE FROM changes WHERE tbl = '{table}' AND row_id = {row_id};
+                    INSERT INTO changes (tbl, row_id, op) VALUES ('{table}', {row_id}, '{op}');
+                END
+            """)
+
+def log_portal_changes(conn):
+    # Portals joined CHANGE_LOG_TABLES after the change log shipped (their seq
+    # versions GET /api/portals); this creates just the missing triggers
+    create_change_log(conn)
+
+def create_search_index(conn):
+    # See backend/search.py. Live atoms: an external-content index over atoms
+    # (no second copy of the text), maintained by the usual FTS5 trigger trio.
+    # This relies on atoms never being written with INSERT OR REPLACE, whose
+    # implicit delete fires no trigger.
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS atoms_fts USING fts5(
+            id, content, content='atoms', content_rowid='rowid',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS atoms_fts_insert AFTER INSERT ON atoms BEGIN
+            INSERT INTO atoms_fts (rowid, id, content) VALUES (NEW.rowid, NEW.id, NEW.content);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS atoms_fts_delete AFTER DELETE ON atoms BEGIN
+            INSERT INTO atoms_fts (atoms_fts, rowid, id, content) VALUES ('delete', OLD.rowid, OLD.id, OLD.content);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS atoms_fts_update AFTER UPDATE OF id, content ON atoms BEGIN
+            INSERT INTO atoms_fts (atoms_fts, rowid, id, content) VALUES ('delete', OLD.rowid, OLD.id, OLD.content);
+            INSERT INTO atoms_fts (rowid, id, content) VALUES (NEW.rowid, NEW.id, NEW.content);
+        END
+    """)
+    conn.execute("INSERT INTO atoms_fts (atoms_fts) VALUES ('rebuild')")
+    # Fossil content is delta-compressed in blobs: indexed from Python (search.index_fossils)
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS fossils_fts USING fts5(
+            content, content='',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+    """)
+
+MIGRATIONS = [
+    create_core_tables,
+    create_blob_store,
+    create_shatter_tables,
+    create_lookup_indexes,
+    move_fossils_out_of_atoms,
+    create_change_log,
+    log_portal_changes,
+    create_search_index,
+]
+
+LATEST_VERSION = len(MIGRATIONS)
+
+def current_version(conn):
+    try:
+        return conn.execute("SELECT MAX(version) FROM schema_version").fetchone()[0] or 0
+    except sqlite3.OperationalError:
+        return 0
+
+def migrate(conn):
+    """
+    Apply pending migrations, each atomically (inside a savepoint, so this also
+    works within a caller's open transaction). Returns the resulting version.
+    """
+    version = current_version(conn)
+    if version >= LATEST_VERSION:
+        return version
+
+    # Only takes effect on a new, empty database (before its first table); older
+    # ones are converted by maintenance once free space builds up (see
+    # backend/maintenance.py)
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT,
+            applied_at TEXT
+        )
+    """)
+    for number in range(version + 1, LATEST_VERSION + 1):
+        migration = MIGRATIONS[number - 1]
+        conn.execute("SAVEPOINT migration")
+        try:
+            migration(conn)
+            # OR IGNORE: another process may have applied the same migration concurrently
+            conn.execute(
+                "INSERT OR IGNORE INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                (number, migration.__name__, datetime.datetime.now().isoformat())
+            )
+        except BaseException:
+            conn.execute("ROLLBACK TO migration")
+            conn.execute("RELEASE migration")
+            raise
+        conn.execute("RELEASE migration")
+    return LATEST_VERSION
+
+def main():
+    parser = argparse.ArgumentParser(description="Create or upgrade a Sentinel DB schema")
+    parser.add_argument("db_path", nargs="?", default=".spatia/sentinel.db", help="Path to sentinel.db (created if missing)")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db_path)
+    before = current_version(conn)
+    after = migrate(conn)
+    conn.commit()
+    conn.close()
+    print(f"Schema version {before} -> {after} ({args.db_path})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import ast
+import io
+from collections import Counter
+
+# Sub-file atoms for Python sources.
+#
+# A split file becomes one atom per top-level function/class (and per method of a
+# split class), with IDs of the form "path::QualName". The file atom itself keeps
+# a skeleton: its source with every split definition replaced by a marker line
+#
+#     <indent># @spatia:part QualName
+#
+# so editing one function changes only that part's hash, not the file's. Markers
+# nest: a class part carries markers for its methods. compose() expands a skeleton
+# back to the exact original text; materialize uses it to rebuild files.
+
+PART_SEPARATOR = '::'
+MARKER_PREFIX = '# @spatia:part '
+
+SPLITTABLE = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+def part_id(path, qualname):
+    return f"{path}{PART_SEPARATOR}{qualname}"
+
+def parent_path(atom_id):
+    """File path of a part ID (or the ID itself for a whole-file atom)."""
+    return atom_id.split(PART_SEPARATOR, 1)[0]
+
+def split_lines(content):
+    # Same line breaks as the tokenizer (\n, \r\n, \r), unlike str.splitlines()
+    return io.StringIO(content, newline='').readlines()
+
+def line_ending(line):
+    if line.endswith('\r\n'):
+        return '\r\n'
+    if line.endswith(('\n', '\r')):
+        return line[-1]
+    return ''
+
+def owns_lines(lines, first, node):
+    """True when the definition starts and ends on lines of its own."""
+    if not lines[first].lstrip().startswith(('@', 'def', 'async', 'class')):
+        return False
+    tail = lines[node.end_lineno - 1].encode('utf-8')[node.end_col_offset:].decode('utf-8', 'replace').strip()
+    return tail == '' or tail.startswith('#')
+
+def carve(path, lines, start, end, body, prefix, parts):
+    """Text of lines[start:end] with each splittable definition in `body` swapped for a marker."""
+    nodes = [node for node in body if isinstance(node, SPLITTABLE)]
+    # Redefined names have no stable QualName; leave them inline
+    counts = Counter(node.name for node in nodes)
+    out = []
+    pos = start
+    for node in nodes:
+        first = min([node.lineno] + [d.lineno for d in node.decorator_list]) - 1
+        last = node.end_lineno
+        if counts[node.name] > 1 or first < pos or not owns_lines(lines, first, node):
+            continue
+
+        qualname = prefix + node.name
+        if isinstance(node, ast.ClassDef):
+            text = carve(path, lines, first, last, node.body, qualname + '.', parts)
+        else:
+            text = ''.join(lines[first:last])
+        parts.append((part_id(path, qualname), text))
+
+        indent = lines[first][:len(lines[first]) - len(lines[first].lstrip())]
+        out.append(''.join(lines[pos:first]))
+        out.append(f"{indent}{MARKER_PREFIX}{qualname}{line_ending(lines[last - 1])}")
+        pos = last
+    out.append(''.join(lines[pos:end]))
+    return ''.join(out)
+
+def split_python(path, content):
+    """
+    Split a Python source into (skeleton, [(part_id, part_content)]).
+    Returns None when the file does not parse, has nothing to split, or already
+    contains marker text (which compose() could not tell apart).
+    """
+    if MARKER_PREFIX in content:
+        return None
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return None
+    lines = split_lines(content)
+    parts = []
+    skeleton = carve(path, lines, 0, len(lines), tree.body, '', parts)
+    if not parts:
+        return None
+    return skeleton, parts
+
+def markers(path, content):
+    """Part IDs referenced directly by markers in `content`."""
+    if not content or MARKER_PREFIX not in content:
+        return set()
+    return {
+        part_id(path, line.strip()[len(MARKER_PREFIX):])
+        for line in split_lines(content) if line.strip().startswith(MARKER_PREFIX)
+    }
+
+def compose(path, content, parts):
+    """Expand part markers in `content` using `parts` ({part_id: content}).
+    Markers whose part is missing are left in place."""
+    if content is None or MARKER_PREFIX not in content:
+        return content
+    out = []
+    for line in split_lines(content):
+        stripped = line.strip()
+        if stripped.startswith(MARKER_PREFIX):
+            part = parts.get(part_id(path, stripped[len(MARKER_PREFIX):]))
+            if part is not None:
+                out.append(compose(path, part, parts))
+                continue
+        out.append(line)
+    return ''.join(out)
@@ -0,0 +1,196 @@
+import bisect
+import sqlite3
+import threading
+
+from backend import changelog
+
+# In-memory read model of the graph: atom metadata (with geometry), threads and
+# envelopes.
+#
+# Loaded in full from the DB once per workspace, then kept current from the change
+# log (see backend/changelog.py): sync() compares the log's seq with the one the
+# model reflects, which is a single MAX(seq) lookup when nothing changed, and
+# applies just the changed rows otherwise. A lower seq than the model's means
+# another database, and triggers a full reload, as does reset().
+#
+# Atom content is not held: listings that ask for it are served by the DB.
+
+class Record:
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def update(self, values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    def as_dict(self, fields=None):
+        return {name: getattr(self, name) for name in (fields or self.__slots__)}
+
+class AtomRecord(Record):
+    __slots__ = ("id", "type", "domain", "status", "hash", "last_witnessed", "parent_project", "x", "y")
+
+class ThreadRecord(Record):
+    __slots__ = ("id", "source", "target")
+
+class EnvelopeRecord(Record):
+    __slots__ = ("id", "domain", "x", "y", "w", "h")
+
+# Columns in slot order (the change log's ROW_QUERIES already are)
+ATOM_QUERY = """
+    SELECT a.id, a.type, a.domain, a.status, a.hash, a.last_witnessed, a.parent_project,
+           COALESCE(g.x, 0) AS x, COALESCE(g.y, 0) AS y
+    FROM atoms a LEFT JOIN geometry g ON a.id = g.atom_id
+"""
+ATOM_CHANGE_QUERY = ATOM_QUERY + " WHERE a.id IN ({placeholders})"
+THREAD_QUERY = "SELECT id, source, target FROM threads"
+ENVELOPE_QUERY = "SELECT id, domain, x, y, w, h FROM envelopes"
+
+class Table:
+    """
+    Records in load/insert order with an id -> index map. A delete leaves a hole
+    (O(1)); holes are compacted away once they outnumber the records.
+    """
+    def __init__(self, record_type):
+        self.record_type = record_type
+        self.records = []
+        self.index = {}
+        self.holes = 0
+
+    def __len__(self):
+        return len(self.index)
+
+    def __iter__(self):
+        return (record for record in self.records if record is not None)
+
+    def get(self, record_id):
+        position = self.index.get(record_id)
+        return None if position is None else self.records[position]
+
+    def upsert(self, values):
+        """Insert or update in place; returns True when the record is new."""
+        position = self.index.get(values[0])
+        if position is not None:
+            self.records[position].update(values)
+            return False
+        self.index[values[0]] = len(self.records)
+        self.records.append(self.record_type(*values))
+        return True
+
+    def delete(self, record_id):
+        position = self.index.pop(record_id, None)
+        if position is None:
+            return False
+        self.records[position] = None
+        self.holes += 1
+        if self.holes > len(self.index):
+            self.records = list(self)
+            self.index = {record.id: position for position, record in enumerate(self.records)}
+            self.holes = 0
+        return True
+
+class ReadModel:
+    def __init__(self, batch=1000):
+        self.batch = batch
+        self.seq = None
+        self.atoms = Table(AtomRecord)
+        self.threads = Table(ThreadRecord)
+        self.envelopes = Table(EnvelopeRecord)
+        # Atoms sorted by ID (the listing order), rebuilt after inserts or deletes
+        self._atom_order = None
+        self._lock = threading.RLock()
+
+    def covers(self, fields):
+        return all(field in AtomRecord.__slots__ for field in fields)
+
+    def reset(self):
+        """Drop everything; the next sync() reloads (e.g. after a workspace switch)."""
+        with self._lock:
+            self.seq = None
+            self.atoms = Table(AtomRecord)
+            self.threads = Table(ThreadRecord)
+            self.envelopes = Table(EnvelopeRecord)
+            self._atom_order = None
+
+    def sync(self, conn):
+        """Bring the model up to the DB's current seq. False when the DB has no change log."""
+        with self._lock:
+            try:
+                seq = changelog.current_seq(conn)
+            except sqlite3.OperationalError:
+                return False
+            if self.seq is None or seq < self.seq:
+                self._load(conn, seq)
+            elif seq > self.seq:
+                self._apply(conn, seq)
+            return True
+
+    def _load(self, conn, seq):
+        # seq is taken before the rows: changes landing in between are applied
+        # again by the next sync, which is harmless (entries are current state)
+        self.reset()
+        for table, query in ((self.atoms, ATOM_QUERY), (self.threads, THREAD_QUERY), (self.envelopes, ENVELOPE_QUERY)):
+            for row in conn.execute(query):
+                table.upsert(tuple(row))
+        self.seq = seq
+
+    def _apply(self, conn, seq):
+        while self.seq < seq:
+            changes = changelog.changes_since(conn, self.seq, self.batch, ATOM_CHANGE_QUERY)
+            if not changes:
+                break
+            for change in changes:
+                self._apply_change(change)
+            self.seq = changes[-1]["seq"]
+
+    def _apply_change(self, change):
+        table, row = change["table"], change["row"]
+        if table == "atoms":
+            if row is None:
+                reordered = self.atoms.delete(change["id"])
+            else:
+                reordered = self.atoms.upsert(tuple(row.values()))
+            if reordered:
+                self._atom_order = None
+        elif table == "geometry":
+            atom = self.atoms.get(change["id"])
+            if atom is not None:
+                atom.x, atom.y = (row["x"] or 0, row["y"] or 0) if row else (0, 0)
+        elif table in ("threads", "envelopes"):
+            records = self.threads if table == "threads" else self.envelopes
+            if row is None:
+                records.delete(change["id"])
+            else:
+                records.upsert(tuple(row.values()))
+        # Fossils and portals are not part of the model
+
+    def list_atoms(self, fields, status=None, domain=None, box=None, after=None, limit=None):
+        """Like GET /api/atoms without content: (rows, next_after)."""
+        with self._lock:
+            if self._atom_order is None:
+                self._atom_order = sorted(self.atoms, key=lambda atom: atom.id)
+            order = self._atom_order
+            start = 0 if after is None else bisect.bisect_right(order, after, key=lambda atom: atom.id)
+            atoms, next_after = [], None
+            for atom in order[start:] if start else order:
+                if status is not None and atom.status != status:
+                    continue
+                if domain is not None and atom.domain != domain:
+                    continue
+                if box and not (box[0] <= atom.x <= box[2] and box[1] <= atom.y <= box[3]):
+                    continue
+                if limit is not None and len(atoms) == limit:
+                    next_after = atoms[-1]["id"]
+                    break
+                atoms.append(atom.as_dict(fields))
+            return atoms, next_after
+
+    def list_threads(self):
+        with self._lock:
+            return [{"id": thread.id, "source": thread.source, "target": thread.target} for thread in self.threads]
+
+    def list_envelopes(self):
+        with self._lock:
+            return [envelope.as_dict() for envelope in self.envelopes]
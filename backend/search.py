@@ -0,0 +1,144 @@
+import re
+import sqlite3
+
+from backend import blobs
+
+# Full-text search over atoms (see migrations.create_search_index).
+#
+#   atoms_fts    external-content FTS5 index of live atoms (id, content), kept in
+#                sync with the atoms table by triggers; snippets come from atoms
+#   fossils_fts  contentless FTS5 index of fossil content, keyed by fossils.rowid
+#
+# Fossil content lives delta-compressed in the blob store, out of reach of a
+# trigger, so fossils_fts is filled in Python: index_fossils() reconstructs the
+# content of fossils added since the last call. Fossils are only ever appended,
+# so the highest indexed rowid is the whole catch-up state.
+
+MARK_OPEN, MARK_CLOSE, ELLIPSIS = "<mark>", "</mark>", "…"
+SNIPPET_TOKENS = 16
+SNIPPET_CHARS = 80
+
+# ID matches count for more than content matches
+LIVE_QUERY = f"""
+    SELECT a.id, a.domain, a.status,
+           snippet(atoms_fts, -1, '{MARK_OPEN}', '{MARK_CLOSE}', '{ELLIPSIS}', {SNIPPET_TOKENS}) AS snippet,
+           bm25(atoms_fts, 5.0, 1.0) AS score
+    FROM atoms_fts JOIN atoms a ON a.rowid = atoms_fts.rowid
+    WHERE atoms_fts MATCH ?{{filters}}
+    ORDER BY score LIMIT ? OFFSET ?
+"""
+
+FOSSIL_QUERY = """
+    SELECT f.atom_id, f.ts, f.domain, f.hash, bm25(fossils_fts) AS score
+    FROM fossils_fts JOIN fossils f ON f.rowid = fossils_fts.rowid
+    WHERE fossils_fts MATCH ?{filters}
+    ORDER BY score LIMIT ? OFFSET ?
+"""
+
+class QueryError(ValueError):
+    pass
+
+def parse_query(q, syntax="simple"):
+    """
+    The FTS5 MATCH expression for `q` and the words to highlight.
+
+    simple: every whitespace-separated chunk must match as a phrase ("main.py"
+    matches the tokens main, py in a row); the last chunk also matches as a
+    prefix, for search-as-you-type. fts: q is FTS5 query syntax, passed through.
+    """
+    words = re.findall(r"\w+", q)
+    if syntax == "fts":
+        if not q.strip():
+            raise QueryError("Empty query")
+        return q, [w for w in words if w not in ("AND", "OR", "NOT", "NEAR")]
+    chunks = [chunk for chunk in q.split() if re.search(r"\w", chunk)]
+    if not chunks:
+        raise QueryError("Empty query")
+    phrases = ['"' + chunk.replace('"', '""') + '"' for chunk in chunks]
+    if not q[-1].isspace():
+        phrases[-1] += "*"
+    return " ".join(phrases), words
+
+def filter_clause(domain, status, alias):
+    filters, params = [], []
+    if domain is not None:
+        filters.append(f"{alias}.domain = ?")
+        params.append(domain)
+    if status is not None:
+        filters.append(f"{alias}.status = ?")
+        params.append(status)
+    return "".join(f" AND {f}" for f in filters), params
+
+def highlight(text, words, prefix=True):
+    """A snippet of `text` around the first match of `words`, matches marked as snippet() does."""
+    if not text:
+        return ""
+    if not words:
+        return text[:SNIPPET_CHARS * 2] + (ELLIPSIS if len(text) > SNIPPET_CHARS * 2 else "")
+    pattern = re.compile(r"\b(?:" + "|".join(re.escape(w) for w in words) + (r")\w*" if prefix else r")\b"), re.IGNORECASE)
+    first = pattern.search(text)
+    center = first.start() if first else 0
+    start = max(0, center - SNIPPET_CHARS // 2)
+    end = min(len(text), start + SNIPPET_CHARS * 2)
+    window = pattern.sub(lambda m: MARK_OPEN + m.group(0) + MARK_CLOSE, text[start:end])
+    return (ELLIPSIS if start else "") + window + (ELLIPSIS if end < len(text) else "")
+
+def search(conn, q, domain=None, status=None, limit=20, offset=0, syntax="simple", fossils=False):
+    """
+    Ranked matches (best first) as {"results": [...]}, plus "fossils" when asked
+    for. Scores are bm25, negated so higher is better. Raises QueryError for an
+    empty or malformed query.
+    """
+    match, words = parse_query(q, syntax)
+    cursor = conn.cursor()
+    filters, params = filter_clause(domain, status, "a")
+    try:
+        cursor.execute(LIVE_QUERY.format(filters=filters), [match, *params, limit, offset])
+        results = [{
+            "id": row[0],
+            "domain": row[1],
+            "status": row[2],
+            "snippet": row[3],
+            "score": -row[4],
+        } for row in cursor.fetchall()]
+
+        found = {"results": results}
+        if fossils:
+            # The status filter is for live atoms; fossils are all status 4
+            filters, params = filter_clause(domain, None, "f")
+            cursor.execute(FOSSIL_QUERY.format(filters=filters), [match, *params, limit, offset])
+            rows = cursor.fetchall()
+            contents = blobs.get_blobs(cursor, [row[3] for row in rows if row[3]])
+            found["fossils"] = [{
+                "id": f"{atom_id}@{ts}",
+                "atom_id": atom_id,
+                "ts": ts,
+                "domain": fossil_domain,
+                "snippet": highlight(contents.get(fossil_hash), words, prefix=syntax == "simple"),
+                "score": -score,
+            } for atom_id, ts, fossil_domain, fossil_hash, score in rows]
+    except sqlite3.OperationalError as e:
+        # Malformed FTS5 syntax (syntax="fts") surfaces here
+        if "fts5" in str(e) or "syntax" in str(e):
+            raise QueryError(str(e))
+        raise
+    return found
+
+def index_fossils(conn, batch=200):
+    """Add fossils created since the last call to fossils_fts. Returns how many were indexed."""
+    cursor = conn.cursor()
+    row = cursor.execute("SELECT rowid FROM fossils_fts ORDER BY rowid DESC LIMIT 1").fetchone()
+    last = row[0] if row else 0
+    indexed = 0
+    while True:
+        cursor.execute("SELECT rowid, hash FROM fossils WHERE rowid > ? ORDER BY rowid LIMIT ?", (last, batch))
+        rows = cursor.fetchall()
+        if not rows:
+            return indexed
+        contents = blobs.get_blobs(cursor, [fossil_hash for _, fossil_hash in rows if fossil_hash])
+        cursor.executemany(
+            "INSERT INTO fossils_fts (rowid, content) VALUES (?, ?)",
+            [(rowid, contents.get(fossil_hash) or "") for rowid, fossil_hash in rows]
+        )
+        indexed += len(rows)
+        last = rows[-1][0]
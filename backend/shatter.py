@@ -0,0 +1,516 @@
+import datetime
+import json
+import os
+import re
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
+
+from backend import blobs, ignore, migrations, parts
+from backend.blobs import calculate_hash
+from backend.db_query import fetch_rows
+
+# Shatter: File System -> Sentinel DB.
+# Used in-process by the backend (in a worker thread) and by the spatia-shatter.py CLI.
+#
+# Entry points:
+#   shatter(conn)               incremental full-tree walk, driven by the stat manifest
+#   shatter_paths(conn, paths)  only the listed files (tree watcher; commit=False inside
+#                               a caller's transaction)
+#   shatter_git(conn)           only what git reports as changed since the last sync
+#   shatter_items(conn, items)  explicit files and hollow constructs, no commit (API)
+#
+# With split enabled (--ast, or SPATIA_SHATTER_AST=1 for the backend), Software-domain
+# Python files are shattered into function/class-level part atoms (see backend/parts.py).
+#
+# Every entry point funnels file contents through write_batch(), which fossilizes
+# changed atoms and upserts live ones with a handful of executemany calls.
+#
+# The manifest only knows stat tuples, so the split mode of the last full walk is
+# kept in shatter_state: when it changes, Python files are re-read even if their
+# stat tuple is unchanged, which splits them or retires their parts.
+
+def detect_domain(filename, content):
+    # Register Domain - existing logic
+    if filename.endswith('.h'):
+        if re.search(r'0x[0-9A-Fa-f]+', content):
+            return 'Register'
+            
+    # Culinary Domain
+    if filename.endswith('.recipe') or filename.endswith('.cook'):
+        return 'Culinary'
+        
+    # Legal Domain
+    if filename.endswith('.contract') or filename.endswith('.legal'):
+        return 'Legal'
+        
+    # Software Domain
+    software_exts = {'.py', '.js', '.jsx', '.ts', '.tsx', '.rs', '.go', '.cpp', '.c', '.java', '.rb'}
+    _, ext = os.path.splitext(filename)
+    if ext in software_exts:
+        return 'Software'
+
+    return 'generic'
+
+# Files modified this close to the scan start may change again within the same
+# mtime tick, so their stat tuple cannot be trusted on the next run ("racy clean").
+RACY_WINDOW_NS = 2_000_000_000
+
+# Results are committed in large transactions rather than per file
+WRITE_BATCH_SIZE = 500
+
+# Default for the split (AST sub-atom) mode
+SPLIT_PYTHON = os.environ.get('SPATIA_SHATTER_AST', '0') == '1'
+
+def stat_key(st):
+    return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+def manifest_key(st, scan_started_ns):
+    """The stat tuple to record for a file read in a scan started at scan_started_ns."""
+    # Racy entries are stored with mtime 0 so the next run re-hashes them
+    if st.st_mtime_ns >= scan_started_ns - RACY_WINDOW_NS:
+        return (st.st_size, 0, st.st_ino)
+    return stat_key(st)
+
+def read_atom(full_path, rel_path, key, split=False):
+    """
+    Pipeline stage run on the worker pool: read, decode, hash and classify one file.
+    Returns (rel_path, key, content, file_hash, domain, nbytes, error, sub_atoms).
+    sub_atoms is None unless the file was split, in which case content is the
+    file's skeleton and sub_atoms lists (part_id, content, hash).
+    """
+    try:
+        with open(full_path, 'rb') as f:
+            raw = f.read()
+    except Exception as e:
+        return (rel_path, key, None, None, None, 0, f"Error reading {rel_path}: {e}", None)
+    try:
+        content = raw.decode('utf-8')
+    except UnicodeDecodeError:
+        return (rel_path, key, None, None, None, len(raw), f"Skipping binary or non-utf8 file: {rel_path}", None)
+
+    domain = detect_domain(os.path.basename(rel_path), content)
+    sub_atoms = None
+    if split and domain == 'Software' and rel_path.endswith('.py'):
+        carved = parts.split_python(rel_path, content)
+        if carved:
+            content, sub_atoms = carved[0], [(pid, text, calculate_hash(text)) for pid, text in carved[1]]
+    file_hash = calculate_hash(content)
+    return (rel_path, key, content, file_hash, domain, len(raw), None, sub_atoms)
+
+def check_candidate(full_path, rel_path, manifest, full, stats, scan_started_ns, rehash=()):
+    """
+    Stat one file; return its (full_path, rel_path, key) if it needs reading, else None.
+    Files ending in one of the `rehash` suffixes are read whatever their stat tuple.
+    """
+    try:
+        st = os.stat(full_path)
+    except OSError as e:
+        print(f"Error reading {rel_path}: {e}")
+        return None
+
+    stats['seen'].add(rel_path)
+    previous = manifest.get(rel_path)
+    if not full and previous and tuple(previous[:3]) == stat_key(st) and not rel_path.endswith(rehash):
+        stats['unchanged'] += 1
+        return None
+
+    return full_path, rel_path, manifest_key(st, scan_started_ns)
+
+def iter_candidates(project_root, manifest, full, stats, rehash=()):
+    """Walk the tree and yield files whose stat tuple differs from the manifest."""
+    scan_started_ns = time.time_ns()
+
+    # Ignored directories (.gitignore, .ctxignore, Sentinel state) are pruned before descent
+    for root, dirs, files in ignore.load(project_root).walk():
+        for file in files:
+            full_path = os.path.join(root, file)
+            rel_path = os.path.relpath(full_path, project_root)
+            candidate = check_candidate(full_path, rel_path, manifest, full, stats, scan_started_ns, rehash)
+            if candidate:
+                yield candidate
+
+def iter_path_candidates(project_root, paths, manifest, stats, rehash=()):
+    """Yield candidates for an explicit list of paths; missing files land in stats['missing']."""
+    scan_started_ns = time.time_ns()
+    matcher = ignore.load(project_root)
+
+    for path in dict.fromkeys(paths):
+        full_path = os.path.abspath(os.path.join(project_root, path))
+        rel_path = os.path.relpath(full_path, project_root)
+        if matcher.is_ignored(rel_path):
+            continue
+        if not os.path.isfile(full_path):
+            if not os.path.exists(full_path):
+                stats['missing'].append(rel_path)
+            continue
+        candidate = check_candidate(full_path, rel_path, manifest, False, stats, scan_started_ns, rehash)
+        if candidate:
+            yield candidate
+
+def load_live_hashes(cursor):
+    """Prefetch {id: hash} for every live atom so unchanged files cost no SELECT."""
+    cursor.execute("SELECT id, hash FROM atoms")
+    return dict(cursor.fetchall())
+
+# Live state of atoms about to be fossilized (geometry travels with the fossil)
+FOSSIL_SOURCE_QUERY = """
+    SELECT a.id, a.type, a.domain, a.content, a.last_witnessed, g.x, g.y
+    FROM atoms a LEFT JOIN geometry g ON g.atom_id = a.id
+    WHERE a.id IN ({placeholders})
+"""
+
+INSERT_FOSSIL = """
+    INSERT INTO fossils (atom_id, ts, hash, type, domain, last_witnessed, x, y)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+def write_batch(cursor, live_hashes, batch):
+    """
+    Writer stage: apply a batch of read results with a handful of executemany calls.
+    Old content is only fetched for atoms whose hash actually changed, to fossilize it.
+    Returns (written_ids, fossilized).
+    """
+    timestamp = datetime.datetime.now().isoformat()
+    upserts = []
+    manifest_rows = []
+    changed = []
+
+    for rel_path, key, content, file_hash, domain, nbytes, error, sub_atoms in batch:
+        if error:
+            print(error)
+            if nbytes and key is not None:
+                # Remember binaries too, so they are not re-read on every run
+                manifest_rows.append((rel_path, *key, None))
+            continue
+
+        # Hollow constructs (key None) have no file to track
+        if key is not None:
+            manifest_rows.append((rel_path, *key, file_hash))
+        print(f"Shattered: {rel_path} (Domain: {domain})")
+
+        atoms = [(rel_path, 'file', content, file_hash)]
+        atoms.extend((pid, 'part', text, text_hash) for pid, text, text_hash in sub_atoms or ())
+        for atom_id, atom_type, atom_content, atom_hash in atoms:
+            if live_hashes.get(atom_id) == atom_hash:
+                continue
+            if atom_id in live_hashes:
+                changed.append(atom_id)
+            upserts.append((atom_id, atom_type, atom_content, atom_hash, timestamp, domain))
+            live_hashes[atom_id] = atom_hash
+
+    fossils = []
+    retired = set()
+    if changed:
+        new_contents = {row[0]: row[2] for row in upserts}
+        for atom_id, atom_type, domain, old_content, old_last_witnessed, x, y in fetch_rows(cursor, FOSSIL_SOURCE_QUERY, changed):
+            # Old content goes to the blob store once, delta-encoded against the new version
+            old_hash = blobs.fossilize(cursor, old_content, new_contents[atom_id])
+            fossils.append((atom_id, datetime.datetime.now().isoformat(), old_hash, atom_type, domain, old_last_witnessed, x, y))
+            # Definitions whose marker disappeared (removed, renamed, or split mode off)
+            if old_content and parts.MARKER_PREFIX in old_content:
+                path = parts.parent_path(atom_id)
+                retired |= parts.markers(path, old_content) - parts.markers(path, new_contents[atom_id])
+
+    if retired:
+        fossils.extend(retire_parts(cursor, live_hashes, retired))
+
+    cursor.executemany(INSERT_FOSSIL, fossils)
+
+    cursor.executemany("""
+        INSERT INTO atoms (id, type, content, hash, last_witnessed, domain)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            content = excluded.content,
+            hash = excluded.hash,
+            last_witnessed = excluded.last_witnessed,
+            domain = excluded.domain
+    """, upserts)
+    cursor.executemany("""
+        INSERT OR REPLACE INTO shatter_manifest (path, size, mtime_ns, inode, hash)
+        VALUES (?, ?, ?, ?, ?)
+    """, manifest_rows)
+    return [row[0] for row in upserts], len(fossils)
+
+def retire_parts(cursor, live_hashes, retired):
+    """
+    Fossilize part atoms that are no longer referenced by their parent, along with
+    any parts nested under them. Their geometry moves to the fossil.
+    Returns fossil rows for write_batch to insert.
+    """
+    fossils = []
+    while retired:
+        rows = fetch_rows(cursor, FOSSIL_SOURCE_QUERY, retired)
+        retired = set()
+        for atom_id, atom_type, domain, content, last_witnessed, x, y in rows:
+            fossils.append((atom_id, datetime.datetime.now().isoformat(), blobs.put_blob(cursor, content), atom_type, domain, last_witnessed, x, y))
+            live_hashes.pop(atom_id, None)
+            retired |= parts.markers(parts.parent_path(atom_id), content)
+            print(f"Retired part: {atom_id}")
+        ids = [(row[0],) for row in rows]
+        cursor.executemany("DELETE FROM geometry WHERE atom_id = ?", ids)
+        cursor.executemany("DELETE FROM atoms WHERE id = ?", ids)
+    return fossils
+
+def load_manifest(conn):
+    migrations.migrate(conn)
+    cursor = conn.cursor()
+    cursor.execute("SELECT path, size, mtime_ns, inode, hash FROM shatter_manifest")
+    return {row[0]: row[1:] for row in cursor.fetchall()}
+
+def split_changed(conn, split):
+    """Whether split differs from the mode of the last full walk (off, if none recorded)."""
+    return (get_state(conn, 'split') or '0') != ('1' if split else '0')
+
+def rehash_suffixes(conn, split):
+    # Only Python files are ever split
+    return ('.py',) if split_changed(conn, split) else ()
+
+def run_pipeline(conn, candidates, jobs, split=False, commit=True):
+    """
+    Feed candidates through a bounded worker pool that reads, hashes and classifies
+    files; results are applied by the calling thread, which is the single SQLite
+    writer, committing every WRITE_BATCH_SIZE files (unless commit is False, when
+    the caller owns the transaction).
+    """
+    cursor = conn.cursor()
+    live_hashes = load_live_hashes(cursor)
+    totals = {'shattered': 0, 'written': 0, 'fossilized': 0, 'bytes': 0, 'atom_ids': []}
+    batch = []
+
+    def flush():
+        written_ids, fossilized = write_batch(cursor, live_hashes, batch)
+        totals['written'] += len(written_ids)
+        totals['atom_ids'].extend(written_ids)
+        totals['fossilized'] += fossilized
+        batch.clear()
+        if commit:
+            conn.commit()
+
+    def collect(future):
+        result = future.result()
+        totals['bytes'] += result[5]
+        if not result[6]:
+            totals['shattered'] += 1
+        batch.append(result)
+        if len(batch) >= WRITE_BATCH_SIZE:
+            flush()
+
+    # Bound the number of in-flight reads so file contents never pile up in memory
+    max_in_flight = jobs * 4
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        in_flight = set()
+        for candidate in candidates:
+            in_flight.add(pool.submit(read_atom, *candidate, split))
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future)
+        for future in as_completed(in_flight):
+            collect(future)
+    flush()
+    return totals
+
+def forget_deleted(conn, deleted, commit=True):
+    for rel_path in deleted:
+        print(f"Deleted: {rel_path}")
+    conn.executemany("DELETE FROM shatter_manifest WHERE path = ?", [(p,) for p in deleted])
+    if commit:
+        conn.commit()
+
+def shatter(conn, full=False, jobs=None, project_root=None, split=None):
+    """Pipelined full-tree shatter, skipping files whose stat tuple is unchanged."""
+    project_root = project_root or os.getcwd()
+    split = SPLIT_PYTHON if split is None else split
+    jobs = jobs or os.cpu_count() or 1
+    started = time.perf_counter()
+
+    manifest = load_manifest(conn)
+    stats = {'seen': set(), 'unchanged': 0}
+    rehash = rehash_suffixes(conn, split)
+    totals = run_pipeline(conn, iter_candidates(project_root, manifest, full, stats, rehash), jobs, split)
+
+    # Anything in the manifest that the walk did not see has been deleted
+    deleted = sorted(set(manifest) - stats['seen'])
+    forget_deleted(conn, deleted)
+    # Every file has now been read in this mode
+    set_state(conn, {'split': '1' if split else '0'})
+
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    shattered = totals['shattered']
+    files_per_sec = shattered / elapsed
+    mb_per_sec = totals['bytes'] / elapsed / (1024 * 1024)
+    print(f"Shatter complete: {shattered} shattered ({totals['written']} written, {totals['fossilized']} fossilized), {stats['unchanged']} unchanged, {len(deleted)} deleted")
+    print(f"Throughput: {files_per_sec:.1f} files/sec, {mb_per_sec:.2f} MB/sec ({jobs} jobs, {elapsed:.2f}s)")
+    return {
+        "shattered": shattered,
+        "written": totals['written'],
+        "fossilized": totals['fossilized'],
+        "unchanged": stats['unchanged'],
+        "deleted": deleted,
+        "bytes": totals['bytes'],
+        "elapsed": elapsed,
+    }
+
+def shatter_paths(conn, paths, jobs=None, project_root=None, split=None, commit=True):
+    """
+    Shatter only the given paths (relative to the project root) in batched
+    transactions. Used by the backend tree watcher. Returns the IDs of atoms whose
+    content actually changed, plus any paths that no longer exist.
+    With commit False nothing is committed, so a caller holding a transaction
+    can add its own writes (geometry, announcements) before its single commit.
+    """
+    project_root = project_root or os.getcwd()
+    split = SPLIT_PYTHON if split is None else split
+    jobs = jobs or os.cpu_count() or 1
+
+    manifest = load_manifest(conn)
+    stats = {'seen': set(), 'unchanged': 0, 'missing': []}
+    # Files outside `paths` are left as they are, so a mode change is not recorded
+    # here: only a full walk settles it
+    rehash = rehash_suffixes(conn, split)
+    totals = run_pipeline(conn, iter_path_candidates(project_root, paths, manifest, stats, rehash), jobs, split, commit)
+
+    deleted = sorted(p for p in stats['missing'] if p in manifest)
+    forget_deleted(conn, deleted, commit)
+    return {
+        "shattered": totals['shattered'],
+        "fossilized": totals['fossilized'],
+        "unchanged": stats['unchanged'],
+        "atom_ids": totals['atom_ids'],
+        "deleted": deleted,
+    }
+
+def shatter_items(conn, items, project_root=None, split=None):
+    """
+    Shatter explicit items in one transaction, without committing, so the caller
+    can add its own writes (e.g. geometry) before the single commit.
+
+    `items` is an iterable of (path, content). With content None, `path` is a file
+    relative to project_root; otherwise it is the ID of a hollow construct whose
+    content is given directly. Explicit files bypass the ignore rules.
+    Returns atom_ids (every item shattered, in order), changed (the subset whose
+    content differed), fossilized, and errors ([(path, message)]).
+    """
+    project_root = project_root or os.getcwd()
+    split = SPLIT_PYTHON if split is None else split
+    migrations.migrate(conn)
+    scan_started_ns = time.time_ns()
+
+    batch = []
+    errors = []
+    for path, content in items:
+        if content is not None:
+            batch.append((path, None, content, calculate_hash(content), 'generic', len(content.encode('utf-8')), None, None))
+            continue
+        full_path = os.path.abspath(os.path.join(project_root, path))
+        rel_path = os.path.relpath(full_path, project_root)
+        try:
+            key = manifest_key(os.stat(full_path), scan_started_ns)
+        except OSError:
+            errors.append((path, f"File {full_path} not found"))
+            continue
+        result = read_atom(full_path, rel_path, key, split)
+        if result[6]:
+            errors.append((path, result[6]))
+            continue
+        batch.append(result)
+
+    cursor = conn.cursor()
+    ids = [row[0] for row in batch]
+    part_ids = [pid for row in batch for pid, _, _ in row[7] or ()]
+    live_hashes = dict(fetch_rows(cursor, "SELECT id, hash FROM atoms WHERE id IN ({placeholders})", ids + part_ids))
+    written_ids, fossilized = write_batch(cursor, live_hashes, batch)
+    return {
+        "atom_ids": list(dict.fromkeys(ids)),
+        "changed": written_ids,
+        "fossilized": fossilized,
+        "errors": errors,
+    }
+
+# --- Git fast path ---
+
+class GitUnavailable(Exception):
+    pass
+
+def git(project_root, *args):
+    try:
+        result = subprocess.run(['git', *args], cwd=project_root, capture_output=True, check=True)
+    except (OSError, subprocess.CalledProcessError) as e:
+        raise GitUnavailable(f"git {' '.join(args)} failed: {getattr(e, 'stderr', b'') or e}")
+    return result.stdout
+
+def git_paths(output, top, project_root):
+    """NUL-separated repo-relative paths -> paths relative to project_root."""
+    paths = []
+    for path in output.decode('utf-8', 'surrogateescape').split('\0'):
+        if path:
+            rel_path = os.path.relpath(os.path.join(top, path), project_root)
+            if not rel_path.startswith('..'):
+                paths.append(rel_path)
+    return paths
+
+def git_status_paths(project_root, top):
+    """Modified, staged, untracked and deleted paths in the working tree."""
+    output = git(project_root, 'status', '--porcelain=v1', '-z', '--untracked-files=all', '--no-renames')
+    # Each entry is "XY <path>"; with --no-renames there is exactly one path per entry
+    entries = [entry[3:] for entry in output.split(b'\0') if len(entry) > 3]
+    return git_paths(b'\0'.join(entries), top, project_root)
+
+def get_state(conn, key):
+    row = conn.execute("SELECT value FROM shatter_state WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+def set_state(conn, values):
+    conn.executemany("INSERT OR REPLACE INTO shatter_state (key, value) VALUES (?, ?)", list(values.items()))
+    conn.commit()
+
+def shatter_git(conn, jobs=None, project_root=None, split=None):
+    """
+    Shatter only what git reports as changed since the HEAD recorded by the last
+    --git run: files touched by new commits, plus the working tree's modified,
+    untracked and deleted files. Paths that were dirty at the last sync are
+    rechecked too, since reverting them leaves no trace in git. Falls back to a
+    manifest-driven walk when there is no usable sync point.
+    """
+    project_root = project_root or os.getcwd()
+    started = time.perf_counter()
+    top = git(project_root, 'rev-parse', '--show-toplevel').decode().strip()
+    try:
+        head = git(project_root, 'rev-parse', '--verify', 'HEAD').decode().strip()
+    except GitUnavailable:
+        head = None  # Repository without commits yet
+
+    load_manifest(conn)
+    synced_head = get_state(conn, 'git_head')
+    dirty = git_status_paths(project_root, top)
+
+    paths = None
+    split = SPLIT_PYTHON if split is None else split
+    if split_changed(conn, split):
+        # Files git considers unchanged must be re-split (or un-split) too
+        print("Split mode changed; falling back to a tree walk")
+    elif synced_head:
+        try:
+            if synced_head != head:
+                committed = git(project_root, 'diff', '--name-only', '-z', '--no-renames', synced_head, head or 'HEAD', '--')
+                paths = git_paths(committed, top, project_root)
+            else:
+                paths = []
+        except GitUnavailable as e:
+            print(f"Git sync point {synced_head[:12]} unusable ({e}); falling back to a tree walk")
+
+    if paths is None:
+        result = shatter(conn, jobs=jobs, project_root=project_root, split=split)
+        result['mode'] = 'walk'
+    else:
+        previously_dirty = json.loads(get_state(conn, 'git_dirty') or '[]')
+        paths = sorted(set(paths) | set(dirty) | set(previously_dirty))
+        result = shatter_paths(conn, paths, jobs=jobs, project_root=project_root, split=split)
+        result['mode'] = 'git'
+        print(f"Git delta: {len(paths)} path(s), {result['shattered']} shattered, {len(result['deleted'])} deleted ({time.perf_counter() - started:.2f}s)")
+
+    set_state(conn, {'git_head': head or '', 'git_dirty': json.dumps(sorted(dirty))})
+    result['head'] = head
+    print(f"Synced to {head[:12] if head else '(no commits)'}")
+    return result
@@ -0,0 +1,229 @@
+import datetime
+import hashlib
+import os
+import re
+import sqlite3
+import zlib
+
+# Workspace snapshots, taken with SQLite's online backup API.
+#
+# A snapshot is read from a pinned read transaction: in WAL mode (what every
+# workspace DB runs in, see db_pool.PRAGMAS) that is a consistent view of the
+# database, WAL contents included, and writers carry on while it is copied. The
+# copy proceeds BACKUP_PAGES at a time; for a DB in rollback-journal mode the
+# read lock is released between steps instead, so writers get a turn.
+#
+# Two formats, side by side in the workspace directory:
+#   full         sentinel.snap.<id>.db, a standalone copy of the database
+#   incremental  a row in sentinel.snapshots.db: the database split into
+#                CHUNK_SIZE chunks, stored once per distinct content (zlib) and
+#                listed by hash. SQLite rewrites pages in place, so successive
+#                snapshots of a large DB share nearly all of their chunks.
+#
+# Snapshot ids are creation timestamps (YYYYmmddHHMMSS, with -N on collision).
+
+DB_NAME = "sentinel.db"
+STORE_NAME = "sentinel.snapshots.db"
+FULL_PATTERN = re.compile(r"^sentinel\.snap\.(\d{14}(?:-\d+)?)\.db$")
+ID_PATTERN = re.compile(r"^\d{14}(?:-\d+)?$")
+
+BACKUP_PAGES = 256
+CHUNK_SIZE = 16 * 1024
+DIGEST_SIZE = 32
+
+STORE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS chunks (
+        hash BLOB PRIMARY KEY,
+        data BLOB NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS snapshots (
+        id TEXT PRIMARY KEY,
+        created TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        stored INTEGER NOT NULL,
+        chunks BLOB NOT NULL
+    );
+"""
+
+class SnapshotNotFound(LookupError):
+    pass
+
+def backup(src_path, dest_path, pages=BACKUP_PAGES, progress=None):
+    """
+    Copy the database at `src_path` to `dest_path` (replacing its contents) with
+    the backup API. `progress(remaining, total)` is called after every step.
+    """
+    src = sqlite3.connect(src_path, isolation_level=None)
+    dest = sqlite3.connect(dest_path)
+    try:
+        if src.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+            # Pin one snapshot for the whole copy; WAL readers never block writers
+            src.execute("BEGIN")
+            src.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+        src.backup(dest, pages=pages, progress=(lambda status, remaining, total: progress(remaining, total)) if progress else None)
+    finally:
+        if src.in_transaction:
+            src.execute("COMMIT")
+        src.close()
+        dest.close()
+
+def open_store(ws_path):
+    conn = sqlite3.connect(os.path.join(ws_path, STORE_NAME))
+    conn.executescript(STORE_SCHEMA)
+    return conn
+
+def store_ids(ws_path):
+    if not os.path.exists(os.path.join(ws_path, STORE_NAME)):
+        return []
+    conn = open_store(ws_path)
+    try:
+        return [row[0] for row in conn.execute("SELECT id FROM snapshots")]
+    finally:
+        conn.close()
+
+def new_id(ws_path):
+    taken = {m.group(1) for m in map(FULL_PATTERN.match, os.listdir(ws_path)) if m} | set(store_ids(ws_path))
+    base = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+    snapshot_id, counter = base, 1
+    while snapshot_id in taken:
+        snapshot_id = f"{base}-{counter}"
+        counter += 1
+    return snapshot_id
+
+def created_at(snapshot_id):
+    return datetime.datetime.strptime(snapshot_id[:14], "%Y%m%d%H%M%S").isoformat()
+
+def take(ws_path, format="full", progress=None):
+    """Snapshot the workspace's database; returns its listing entry."""
+    db_path = os.path.join(ws_path, DB_NAME)
+    snapshot_id = new_id(ws_path)
+    if format == "full":
+        snap_path = os.path.join(ws_path, f"sentinel.snap.{snapshot_id}.db")
+        tmp_path = snap_path + ".tmp"
+        try:
+            backup(db_path, tmp_path, progress=progress)
+            os.replace(tmp_path, snap_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        size = os.path.getsize(snap_path)
+        return {"id": snapshot_id, "format": "full", "created": created_at(snapshot_id), "size": size, "stored": size}
+
+    if format != "incremental":
+        raise ValueError(f"Unknown snapshot format: {format}")
+    tmp_path = os.path.join(ws_path, f".snapshot.{snapshot_id}.tmp")
+    try:
+        backup(db_path, tmp_path, progress=progress)
+        return store_chunks(ws_path, snapshot_id, tmp_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def store_chunks(ws_path, snapshot_id, path):
+    conn = open_store(ws_path)
+    try:
+        digests, size, stored = [], 0, 0
+        with open(path, "rb") as f:
+            while chunk := f.read(CHUNK_SIZE):
+                digest = hashlib.sha256(chunk).digest()
+                digests.append(digest)
+                size += len(chunk)
+                # Only chunks not seen before are compressed and written
+                if conn.execute("SELECT 1 FROM chunks WHERE hash = ?", (digest,)).fetchone() is None:
+                    data = zlib.compress(chunk)
+                    conn.execute("INSERT INTO chunks (hash, data) VALUES (?, ?)", (digest, data))
+                    stored += len(data)
+        conn.execute("INSERT INTO snapshots (id, created, size, stored, chunks) VALUES (?, ?, ?, ?, ?)",
+                     (snapshot_id, created_at(snapshot_id), size, stored, b"".join(digests)))
+        conn.commit()
+    finally:
+        conn.close()
+    return {"id": snapshot_id, "format": "incremental", "created": created_at(snapshot_id), "size": size, "stored": stored}
+
+def list_snapshots(ws_path):
+    """Every snapshot of the workspace, newest first."""
+    snapshots = []
+    for name in os.listdir(ws_path):
+        m = FULL_PATTERN.match(name)
+        if m:
+            size = os.path.getsize(os.path.join(ws_path, name))
+            snapshots.append({"id": m.group(1), "format": "full", "created": created_at(m.group(1)), "size": size, "stored": size})
+    if os.path.exists(os.path.join(ws_path, STORE_NAME)):
+        conn = open_store(ws_path)
+        try:
+            for snapshot_id, created, size, stored in conn.execute("SELECT id, created, size, stored FROM snapshots"):
+                snapshots.append({"id": snapshot_id, "format": "incremental", "created": created, "size": size, "stored": stored})
+        finally:
+            conn.close()
+    return sorted(snapshots, key=lambda s: [int(part) for part in s["id"].split("-")], reverse=True)
+
+def find(ws_path, snapshot_id):
+    """The format of snapshot `snapshot_id`; raises SnapshotNotFound."""
+    if ID_PATTERN.match(snapshot_id):
+        if os.path.exists(os.path.join(ws_path, f"sentinel.snap.{snapshot_id}.db")):
+            return "full"
+        if snapshot_id in store_ids(ws_path):
+            return "incremental"
+    raise SnapshotNotFound(snapshot_id)
+
+def assemble(ws_path, snapshot_id, path):
+    """Write incremental snapshot `snapshot_id` out as a database file at `path`."""
+    conn = open_store(ws_path)
+    try:
+        digests = conn.execute("SELECT chunks FROM snapshots WHERE id = ?", (snapshot_id,)).fetchone()[0]
+        with open(path, "wb") as f:
+            for i in range(0, len(digests), DIGEST_SIZE):
+                digest = digests[i:i + DIGEST_SIZE]
+                chunk = zlib.decompress(conn.execute("SELECT data FROM chunks WHERE hash = ?", (digest,)).fetchone()[0])
+                if hashlib.sha256(chunk).digest() != digest:
+                    raise ValueError(f"Snapshot {snapshot_id} is corrupt (chunk {i // DIGEST_SIZE})")
+                f.write(chunk)
+    finally:
+        conn.close()
+
+def restore(ws_path, snapshot_id):
+    """
+    Replace the workspace's database contents with snapshot `snapshot_id`. The
+    copy goes through the backup API into the live file, as one write
+    transaction, so open connections see either the old or the restored data.
+    """
+    format = find(ws_path, snapshot_id)
+    if format == "full":
+        src_path, tmp_path = os.path.join(ws_path, f"sentinel.snap.{snapshot_id}.db"), None
+    else:
+        src_path = tmp_path = os.path.join(ws_path, f".restore.{snapshot_id}.tmp")
+    try:
+        if tmp_path:
+            assemble(ws_path, snapshot_id, tmp_path)
+        check = sqlite3.connect(src_path)
+        try:
+            result = check.execute("PRAGMA quick_check").fetchone()[0]
+        finally:
+            check.close()
+        if result != "ok":
+            raise ValueError(f"Snapshot {snapshot_id} failed its integrity check: {result}")
+        backup(src_path, os.path.join(ws_path, DB_NAME), pages=-1)
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return format
+
+def delete(ws_path, snapshot_id):
+    """Remove a snapshot, and the chunks no other incremental snapshot uses."""
+    format = find(ws_path, snapshot_id)
+    if format == "full":
+        os.remove(os.path.join(ws_path, f"sentinel.snap.{snapshot_id}.db"))
+        return format
+    conn = open_store(ws_path)
+    try:
+        conn.execute("DELETE FROM snapshots WHERE id = ?", (snapshot_id,))
+        used = set()
+        for (digests,) in conn.execute("SELECT chunks FROM snapshots"):
+            used.update(digests[i:i + DIGEST_SIZE] for i in range(0, len(digests), DIGEST_SIZE))
+        unused = [(digest,) for (digest,) in conn.execute("SELECT hash FROM chunks") if digest not in used]
+        conn.executemany("DELETE FROM chunks WHERE hash = ?", unused)
+        # Freed pages are reused by later chunks
+        conn.commit()
+    finally:
+        conn.close()
+    return format
@@ -37,7 +37,7 @@ def check_phase_9():
 
     # 4. Check Fossil Integrity (Ghost Mode)
     try:
-        cursor.execute("SELECT COUNT(*) FROM atoms WHERE status = 4")
+        cursor.execute("SELECT COUNT(*) FROM fossils")
         fossils = cursor.fetchone()[0]
         results.append(f"✅ USG State: Found {fossils} Fossil atoms in temporal storage.")
     except:
@@ -5,7 +5,7 @@ test.describe('Spatial Envelopes', () => {
     test.beforeEach(async ({ page }) => {
         // Keep data mocks, but allow real connection (health/SSE) to avoid reconnect loops
         await page.route('/api/threads', async route => route.fulfill({ json: [] }));
-        await page.route('/api/atoms', async route => route.fulfill({ json: [] })); // Default empty atoms
+        await page.route('/api/atoms*', async route => route.fulfill({ json: [] })); // Default empty atoms
         // Removed /api/events and /api/health mocks to use real backend connection
 
 
@@ -27,7 +27,7 @@ test.describe('Spatial Envelopes', () => {
 
         // Atom positioned at center of envelope (300, 300)
         // This creates domain mismatch: generic atom inside system envelope
-        await page.route('/api/atoms', async route => {
+        await page.route('/api/atoms*', async route => {
             await route.fulfill({
                 json: [
                     { id: 'atom-gen', content: 'Intruder', domain: 'generic', x: 250, y: 250, status: 1 }
@@ -71,7 +71,7 @@ test.describe('Spatial Envelopes', () => {
                 await route.fulfill({ status: 200, json: { status: 'created' } });
             }
         });
-        await page.route('/api/atoms', async route => route.fulfill({ json: [] }));
+        await page.route('/api/atoms*', async route => route.fulfill({ json: [] }));
 
 
         await page.goto('/');
@@ -3,7 +3,7 @@ import { test, expect } from '@playwright/test';
 test.describe('Ghost Mode & Time Travel', () => {
     test.beforeEach(async ({ page }) => {
         // Mock Data
-        await page.route('/api/atoms', async route => {
+        await page.route('/api/atoms*', async route => {
             await route.fulfill({
                 json: [
                     { id: 'active.txt', content: 'Active Content', x: 0, y: 0, status: 1 },
@@ -5,7 +5,7 @@ test.describe('Shatter & Persistence', () => {
     test.describe('Mocked UI Tests', () => {
         test.beforeEach(async ({ page }) => {
             // Default mocks to avoid errors on load
-            await page.route('/api/atoms', async route => route.fulfill({ json: [] }));
+            await page.route('/api/atoms*', async route => route.fulfill({ json: [] }));
             await page.route('/api/threads', async route => route.fulfill({ json: [] }));
             // Mock SSE
             await page.route('/api/events', async route => {
@@ -32,7 +32,7 @@ test.describe('Shatter & Persistence', () => {
             });
 
             // 3. Mock the subsequent fetchAtoms call to return the new atom
-            await page.route('/api/atoms', async route => {
+            await page.route('/api/atoms*', async route => {
                 await route.fulfill({
                     json: [{ id: 'atoms/new_idea.md', content: '# My Idea', x: 0, y: 0, status: 1 }]
                 });
@@ -3,7 +3,7 @@ import { test, expect } from '@playwright/test';
 test.describe('Visual Threads & Conflict Fold', () => {
     test('should render threads (edges) between atoms', async ({ page }) => {
         // 1. Mock API to return known atoms and threads
-        await page.route('/api/atoms', async route => {
+        await page.route('/api/atoms*', async route => {
             await route.fulfill({
                 json: [
                     { id: 'atomA', content: 'Atom A', x: 0, y: 0, status: 1 },
@@ -45,7 +45,7 @@ test.describe('Visual Threads & Conflict Fold', () => {
 
     test('should show warning glow on collision', async ({ page }) => {
         // Mock data with two atoms ALREADY overlapping (position-based test)
-        await page.route('/api/atoms', async route => {
+        await page.route('/api/atoms*', async route => {
             await route.fulfill({
                 json: [
                     // Two atoms with overlapping positions
@@ -1,4 +1,4 @@
-import React, { useCallback, useEffect, useState } from 'react';
+import React, { useCallback, useEffect, useRef, useState } from 'react';
 import { ReactFlow, Background, Controls, useNodesState, useEdgesState } from '@xyflow/react';
 import api from './utils/api';
 import { useSpatiaConnection } from './hooks/useSpatiaConnection';
@@ -17,6 +17,19 @@ const nodeTypes = {
   envelope: EnvelopeNode,
 };
 
+// Metadata only: a node loads its content from GET /api/atoms/{id} when opened,
+// and reloads it when the hash changes
+const CANVAS_ATOM_FIELDS = 'id,domain,status,hash,x,y';
+
+// Edges are keyed by thread ID, which is all a thread_removed change carries
+const toEdge = (t) => ({
+  id: t.id,
+  source: t.source,
+  target: t.target,
+  animated: true,
+  style: { stroke: '#4b5563' }
+});
+
 export default function App() {
   const [nodes, setNodes, onNodesChange] = useNodesState([]);
   const [edges, setEdges, onEdgesChange] = useEdgesState([]);
@@ -63,10 +76,70 @@ export default function App() {
     }
   }, []);
 
+  // Handle Envelope Deletion
+  const handleDeleteEnvelope = useCallback((id) => {
+    setEnvelopeToDelete(id);
+    setShowDeleteModal(true);
+  }, []);
+
+  // Handle Summon
+  const handleSummon = useCallback((id, model) => {
+    setSummonTarget({ id, model });
+    setShowSummonModal(true);
+  }, []);
+
+  // Handle Revive
+  const handleRevive = useCallback((id) => {
+    setReviveTarget(id);
+    setShowReviveModal(true);
+  }, []);
+
+  const toAtomNode = useCallback((atom) => ({
+    id: atom.id,
+    type: 'spatia',
+    position: { x: atom.x || 0, y: atom.y || 0 },
+    width: 250,
+    height: 150,
+    data: {
+      id: atom.id,
+      hash: atom.hash,
+      status: atom.status,
+      domain: atom.domain || 'generic',
+      onSummon: handleSummon,
+      onRevive: handleRevive,
+      onError: handleError
+    },
+  }), [handleSummon, handleRevive, handleError]);
+
+  const toEnvelopeNode = useCallback((env) => ({
+    id: env.id,
+    type: 'envelope', // Use custom node
+    position: { x: env.x, y: env.y },
+    style: {
+      width: env.w,
+      height: env.h,
+      zIndex: 0,
+    },
+    data: {
+      id: env.id,
+      domain: env.domain,
+      onDelete: handleDeleteEnvelope
+    },
+    draggable: false,
+    selectable: true,
+    connectable: false
+  }), [handleDeleteEnvelope]);
+
+  // Change-log seq the canvas is current to; null until the first full fetch
+  const seqRef = useRef(null);
+
   const fetchAtoms = useCallback(async () => {
     try {
+      // Taken before the fetch: changes landing during it are pulled again, harmlessly
+      const seqRes = await api.get('/api/changes');
       const [atomsRes, threadsRes, envelopesRes] = await Promise.all([
-        api.get('/api/atoms'),
+        // Fossils live in their own table; only fetch them when they are shown
+        api.get('/api/atoms', { params: { fields: CANVAS_ATOM_FIELDS, include_fossils: isGhostMode || undefined } }),
         api.get('/api/threads'),
         api.get('/api/envelopes').catch(() => ({ data: [] }))
       ]);
@@ -77,81 +150,116 @@ export default function App() {
 
       setEnvelopes(envelopesData);
 
-      // Handle Envelope Deletion
-      const handleDeleteEnvelope = (id) => {
-        setEnvelopeToDelete(id);
-        setShowDeleteModal(true);
-      };
-
-      // Handle Summon
-      const handleSummon = (id, model) => {
-        setSummonTarget({ id, model });
-        setShowSummonModal(true);
-      };
-
-      // Handle Revive
-      const handleRevive = (id) => {
-        setReviveTarget(id);
-        setShowReviveModal(true);
-      };
-
-
-
-      const envelopeNodes = envelopesData.map(env => ({
-        id: env.id,
-        type: 'envelope', // Use custom node
-        position: { x: env.x, y: env.y },
-        style: {
-          width: env.w,
-          height: env.h,
-          zIndex: 0,
-        },
-        data: {
-          id: env.id,
-          domain: env.domain,
-          onDelete: handleDeleteEnvelope
-        },
-        draggable: false,
-        selectable: true,
-        connectable: false
-      }));
-
       const newNodes = atoms
         .filter(atom => isGhostMode || parseInt(atom.status) !== 4)
-        .map((atom) => ({
-          id: atom.id,
-          type: 'spatia',
-          position: { x: atom.x || 0, y: atom.y || 0 },
-          width: 250,
-          height: 150,
-          data: {
-            id: atom.id,
-            content: atom.content,
-            status: atom.status,
-            domain: atom.domain || 'generic',
-            onSummon: handleSummon,
-            onRevive: handleRevive,
-            onError: handleError
-          },
-        }));
-      setNodes([...envelopeNodes, ...newNodes]);
-
-      const newEdges = threads.map((t) => ({
-        id: `e${t.source}-${t.target}`,
-        source: t.source,
-        target: t.target,
-        animated: true,
-        style: { stroke: '#4b5563' }
-      }));
-      setEdges(newEdges);
+        .map(toAtomNode);
+      setNodes([...envelopesData.map(toEnvelopeNode), ...newNodes]);
+      setEdges(threads.map(toEdge));
+      seqRef.current = seqRes.data.seq;
 
     } catch (err) {
       console.error("Failed to fetch data:", err);
     }
-  }, [setNodes, setEdges, isGhostMode, handleError]);
+  }, [setNodes, setEdges, isGhostMode, toAtomNode, toEnvelopeNode]);
+
+  // Apply GET /api/changes entries (current rows or tombstones) by ID
+  const applyChanges = useCallback((changes) => {
+    const nodeUpdates = new Map(); // node ID -> node, or null to remove
+    const positions = new Map();
+    const edgeUpdates = new Map();
+    const envelopeUpdates = new Map();
+
+    for (const { table, id, deleted, row } of changes) {
+      if (table === 'atoms') {
+        const shown = !deleted && (isGhostMode || parseInt(row.status) !== 4);
+        nodeUpdates.set(id, shown ? toAtomNode(row) : null);
+      } else if (table === 'geometry') {
+        if (!deleted) positions.set(row.atom_id, { x: row.x || 0, y: row.y || 0 });
+      } else if (table === 'fossils') {
+        if (isGhostMode) nodeUpdates.set(id, deleted ? null : toAtomNode({ ...row, id, status: 4 }));
+      } else if (table === 'threads') {
+        edgeUpdates.set(id, deleted ? null : toEdge(row));
+      } else if (table === 'envelopes') {
+        envelopeUpdates.set(id, deleted ? null : row);
+        nodeUpdates.set(id, deleted ? null : toEnvelopeNode(row));
+      }
+    }
+
+    if (nodeUpdates.size || positions.size) {
+      setNodes((nds) => {
+        const next = [];
+        for (const node of nds) {
+          if (nodeUpdates.has(node.id)) {
+            const updated = nodeUpdates.get(node.id);
+            nodeUpdates.delete(node.id);
+            // Keep React Flow's own state (measurements, conflict styling) for the node
+            if (updated) next.push({ ...node, position: updated.position, data: updated.data, style: updated.style ?? node.style });
+          } else {
+            next.push(node);
+          }
+        }
+        for (const node of nodeUpdates.values()) {
+          if (node) next.push(node);
+        }
+        return next.map((node) => positions.has(node.id) ? { ...node, position: positions.get(node.id) } : node);
+      });
+    }
+    if (edgeUpdates.size) {
+      setEdges((eds) => {
+        const next = eds.filter((edge) => !edgeUpdates.has(edge.id));
+        for (const edge of edgeUpdates.values()) {
+          if (edge) next.push(edge);
+        }
+        return next;
+      });
+    }
+    if (envelopeUpdates.size) {
+      setEnvelopes((envs) => {
+        const next = envs.filter((env) => !envelopeUpdates.has(env.id));
+        for (const env of envelopeUpdates.values()) {
+          if (env) next.push(env);
+        }
+        return next;
+      });
+    }
+  }, [setNodes, setEdges, isGhostMode, toAtomNode, toEnvelopeNode]);
+
+  // One pull at a time; events arriving meanwhile are folded into one more pass
+  const pullingRef = useRef(false);
+  const pullAgainRef = useRef(false);
+
+  const pullChanges = useCallback(async () => {
+    if (seqRef.current === null) return;
+    if (pullingRef.current) {
+      pullAgainRef.current = true;
+      return;
+    }
+    pullingRef.current = true;
+    try {
+      do {
+        pullAgainRef.current = false;
+        let more = true;
+        while (more) {
+          const res = await api.get('/api/changes', { params: { since: seqRef.current, fields: CANVAS_ATOM_FIELDS } });
+          if (res.data.reset) {
+            // The seq belongs to another database
+            await fetchAtoms();
+            return;
+          }
+          applyChanges(res.data.changes);
+          seqRef.current = res.data.seq;
+          more = res.data.more;
+        }
+      } while (pullAgainRef.current);
+    } catch (err) {
+      console.error("Failed to pull changes:", err);
+    } finally {
+      pullingRef.current = false;
+    }
+  }, [fetchAtoms, applyChanges]);
 
   // Use Connection Hook
-  const { status, workspace } = useSpatiaConnection(fetchAtoms, handleEvent);
+  const { status, workspace } = useSpatiaConnection(fetchAtoms, handleEvent, pullChanges);
 
   // Echo Keyboard Shortcut
   useEffect(() => {
@@ -272,7 +380,7 @@ export default function App() {
     try {
       await api.post('/api/envelopes', { ...data, x: 100, y: 100, w: 300, h: 300 });
       console.log('[APP-DEBUG] Envelope create success');
-      fetchAtoms();
+      pullChanges();
       handleSuccess("Envelope created");
     } catch (err) {
       console.error('[APP-DEBUG] Envelope create error', err);
@@ -286,7 +394,7 @@ export default function App() {
         await api.delete(`/api/envelopes/${envelopeToDelete}`); // Fixed string template syntax
         setEnvelopeToDelete(null);
         setShowDeleteModal(false);
-        fetchAtoms();
+        pullChanges();
         handleSuccess("Envelope deleted");
       } catch (err) {
         handleError("Failed to delete: " + err.message);
@@ -1,5 +1,5 @@
 import React from 'react';
-import { render, screen, fireEvent, waitFor } from '@testing-library/react';
+import { render, screen, fireEvent, waitFor, act } from '@testing-library/react';
 import { vi, describe, it, expect, beforeEach } from 'vitest';
 import App from './App';
 import api from './utils/api';
@@ -32,14 +32,22 @@ vi.mock('@xyflow/react', () => ({
     ReactFlowProvider: ({ children }) => <div>{children}</div>,
 }));
 
-// Mock custom hooks
+// Mock custom hooks (keeping the callbacks App passes, to drive sync by hand)
+const connection = vi.hoisted(() => ({}));
 vi.mock('./hooks/useSpatiaConnection', () => ({
-    useSpatiaConnection: () => ({ status: 'connected', workspace: 'default' })
+    useSpatiaConnection: (onSyncRequired, onEvent, onChanges) => {
+        Object.assign(connection, { onSyncRequired, onEvent, onChanges });
+        return { status: 'connected', workspace: 'default' };
+    }
 }));
 
 // Mock Canvas to avoid complex rendering
 vi.mock('./components/SpatiaCanvas', () => ({
-    default: () => <div data-testid="spatia-canvas">Canvas</div>
+    default: ({ nodes, edges }) => (
+        <div data-testid="spatia-canvas">
+            {nodes.map(n => n.id).join(',')}|{edges.map(e => e.id).join(',')}
+        </div>
+    )
 }));
 
 describe('App Shatter Editor', () => {
@@ -83,3 +91,39 @@ describe('App Shatter Editor', () => {
         expect(screen.getByDisplayValue('New Intent Content')).toBeInTheDocument();
     });
 });
+
+describe('App change sync', () => {
+    beforeEach(() => {
+        vi.clearAllMocks();
+        (api.get).mockImplementation((url, config) => {
+            if (url === '/api/changes' && !config) return Promise.resolve({ data: { seq: 5 } });
+            if (url === '/api/changes') {
+                return Promise.resolve({
+                    data: {
+                        seq: 7, reset: false, more: false, changes: [
+                            { seq: 6, table: 'atoms', id: 'a.py', deleted: true, row: null },
+                            { seq: 6, table: 'atoms', id: 'c.py', deleted: false, row: { id: 'c.py', status: 1, hash: 'h', x: 0, y: 0 } },
+                            { seq: 7, table: 'threads', id: 't1', deleted: true, row: null },
+                        ]
+                    }
+                });
+            }
+            if (url === '/api/atoms') return Promise.resolve({ data: [{ id: 'a.py', status: 1 }, { id: 'b.py', status: 1 }] });
+            if (url === '/api/threads') return Promise.resolve({ data: [{ id: 't1', source: 'a.py', target: 'b.py' }] });
+            return Promise.resolve({ data: [] });
+        });
+    });
+
+    it('applies change events by ID without refetching the atoms', async () => {
+        render(<App />);
+        await waitFor(() => expect(screen.getByTestId('spatia-canvas')).toHaveTextContent('a.py,b.py|t1'));
+
+        await act(async () => {
+            await connection.onChanges({ type: 'atom_changed', ids: ['c.py'], seq: 7 });
+        });
+
+        expect(screen.getByTestId('spatia-canvas')).toHaveTextContent('b.py,c.py|');
+        expect(api.get).toHaveBeenCalledWith('/api/changes', { params: { since: 5, fields: 'id,domain,status,hash,x,y' } });
+        expect((api.get).mock.calls.filter(([url]) => url === '/api/atoms')).toHaveLength(1);
+    });
+});
@@ -64,9 +64,23 @@ export default function EventLogPanel({ logs, isOpen, onClose, onClear }) {
 function getEventTypeColor(type) {
     switch (type) {
         case 'update': return 'text-blue-400';
-        case 'db_update': return 'text-yellow-400';
+        case 'atom_changed':
+        case 'atom_removed':
+        case 'geometry_changed':
+        case 'fossil_added':
+        case 'fossil_removed': return 'text-yellow-400';
+        case 'thread_added':
+        case 'thread_removed': return 'text-purple-400';
+        case 'envelope_changed':
+        case 'envelope_removed': return 'text-green-400';
         case 'thread_new': return 'text-purple-400';
-        case 'world_reset': return 'text-red-400';
+        case 'world_reset':
+        case 'resync_required': return 'text-red-400';
+        case 'clone_started':
+        case 'clone_progress':
+        case 'clone_done': return 'text-cyan-400';
+        case 'clone_failed':
+        case 'clone_cancelled': return 'text-red-400';
         case 'envelope_update': return 'text-green-400';
         case 'error': return 'text-red-500';
         default: return 'text-gray-400';
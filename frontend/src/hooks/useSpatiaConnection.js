@@ -12,18 +12,24 @@ const MAX_FAILURES = 3;
  * 1. Heartbeat (polling /api/health)
  * 2. SSE Connection (auto-reconnect on health recovery)
  * 3. Global Connection State (connected, disconnected, reconnecting)
- * 4. Workspace Sync (refetching on reconnect)
+ * 4. Workspace Sync (refetching on reconnect and world resets; change events go
+ *    to onChanges, which applies deltas, or to onSyncRequired without it)
  */
-import { SYNC_EVENTS } from '../utils/constants';
+import { EVENT_TYPES, RESET_EVENTS, CHANGE_EVENTS } from '../utils/constants';
 
-export function useSpatiaConnection(onSyncRequired, onEvent) {
+export function useSpatiaConnection(onSyncRequired, onEvent, onChanges) {
     const [status, setStatus] = useState('connecting'); // connecting, connected, disconnected
     const [workspace, setWorkspace] = useState(null);
     const [error, setError] = useState(null);
+    // Bumped to open a fresh SSE connection (after resync_required)
+    const [sseGeneration, setSseGeneration] = useState(0);
 
     const failuresRef = useRef(0);
     const sseRef = useRef(null);
     const timerRef = useRef(null);
+    // The stream outlives renders; change events go to the latest handler
+    const onChangesRef = useRef(onChanges);
+    onChangesRef.current = onChanges;
 
     // 1. Heartbeat Function
     const checkHealth = useCallback(async () => {
@@ -90,7 +96,16 @@ export function useSpatiaConnection(onSyncRequired, onEvent) {
                         // Forward all events for observability
                         if (onEvent) onEvent(data);
 
-                        if (SYNC_EVENTS.includes(data.type)) {
+                        if (data.type === EVENT_TYPES.RESYNC_REQUIRED) {
+                            // The backend ends this stream; reconnecting refetches in onopen
+                            es.close();
+                            sseRef.current = null;
+                            setSseGeneration(g => g + 1);
+                            return;
+                        }
+                        if (CHANGE_EVENTS.includes(data.type) && onChangesRef.current) {
+                            onChangesRef.current(data);
+                        } else if (RESET_EVENTS.includes(data.type) || CHANGE_EVENTS.includes(data.type)) {
                             if (onSyncRequired) onSyncRequired();
                         }
                     } catch (e) {
@@ -117,7 +132,7 @@ export function useSpatiaConnection(onSyncRequired, onEvent) {
                 sseRef.current = null;
             }
         };
-    }, [status, onSyncRequired, onEvent]);
+    }, [status, sseGeneration, onSyncRequired, onEvent]);
 
     return { status, workspace, error };
 }
@@ -21,7 +21,7 @@ const Wrapper = ({ children }: { children: React.ReactNode }) => (
 describe('SpatiaNode', () => {
     const mockData = {
         id: 'atoms/test.md',
-        content: '# Test Content',
+        hash: 'h1',
         status: 0, // Shadow
         domain: 'generic',
         onError: vi.fn(),
@@ -45,11 +45,26 @@ describe('SpatiaNode', () => {
         vi.clearAllMocks();
     });
 
-    it('renders atom content and ID', () => {
+    it('renders atom ID without fetching content', () => {
         render(<Wrapper><SpatiaNode {...createProps()} /></Wrapper>);
         expect(screen.getByText('atoms/test.md')).toBeInTheDocument();
         expect(screen.getByText(/generic/i)).toBeInTheDocument();
-        expect(screen.getByText(/# Test Content/)).toBeInTheDocument();
+        expect(screen.getByText('Click to load content')).toBeInTheDocument();
+        expect(api.get).not.toHaveBeenCalled();
+    });
+
+    it('loads content when opened and reloads it when the hash changes', async () => {
+        (api.get as any).mockResolvedValueOnce({ data: { content: '# Test Content' } });
+        const { rerender } = render(<Wrapper><SpatiaNode {...createProps()} /></Wrapper>);
+
+        fireEvent.click(screen.getByTestId('open-content'));
+        await waitFor(() => expect(screen.getByText(/# Test Content/)).toBeInTheDocument());
+        expect(api.get).toHaveBeenCalledWith('/api/atoms/atoms/test.md');
+
+        (api.get as any).mockResolvedValueOnce({ data: { content: '# Edited' } });
+        rerender(<Wrapper><SpatiaNode {...createProps({ hash: 'h2' })} /></Wrapper>);
+        await waitFor(() => expect(screen.getByText(/# Edited/)).toBeInTheDocument());
+        expect(api.get).toHaveBeenCalledTimes(2);
     });
 
     it('shows witness button for status 1', () => {
@@ -95,6 +110,7 @@ describe('SpatiaNode', () => {
     });
 
     it('opens maximize modal when maximize button is clicked', () => {
+        (api.get as any).mockResolvedValueOnce({ data: { content: '# Test Content' } });
         render(<Wrapper><SpatiaNode {...createProps()} /></Wrapper>);
         // Maximize button has title 'Maximize'
         const maximizeBtn = screen.getByTitle('Maximize');
@@ -104,17 +120,18 @@ describe('SpatiaNode', () => {
         expect(screen.getByText('Spaces: 4')).toBeInTheDocument();
     });
 
-    it('copies content when copy button is clicked', () => {
+    it('copies content when copy button is clicked', async () => {
         Object.assign(navigator, {
             clipboard: {
                 writeText: vi.fn(),
             },
         });
 
+        (api.get as any).mockResolvedValueOnce({ data: { content: '# Test Content' } });
         render(<Wrapper><SpatiaNode {...createProps()} /></Wrapper>);
         const copyBtn = screen.getByTitle('Copy Content');
         fireEvent.click(copyBtn);
 
-        expect(navigator.clipboard.writeText).toHaveBeenCalledWith('# Test Content');
+        await waitFor(() => expect(navigator.clipboard.writeText).toHaveBeenCalledWith('# Test Content'));
     });
 });
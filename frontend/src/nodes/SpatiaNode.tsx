@@ -1,4 +1,4 @@
-import React, { memo, useState, useCallback } from 'react';
+import React, { memo, useState, useCallback, useEffect, useRef } from 'react';
 import { Handle, Position, NodeProps, Node } from '@xyflow/react';
 import { PrismAsyncLight as SyntaxHighlighter } from 'react-syntax-highlighter';
 import { vscDarkPlus } from 'react-syntax-highlighter/dist/esm/styles/prism';
@@ -11,7 +11,7 @@ const SyntaxHighlighterComponent = SyntaxHighlighter as any;
 // Define Props Interface
 interface SpatiaNodeData extends Record<string, unknown> {
     id: string;
-    content: string;
+    hash?: string;
     status: number; // 0: Shadow, 1: Claim, 2: Witnessed, 3: Endorsed, 4: Fossil
     domain?: string;
     onError?: (msg: string) => void;
@@ -23,7 +23,12 @@ interface SpatiaNodeData extends Record<string, unknown> {
 type SpatiaNode = Node<SpatiaNodeData>;
 
 const SpatiaNode: React.FC<NodeProps<SpatiaNode>> = ({ data }) => {
-    const { content, status, domain, id } = data;
+    const { status, domain, id, hash, onError } = data;
+    // The canvas listing carries no content: it is loaded from GET /api/atoms/{id}
+    // once the atom is opened, and reloaded from then on whenever its hash changes
+    const [content, setContent] = useState<string | null>(null);
+    const [loadingContent, setLoadingContent] = useState(false);
+    const contentLoaded = useRef(false);
     const [showLogs, setShowLogs] = useState(false);
     const [logs, setLogs] = useState<string | null>(null);
     const [showPortals, setShowPortals] = useState(false);
@@ -33,6 +38,35 @@ const SpatiaNode: React.FC<NodeProps<SpatiaNode>> = ({ data }) => {
     const [showMaximize, setShowMaximize] = useState(false);
     const [copied, setCopied] = useState(false);
 
+    const loadContent = useCallback(() => {
+        setLoadingContent(true);
+        return api.get(`/api/atoms/${id}`)
+            .then(res => {
+                const text: string = res.data.content ?? '';
+                contentLoaded.current = true;
+                setContent(text);
+                return text;
+            })
+            .catch((err: any) => {
+                if (onError) onError("Failed to load content: " + err.message);
+                return null;
+            })
+            .finally(() => setLoadingContent(false));
+    }, [id, onError]);
+
+    useEffect(() => {
+        if (contentLoaded.current) loadContent();
+    }, [hash, loadContent]);
+
+    const openContent = useCallback(() => {
+        if (!contentLoaded.current && !loadingContent) loadContent();
+    }, [loadingContent, loadContent]);
+
+    const openMaximized = useCallback(() => {
+        openContent();
+        setShowMaximize(true);
+    }, [openContent]);
+
     const fetchPortals = useCallback(() => {
         api.get(`/api/portals/${id}`)
             .then(res => setPortals(res.data))
@@ -72,12 +106,19 @@ const SpatiaNode: React.FC<NodeProps<SpatiaNode>> = ({ data }) => {
 
     const handleCopy = useCallback((e: React.MouseEvent) => {
         e.stopPropagation();
-        if (content) {
-            navigator.clipboard.writeText(content);
-            setCopied(true);
-            setTimeout(() => setCopied(false), 2000);
+        const copy = (text: string | null) => {
+            if (text) {
+                navigator.clipboard.writeText(text);
+                setCopied(true);
+                setTimeout(() => setCopied(false), 2000);
+            }
+        };
+        if (content !== null) {
+            copy(content);
+        } else {
+            loadContent().then(copy);
         }
-    }, [content]);
+    }, [content, loadContent]);
 
     // Status styling
     const getGlow = (s: number | string) => {
@@ -142,7 +183,7 @@ const SpatiaNode: React.FC<NodeProps<SpatiaNode>> = ({ data }) => {
                             }
                         </button>
                         <button
-                            onClick={(e) => { e.stopPropagation(); setShowMaximize(true); }}
+                            onClick={(e) => { e.stopPropagation(); openMaximized(); }}
                             className="text-gray-500 hover:text-blue-400 p-1 rounded transition-colors"
                             title="Maximize"
                         >
@@ -155,17 +196,27 @@ const SpatiaNode: React.FC<NodeProps<SpatiaNode>> = ({ data }) => {
                 <div className="relative group bg-[#1e1e1e]">
                     <div
                         className="max-h-64 overflow-y-auto font-mono text-xs leading-relaxed custom-scrollbar cursor-pointer"
-                        onDoubleClick={() => setShowMaximize(true)}
+                        onDoubleClick={openMaximized}
                     >
-                        <SyntaxHighlighterComponent
-                            language={getLanguage()}
-                            style={vscDarkPlus}
-                            customStyle={{ margin: 0, padding: '1rem', background: 'transparent', fontSize: '11px' }}
-                            showLineNumbers={true}
-                            lineNumberStyle={{ minWidth: '2em', paddingRight: '1em', color: '#555' }}
-                        >
-                            {content || '(Empty Content)'}
-                        </SyntaxHighlighterComponent>
+                        {content === null ? (
+                            <div
+                                data-testid="open-content"
+                                onClick={openContent}
+                                className="p-4 text-[11px] text-gray-500 italic"
+                            >
+                                {loadingContent ? 'Loading content...' : 'Click to load content'}
+                            </div>
+                        ) : (
+                            <SyntaxHighlighterComponent
+                                language={getLanguage()}
+                                style={vscDarkPlus}
+                                customStyle={{ margin: 0, padding: '1rem', background: 'transparent', fontSize: '11px' }}
+                                showLineNumbers={true}
+                                lineNumberStyle={{ minWidth: '2em', paddingRight: '1em', color: '#555' }}
+                            >
+                                {content || '(Empty Content)'}
+                            </SyntaxHighlighterComponent>
+                        )}
                     </div>
                 </div>
 
@@ -301,7 +352,7 @@ const SpatiaNode: React.FC<NodeProps<SpatiaNode>> = ({ data }) => {
             <ContentModal
                 isOpen={showMaximize}
                 onClose={() => setShowMaximize(false)}
-                content={content}
+                content={content ?? ''}
                 language={getLanguage()}
                 title={id}
             />
@@ -1,20 +1,50 @@
 export const EVENT_TYPES = {
-    DB_UPDATE: 'db_update',
     ATOM_UPDATE: 'update',
     THREAD_NEW: 'thread_new',
     WORLD_RESET: 'world_reset',
     ENVELOPE_UPDATE: 'envelope_update',
     ENVELOPE_DELETE: 'envelope_delete',
     WORLD_EJECTED: 'world_ejected',
-    CONNECTED: 'connected'
+    CONNECTED: 'connected',
+    // Change-log events for writes made outside the API (CLI scripts, other processes)
+    ATOM_CHANGED: 'atom_changed',
+    ATOM_REMOVED: 'atom_removed',
+    GEOMETRY_CHANGED: 'geometry_changed',
+    FOSSIL_ADDED: 'fossil_added',
+    FOSSIL_REMOVED: 'fossil_removed',
+    THREAD_ADDED: 'thread_added',
+    THREAD_REMOVED: 'thread_removed',
+    ENVELOPE_CHANGED: 'envelope_changed',
+    ENVELOPE_REMOVED: 'envelope_removed',
+    // Workspace clone jobs (POST /api/workspaces/{name}/clone)
+    CLONE_STARTED: 'clone_started',
+    CLONE_PROGRESS: 'clone_progress',
+    CLONE_DONE: 'clone_done',
+    CLONE_FAILED: 'clone_failed',
+    CLONE_CANCELLED: 'clone_cancelled',
+    // The backend dropped this client's queued events; reconnect and refetch
+    RESYNC_REQUIRED: 'resync_required'
 };
 
-export const SYNC_EVENTS = [
-    EVENT_TYPES.DB_UPDATE,
+// The whole world was replaced (workspace switch): refetch everything
+export const RESET_EVENTS = [
+    EVENT_TYPES.WORLD_RESET,
+    EVENT_TYPES.WORLD_EJECTED
+];
+
+// Something changed: pull GET /api/changes?since=<seq> and apply it by ID
+export const CHANGE_EVENTS = [
     EVENT_TYPES.ATOM_UPDATE,
     EVENT_TYPES.THREAD_NEW,
-    EVENT_TYPES.WORLD_RESET,
     EVENT_TYPES.ENVELOPE_UPDATE,
     EVENT_TYPES.ENVELOPE_DELETE,
-    EVENT_TYPES.WORLD_EJECTED
+    EVENT_TYPES.ATOM_CHANGED,
+    EVENT_TYPES.ATOM_REMOVED,
+    EVENT_TYPES.GEOMETRY_CHANGED,
+    EVENT_TYPES.FOSSIL_ADDED,
+    EVENT_TYPES.FOSSIL_REMOVED,
+    EVENT_TYPES.THREAD_ADDED,
+    EVENT_TYPES.THREAD_REMOVED,
+    EVENT_TYPES.ENVELOPE_CHANGED,
+    EVENT_TYPES.ENVELOPE_REMOVED
 ];
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark: GET /api/atoms on a synthetic workspace, phase by phase.
+
+Builds a workspace of N atoms (10k by default) and times, separately:
+  query      - executing the listing SELECT and fetching the rows
+  default    - dict(row) per row, jsonable_encoder, json.dumps (FastAPI's path
+               for a route returning plain data)
+  orjson     - backend/fastjson.py: row dicts from the cursor, encoded by orjson
+  <codec>    - compressing the orjson body with each available encoder
+               (backend/compression.py), with the resulting size
+
+for the lean default projection and for one that includes content.
+
+Usage: python scripts/bench_atoms_listing.py [--atoms 10000] [--lines 40] [--repeat 7]
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from fastapi.encoders import jsonable_encoder
+from backend import compression, fastjson, migrations
+from backend.main import ATOM_FIELDS, DEFAULT_ATOM_FIELDS
+
+DOMAINS = ["Software", "Hardware", "Docs", "Research"]
+
+def build(path, atoms, lines, rng):
+    conn = sqlite3.connect(path)
+    migrations.migrate(conn)
+    for n in range(atoms):
+        atom_id = f"src/pkg_{n // 100}/module_{n}.py"
+        content = "".join(f"    value_{i} = compute({i}, {rng.random():.6f})\n" for i in range(lines))
+        conn.execute(
+            "INSERT INTO atoms (id, type, domain, content, status, hash, last_witnessed) VALUES (?, 'file', ?, ?, ?, ?, ?)",
+            (atom_id, rng.choice(DOMAINS), content, rng.randint(0, 3), f"{rng.getrandbits(128):032x}", "2024-01-01T00:00:00")
+        )
+        conn.execute("INSERT INTO geometry (atom_id, x, y) VALUES (?, ?, ?)", (atom_id, rng.randint(0, 5000), rng.randint(0, 5000)))
+    conn.commit()
+    conn.close()
+
+def timed(func, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), result
+
+def default_encode(rows):
+    # What FastAPI does with a returned list (see starlette JSONResponse.render)
+    data = jsonable_encoder([dict(row) for row in rows])
+    return json.dumps(data, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def orjson_encode(cursor, rows):
+    return fastjson.dumps(fastjson.row_dicts(cursor, rows))
+
+def report(conn, fields, repeat):
+    sql = f"SELECT {', '.join(ATOM_FIELDS[f] for f in fields)} FROM atoms a LEFT JOIN geometry g ON a.id = g.atom_id ORDER BY a.id"
+    cursor = conn.cursor()
+
+    def query():
+        cursor.execute(sql)
+        return cursor.fetchall()
+
+    query_ms, rows = timed(query, repeat)
+    default_ms, default_body = timed(lambda: default_encode(rows), repeat)
+    orjson_ms, body = timed(lambda: orjson_encode(cursor, rows), repeat)
+    assert json.loads(default_body) == json.loads(body)
+
+    print(f"\nfields={','.join(fields)}  ({len(rows)} atoms, {len(body) / 1024:.0f} KiB JSON)")
+    print(f"  {'query':<10}{query_ms:9.1f} ms")
+    print(f"  {'default':<10}{default_ms:9.1f} ms   serialization")
+    print(f"  {'orjson':<10}{orjson_ms:9.1f} ms   serialization ({default_ms / orjson_ms:.1f}x faster)")
+    for name, encoder in compression.ENCODERS.items():
+        ms, compressed = timed(lambda: encoder(body), repeat)
+        print(f"  {name:<10}{ms:9.1f} ms   {len(compressed) / 1024:.0f} KiB ({len(compressed) / len(body):.0%})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark atom listing query, serialization and compression")
+    parser.add_argument("--atoms", type=int, default=10000)
+    parser.add_argument("--lines", type=int, default=40, help="Content lines per atom")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sentinel.db")
+        build(path, args.atoms, args.lines, random.Random(args.seed))
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        print(f"Synthetic workspace: {args.atoms} atoms, {args.lines} lines each; median of {args.repeat} runs")
+        print(f"Encoders available: {', '.join(compression.ENCODERS)}")
+        report(conn, list(DEFAULT_ATOM_FIELDS), args.repeat)
+        report(conn, list(DEFAULT_ATOM_FIELDS) + ["content"], args.repeat)
+        conn.close()
+
+if __name__ == "__main__":
+    main()
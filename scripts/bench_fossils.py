@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark: fossil storage size and revive latency.
+
+Builds the same synthetic edit history twice:
+  full-copy  - every fossil is an atoms row embedding the full old content (pre-blob scheme)
+  delta      - fossils table rows reference delta-compressed blobs (backend/blobs.py)
+and reports DB size after VACUUM plus the time to rebuild fossil content,
+which is the read done by /api/revive.
+
+Usage: python scripts/bench_fossils.py [--atoms 20] [--versions 200] [--lines 400]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from backend import blobs, migrations
+
+def make_history(rng, lines, versions):
+    text = [f"    value_{i} = compute({i}, {rng.random():.6f})\n" for i in range(lines)]
+    history = [''.join(text)]
+    for _ in range(versions):
+        for _ in range(rng.randint(1, 3)):
+            i = rng.randrange(len(text))
+            text[i] = f"    value_{i} = compute({i}, {rng.random():.6f})  # edited\n"
+        history.append(''.join(text))
+    return history
+
+def open_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE atoms (id TEXT PRIMARY KEY, type TEXT, content TEXT, hash TEXT, status INTEGER)")
+    migrations.migrate(conn)
+    return conn
+
+def db_size(conn):
+    conn.commit()
+    conn.execute("VACUUM")
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    return page_count * page_size
+
+def build(conn, histories, scheme):
+    cursor = conn.cursor()
+    fossil_ids = []
+    for n, history in enumerate(histories):
+        atom_id = f"src/module_{n}.py"
+        for v, (old, new) in enumerate(zip(history, history[1:])):
+            ts = f"{v:06d}"
+            if scheme == "full-copy":
+                cursor.execute("INSERT INTO atoms (id, type, content, hash, status) VALUES (?, 'file', ?, ?, 4)", (f"{atom_id}@{ts}", old, blobs.calculate_hash(old)))
+            else:
+                fossil_hash = blobs.fossilize(cursor, old, new)
+                cursor.execute("INSERT INTO fossils (atom_id, ts, hash, type) VALUES (?, ?, ?, 'file')", (atom_id, ts, fossil_hash))
+            fossil_ids.append((atom_id, ts))
+        cursor.execute("INSERT INTO atoms (id, type, content, hash, status) VALUES (?, 'file', ?, ?, 1)", (atom_id, history[-1], blobs.calculate_hash(history[-1])))
+    conn.commit()
+    return fossil_ids
+
+def revive_latency(conn, scheme, fossil_ids, samples, rng):
+    cursor = conn.cursor()
+    timings = []
+    for atom_id, ts in rng.sample(fossil_ids, min(samples, len(fossil_ids))):
+        start = time.perf_counter()
+        if scheme == "full-copy":
+            cursor.execute("SELECT content FROM atoms WHERE id = ?", (f"{atom_id}@{ts}",))
+            cursor.fetchone()
+        else:
+            cursor.execute("SELECT hash FROM fossils WHERE atom_id = ? AND ts = ?", (atom_id, ts))
+            blobs.get_blob(cursor, cursor.fetchone()[0])
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.mean(timings), timings[int(len(timings) * 0.95) - 1], timings[-1]
+
+def main():
+    parser = argparse.ArgumentParser(description="Fossil storage benchmark")
+    parser.add_argument('--atoms', type=int, default=20)
+    parser.add_argument('--versions', type=int, default=200)
+    parser.add_argument('--lines', type=int, default=400)
+    parser.add_argument('--samples', type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    histories = [make_history(rng, args.lines, args.versions) for _ in range(args.atoms)]
+    source_bytes = sum(len(h[-1].encode('utf-8')) for h in histories)
+
+    print(f"{args.atoms} atoms x {args.versions} versions x {args.lines} lines "
+          f"(live source: {source_bytes / 1024:.0f} KiB, keyframe interval {blobs.FOSSIL_KEYFRAME_INTERVAL})")
+    print(f"{'scheme':<10} {'build s':>8} {'DB MiB':>8} {'x source':>9} {'revive mean ms':>15} {'p95 ms':>8} {'max ms':>8}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for scheme in ("full-copy", "delta"):
+            conn = open_db(os.path.join(tmp, f"{scheme}.db"))
+            start = time.perf_counter()
+            fossil_ids = build(conn, histories, scheme)
+            build_s = time.perf_counter() - start
+            size = db_size(conn)
+            mean, p95, worst = revive_latency(conn, scheme, fossil_ids, args.samples, random.Random(7))
+            conn.close()
+            print(f"{scheme:<10} {build_s:>8.2f} {size / 2**20:>8.2f} {size / source_bytes:>9.1f} {mean:>15.3f} {p95:>8.3f} {worst:>8.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /api/search latency on a synthetic workspace.
+
+Builds N atoms (50k by default) of code-like text with a Zipf-ish vocabulary,
+through the atoms_fts triggers, plus a fossil history for a subset of them, and
+reports:
+  build      - inserting the atoms with the search index maintained by triggers
+  index      - on-disk size of the FTS shadow tables
+  fossils    - search.index_fossils() catching up on the whole history
+  queries    - p50/p95 latency of search.search() for typical query shapes
+               (rank, snippets and the atoms join included)
+
+Usage: python scripts/bench_search.py [--atoms 50000] [--lines 30] [--fossils 5000] [--repeat 50]
+"""
+import argparse
+import itertools
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from backend import blobs, migrations, search
+
+DOMAINS = ["Software", "Hardware", "Docs", "Research"]
+
+def vocabulary(rng, size):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(3, 10))) for _ in range(size)]
+
+def zipf_weights(size):
+    # Cumulative, for rng.choices: a few words everywhere, most words rare
+    return list(itertools.accumulate(1 / (rank + 1) for rank in range(size)))
+
+def make_text(rng, words, cum_weights, lines):
+    picks = rng.choices(words, cum_weights=cum_weights, k=lines * 6)
+    return "".join(f"    {picks[i]}_{picks[i + 1]} = {picks[i + 2]}({picks[i + 3]}, {picks[i + 4]}) # {picks[i + 5]}\n" for i in range(0, len(picks), 6))
+
+def build(conn, rng, words, atoms, lines, fossils):
+    cum_weights = zipf_weights(len(words))
+    start = time.perf_counter()
+    for n in range(atoms):
+        conn.execute("INSERT INTO atoms (id, type, domain, content, status, hash) VALUES (?, 'file', ?, ?, ?, ?)",
+                     (f"src/{rng.choice(words)}/{rng.choice(words)}_{n}.py", rng.choice(DOMAINS), make_text(rng, words, cum_weights, lines), rng.randint(0, 3), f"h{n}"))
+    conn.commit()
+    build_s = time.perf_counter() - start
+
+    cursor = conn.cursor()
+    ids = [row[0] for row in conn.execute("SELECT id FROM atoms ORDER BY random() LIMIT ?", (fossils,))]
+    for n, atom_id in enumerate(ids):
+        old = conn.execute("SELECT content FROM atoms WHERE id = ?", (atom_id,)).fetchone()[0]
+        new = old + f"    edited_{n} = True\n"
+        cursor.execute("INSERT INTO fossils (atom_id, ts, hash, type, domain) VALUES (?, ?, ?, 'file', 'Software')",
+                       (atom_id, f"{n:08d}", blobs.fossilize(cursor, old, new)))
+        cursor.execute("UPDATE atoms SET content = ? WHERE id = ?", (new, atom_id))
+    conn.commit()
+    return build_s
+
+def fts_size(conn):
+    try:
+        return conn.execute("SELECT SUM(pgsize) FROM dbstat WHERE name LIKE 'atoms_fts%'").fetchone()[0]
+    except sqlite3.OperationalError:
+        return None  # SQLite built without dbstat
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+def time_query(conn, repeat, q, **kwargs):
+    samples, found = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        found = search.search(conn, q, **kwargs)
+        samples.append((time.perf_counter() - start) * 1000)
+    hits = len(found["results"]) + len(found.get("fossils", []))
+    return percentile(samples, 0.5), percentile(samples, 0.95), hits
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full-text search latency")
+    parser.add_argument("--atoms", type=int, default=50000)
+    parser.add_argument("--lines", type=int, default=30, help="Content lines per atom")
+    parser.add_argument("--fossils", type=int, default=5000, help="Atoms given one fossil each")
+    parser.add_argument("--words", type=int, default=20000, help="Vocabulary size")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    words = vocabulary(rng, args.words)
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "sentinel.db"))
+        conn.execute("PRAGMA journal_mode = WAL")
+        migrations.migrate(conn)
+        conn.commit()
+        conn.row_factory = sqlite3.Row
+
+        build_s = build(conn, rng, words, args.atoms, args.lines, args.fossils)
+        print(f"Synthetic workspace: {args.atoms} atoms x {args.lines} lines, {args.fossils} fossils, {args.words}-word vocabulary")
+        print(f"  build      {build_s:7.1f} s    ({args.atoms / build_s:.0f} atoms/s with index triggers)")
+        size = fts_size(conn)
+        if size:
+            print(f"  index      {size / 2**20:7.1f} MiB")
+        start = time.perf_counter()
+        indexed = search.index_fossils(conn)
+        conn.commit()
+        print(f"  fossils    {time.perf_counter() - start:7.1f} s    ({indexed} indexed)")
+
+        common, mid, rare = words[0], words[len(words) // 50], words[-1]
+        queries = [
+            ("common word", common, {}),
+            ("mid word", mid, {}),
+            ("rare word", rare, {}),
+            ("prefix (3 chars)", mid[:3], {}),
+            ("two words", f"{common} {mid}", {}),
+            ("phrase", f"{words[0]}_{words[1]}", {}),
+            ("path", "src/" + words[5], {}),
+            ("domain filter", mid, {"domain": "Docs"}),
+            ("status filter", mid, {"status": 2}),
+            ("page 5", common, {"offset": 80}),
+            ("with fossils", mid, {"fossils": True}),
+        ]
+        print(f"\n  {'query':<18}{'p50 ms':>8}{'p95 ms':>8}{'hits':>6}    ({args.repeat} runs each, limit 20)")
+        for label, q, kwargs in queries:
+            p50, p95, hits = time_query(conn, args.repeat, q, **kwargs)
+            print(f"  {label:<18}{p50:8.2f}{p95:8.2f}{hits:6d}")
+        conn.close()
+
+if __name__ == "__main__":
+    main()
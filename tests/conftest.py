@@ -5,12 +5,23 @@ import sys
 import os
 sys.path.append(os.getcwd())
 from fastapi.testclient import TestClient
-from backend.main import app, get_db_connection
+from backend import migrations
+from backend.main import app, db, feed, get_db_connection, graph, pool
 
 @pytest.fixture
 def anyio_backend():
     return 'asyncio'
 
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_teardown(item):
+    # Close pooled connections before fixtures delete their database files,
+    # otherwise the -wal/-shm files of the deleted database are left behind
+    db.shutdown()
+    pool.close_all()
+    feed.reset()
+    graph.reset()
+    yield
+
 @pytest.fixture
 def mock_db():
     conn = sqlite3.connect(":memory:", check_same_thread=False)
@@ -22,9 +33,23 @@ def mock_db():
     cursor.execute("CREATE TABLE envelopes (id TEXT PRIMARY KEY, domain TEXT, x INTEGER, y INTEGER, w INTEGER, h INTEGER)")
     cursor.execute("CREATE TABLE threads (id TEXT PRIMARY KEY, source TEXT, target TEXT)")
     cursor.execute("CREATE TABLE portals (id INTEGER PRIMARY KEY AUTOINCREMENT, atom_id TEXT, path TEXT, description TEXT, created_at TEXT)")
+    # Indexes, change-log triggers and the rest of the current schema
+    migrations.migrate(conn)
     conn.commit()
     return conn
 
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """A project root (the cwd) with a current-schema .spatia/sentinel.db; test
+    modules override this to add their own files."""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(".spatia")
+    conn = sqlite3.connect(".spatia/sentinel.db")
+    migrations.migrate(conn)
+    conn.commit()
+    yield conn
+    conn.close()
+
 @pytest.fixture
 def client(mock_db):
     app.dependency_overrides[get_db_connection] = lambda: mock_db
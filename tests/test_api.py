@@ -27,19 +27,11 @@ def test_update_geometry(client, mock_db):
     assert target['x'] == 100
     assert target['y'] == 200
 
-# NOTE: Testing /api/shatter requires the actual spatia-shatter script to run.
-# Since we are in a devbox environment, we could mock the subprocess call, 
-# or just ensure the endpoint handles the request structure correctly.
-# For this smoke test, let's mock the subprocess for safety/speed.
+# /api/shatter runs the shatter library in-process, so a hollow construct
+# can be shattered straight into the in-memory DB.
 
-from unittest.mock import patch, AsyncMock
-
-@patch('backend.main.run_subprocess_async', new_callable=AsyncMock)
-def test_shatter_mocked(mock_run, client, mock_db):
-    # Mock return value
-    mock_run.return_value = "ATOM_ID: new_atom_123"
-    
-    payload = {"path": "test.txt", "content": "some content"}
+def test_shatter_hollow_construct(client, mock_db):
+    payload = {"path": "new_atom_123", "content": "some content"}
     response = client.post("/api/shatter", json=payload)
     
     assert response.status_code == 200
@@ -47,6 +39,8 @@ def test_shatter_mocked(mock_run, client, mock_db):
     
     # Verify geometry initialized to 0,0
     cursor = mock_db.cursor()
+    cursor.execute("SELECT content FROM atoms WHERE id = 'new_atom_123'")
+    assert cursor.fetchone()[0] == "some content"
     cursor.execute("SELECT x, y FROM geometry WHERE atom_id = 'new_atom_123'")
     row = cursor.fetchone()
     
@@ -0,0 +1,82 @@
+import pytest
+
+@pytest.fixture
+def atoms(mock_db):
+    cursor = mock_db.cursor()
+    rows = [
+        ("a.txt", "Software", 1, 0, 0),
+        ("b.txt", "Software", 3, 100, 100),
+        ("c.recipe", "Culinary", 1, 500, 500),
+        ("d.txt", "Software", 0, 50, 20),
+        ("e.contract", "Legal", 1, -10, 5),
+    ]
+    for atom_id, domain, status, x, y in rows:
+        cursor.execute(
+            "INSERT INTO atoms (id, type, domain, status, content, hash) VALUES (?, 'file', ?, ?, ?, ?)",
+            (atom_id, domain, status, "x" * 1000, f"h_{atom_id}")
+        )
+        cursor.execute("INSERT INTO geometry (atom_id, x, y) VALUES (?, ?, ?)", (atom_id, x, y))
+    mock_db.commit()
+    return [row[0] for row in rows]
+
+def test_listing_is_metadata_only(client, atoms):
+    listed = client.get("/api/atoms").json()
+    assert [a['id'] for a in listed] == atoms
+    assert set(listed[0]) == {"id", "domain", "status", "hash", "x", "y"}
+    assert listed[1] == {"id": "b.txt", "domain": "Software", "status": 3, "hash": "h_b.txt", "x": 100, "y": 100}
+
+def test_field_projection(client, atoms):
+    listed = client.get("/api/atoms", params={"fields": "content,type"}).json()
+    assert set(listed[0]) == {"id", "content", "type"}
+    assert listed[0]['content'] == "x" * 1000
+
+    response = client.get("/api/atoms", params={"fields": "id,secret"})
+    assert response.status_code == 400
+
+@pytest.mark.parametrize("params, expected", [
+    ({"status": 1}, ["a.txt", "c.recipe", "e.contract"]),
+    ({"domain": "Software"}, ["a.txt", "b.txt", "d.txt"]),
+    ({"domain": "Software", "status": 1}, ["a.txt"]),
+    ({"bbox": "0,0,100,100"}, ["a.txt", "b.txt", "d.txt"]),
+    # Corners in any order
+    ({"bbox": "600,600,-20,0"}, ["a.txt", "b.txt", "c.recipe", "d.txt", "e.contract"]),
+])
+def test_filters(client, atoms, params, expected):
+    assert [a['id'] for a in client.get("/api/atoms", params=params).json()] == expected
+
+def test_invalid_bbox(client, atoms):
+    assert client.get("/api/atoms", params={"bbox": "1,2,3"}).status_code == 400
+
+def test_keyset_pagination(client, atoms):
+    seen, after = [], None
+    while True:
+        params = {"limit": 2}
+        if after:
+            params["after"] = after
+        response = client.get("/api/atoms", params=params)
+        page = response.json()
+        assert len(page) <= 2
+        seen.extend(a['id'] for a in page)
+        after = response.headers.get("X-Next-After")
+        if after is None:
+            break
+    assert seen == atoms
+
+    # Filters apply within pages too
+    response = client.get("/api/atoms", params={"limit": 2, "domain": "Software"})
+    assert [a['id'] for a in response.json()] == ["a.txt", "b.txt"]
+    assert response.headers["X-Next-After"] == "b.txt"
+
+def test_get_single_atom(client, mock_db, atoms):
+    mock_db.execute("INSERT INTO atoms (id, type, content, hash) VALUES ('src/deep/f.py', 'file', 'print(1)', 'h')")
+    mock_db.commit()
+
+    atom = client.get("/api/atoms/b.txt").json()
+    assert atom['content'] == "x" * 1000
+    assert (atom['x'], atom['y'], atom['status']) == (100, 100, 3)
+
+    # Path-like IDs; no geometry yet
+    atom = client.get("/api/atoms/src/deep/f.py").json()
+    assert (atom['content'], atom['x'], atom['y']) == ("print(1)", 0, 0)
+
+    assert client.get("/api/atoms/missing.txt").status_code == 404
@@ -120,6 +120,26 @@ def test_spatia_eject(setup_db):
     assert not os.path.exists('dummy_ws/sentinel.db')
     os.rmdir('dummy_ws')
 
+def test_spatia_eject_resolves_links_in_ignored_paths(tmp_path):
+    mod = load_script('spatia-eject.py')
+    source = tmp_path / "project"
+    (source / "node_modules" / "pkg").mkdir(parents=True)
+    (source / ".env").write_text("SECRET=1")
+    (source / "node_modules" / "pkg" / "index.js").write_text("module.exports = 1")
+    ws = tmp_path / "workspaces" / "ws"
+    (ws / "node_modules" / "pkg").mkdir(parents=True)
+    (ws / ".gitignore").write_text("generated/\n")
+    (ws / "generated").mkdir()
+    os.symlink(source / ".env", ws / ".env")
+    os.symlink(source / "node_modules" / "pkg" / "index.js", ws / "node_modules" / "pkg" / "index.js")
+    os.symlink(source / ".env", ws / "generated" / "env.copy")
+
+    mod.eject_workspace("ws", str(tmp_path / "workspaces"))
+    # Ignored for shatter, but still part of the ejected directory
+    for link in (ws / ".env", ws / "node_modules" / "pkg" / "index.js", ws / "generated" / "env.copy"):
+        assert not os.path.islink(link)
+    assert (ws / ".env").read_text() == "SECRET=1"
+
 
 # 5. spatia-endorse.py
 def test_spatia_endorse(setup_db):
@@ -204,6 +224,18 @@ def test_spatia_shatter_hollow(setup_db):
              assert res[0] == 'raw_content'
              assert res[1] == 'generic'
 
+def test_spatia_shatter_flags(project, tmp_path, capsys):
+    mod = load_script('spatia-shatter.py')
+    (tmp_path / "a.py").write_text("def f():\n    return 1\n")
+    with patch.dict(os.environ, {"SENTINEL_DB": ".spatia/sentinel.db"}):
+        with patch.object(sys, 'argv', ['prog', '--jobs', '3', '--ast']):
+            mod.main()
+        assert "(3 jobs" in capsys.readouterr().out
+        (tmp_path / "a.py").write_text("def f():\n    return 2\n")
+        with patch.object(sys, 'argv', ['prog', '--paths', 'a.py', '--ast']):
+            mod.main()
+    assert "ATOM_ID: a.py::f" in capsys.readouterr().out
+
 def test_witness_culinary_error(setup_db):
     mod = load_script('witness-culinary.py')
     # Test DB missing path
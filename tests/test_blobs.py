@@ -0,0 +1,40 @@
+import pytest
+import os
+import sqlite3
+from backend import blobs, migrations, shatter
+
+@pytest.fixture
+def db():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE atoms (id TEXT PRIMARY KEY, type TEXT, content TEXT, hash TEXT, domain TEXT, status INTEGER DEFAULT 0, last_witnessed TEXT)")
+    conn.execute("CREATE TABLE geometry (atom_id TEXT PRIMARY KEY, x INTEGER, y INTEGER)")
+    yield conn
+    conn.close()
+
+def test_put_blob_deduplicates(db):
+    migrations.migrate(db)
+    cursor = db.cursor()
+    h1 = blobs.put_blob(cursor, "same")
+    h2 = blobs.put_blob(cursor, "same")
+    assert h1 == h2 == blobs.calculate_hash("same")
+    assert db.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 1
+    assert blobs.get_blob(cursor, h1) == "same"
+
+def test_resolve_content_prefers_inline(db):
+    migrations.migrate(db)
+    cursor = db.cursor()
+    h = blobs.put_blob(cursor, "from blob")
+    assert blobs.resolve_content(cursor, "inline", h) == "inline"
+    assert blobs.resolve_content(cursor, None, h) == "from blob"
+
+def test_flip_flopping_file_reuses_blobs(db, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    target = tmp_path / "flip.txt"
+    for version in ["A", "B", "A", "B", "A"]:
+        target.write_text(version)
+        shatter.shatter(db, full=True)
+
+    fossils = db.execute("SELECT hash FROM fossils WHERE atom_id = 'flip.txt'").fetchall()
+    assert len(fossils) == 4
+    # Four fossils, two distinct contents
+    assert db.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 2
@@ -0,0 +1,103 @@
+import pytest
+from unittest.mock import patch, AsyncMock
+from backend import changelog
+from backend.main import feed
+
+@pytest.fixture
+def quiet():
+    with patch('backend.main.manager.broadcast', new_callable=AsyncMock):
+        yield
+
+def events(conn):
+    return {event["type"]: event for event in feed.poll(conn)}
+
+def test_first_poll_is_a_baseline(mock_db):
+    mock_db.execute("INSERT INTO atoms (id) VALUES ('old')")
+    mock_db.commit()
+    assert feed.poll(mock_db) == []
+    assert feed.seq == changelog.current_seq(mock_db)
+    # Nothing new since
+    assert feed.poll(mock_db) == []
+
+def test_direct_writes_become_typed_events(mock_db):
+    feed.poll(mock_db)
+    # As a CLI script would, bypassing the API
+    mock_db.execute("INSERT INTO atoms (id, status) VALUES ('a.txt', 1)")
+    mock_db.execute("INSERT INTO geometry (atom_id, x, y) VALUES ('a.txt', 10, 20)")
+    mock_db.execute("INSERT INTO fossils (atom_id, ts) VALUES ('a.txt', 't1')")
+    mock_db.execute("INSERT INTO envelopes (id, domain, x, y, w, h) VALUES ('env', 'Software', 0, 0, 10, 10)")
+    mock_db.commit()
+
+    seq = changelog.current_seq(mock_db)
+    assert events(mock_db) == {
+        "atom_changed": {"type": "atom_changed", "ids": ["a.txt"], "seq": seq},
+        "geometry_changed": {"type": "geometry_changed", "ids": ["a.txt"], "seq": seq},
+        "fossil_added": {"type": "fossil_added", "ids": ["a.txt@t1"], "seq": seq},
+        "envelope_changed": {"type": "envelope_changed", "ids": ["env"], "seq": seq},
+    }
+    assert feed.poll(mock_db) == []
+
+def test_threads_carry_endpoints(mock_db):
+    feed.poll(mock_db)
+    mock_db.execute("INSERT INTO threads (id, source, target) VALUES ('t1', 'a', 'b')")
+    mock_db.commit()
+    assert events(mock_db)["thread_added"]["threads"] == [{"id": "t1", "source": "a", "target": "b"}]
+
+def test_deletes_become_removed_events(mock_db):
+    mock_db.execute("INSERT INTO atoms (id) VALUES ('a')")
+    mock_db.execute("INSERT INTO threads (id, source, target) VALUES ('t1', 'a', 'b')")
+    mock_db.commit()
+    feed.poll(mock_db)
+    mock_db.execute("DELETE FROM atoms WHERE id = 'a'")
+    mock_db.execute("DELETE FROM threads WHERE id = 't1'")
+    mock_db.commit()
+    found = events(mock_db)
+    assert found["atom_removed"]["ids"] == ["a"]
+    assert found["thread_removed"]["ids"] == ["t1"]
+
+def test_batches_cover_everything(mock_db, monkeypatch):
+    monkeypatch.setattr(feed, "batch", 2)
+    feed.poll(mock_db)
+    mock_db.executemany("INSERT INTO atoms (id) VALUES (?)", [(f"a{i}",) for i in range(5)])
+    mock_db.commit()
+    assert events(mock_db)["atom_changed"]["ids"] == [f"a{i}" for i in range(5)]
+
+def test_api_writes_are_not_echoed(client, mock_db, quiet):
+    feed.poll(mock_db)
+    # These handlers broadcast their own events
+    client.post("/api/shatter", json={"path": "note", "content": "v1"})
+    client.post("/api/shatter", json={"path": "note", "content": "v2"})
+    client.post("/api/threads", json={"source": "note", "target": "other"})
+    client.post("/api/envelopes", json={"id": "env", "domain": "Software", "x": 0, "y": 0, "w": 100, "h": 100})
+    client.delete("/api/envelopes/env")
+    assert feed.poll(mock_db) == []
+    assert feed.seq == changelog.current_seq(mock_db)
+
+def test_silent_api_writes_are_delivered(client, mock_db):
+    # Geometry saves broadcast nothing themselves, so other clients learn from the feed
+    mock_db.execute("INSERT INTO atoms (id) VALUES ('a')")
+    mock_db.commit()
+    feed.poll(mock_db)
+    client.post("/api/geometry", json=[{"atom_id": "a", "x": 5, "y": 5}])
+    assert events(mock_db)["geometry_changed"]["ids"] == ["a"]
+
+def test_later_external_change_is_still_delivered(client, mock_db, quiet):
+    feed.poll(mock_db)
+    client.post("/api/shatter", json={"path": "note", "content": "v1"})
+    # The announcement covers only changes up to the API write
+    mock_db.execute("UPDATE atoms SET status = 3 WHERE id = 'note'")
+    mock_db.commit()
+    assert events(mock_db)["atom_changed"]["ids"] == ["note"]
+
+def test_reset_starts_a_new_baseline(mock_db):
+    feed.poll(mock_db)
+    mock_db.execute("INSERT INTO atoms (id) VALUES ('a')")
+    mock_db.commit()
+    feed.reset()
+    assert feed.poll(mock_db) == []
+    assert feed.seq == changelog.current_seq(mock_db)
+
+def test_lower_seq_means_another_database(mock_db):
+    feed.seq = 500
+    assert feed.poll(mock_db) == []
+    assert feed.seq == changelog.current_seq(mock_db)
@@ -0,0 +1,89 @@
+import pytest
+from unittest.mock import patch, AsyncMock
+from backend import changelog
+
+@pytest.fixture
+def quiet():
+    with patch('backend.main.manager.broadcast', new_callable=AsyncMock):
+        yield
+
+def changes(client, since, **params):
+    response = client.get("/api/changes", params={"since": since, **params})
+    assert response.status_code == 200
+    return response.json()
+
+def test_current_seq_without_since(client, mock_db):
+    assert client.get("/api/changes").json() == {"seq": 0, "reset": False, "more": False, "changes": []}
+    mock_db.execute("INSERT INTO atoms (id) VALUES ('a')")
+    mock_db.commit()
+    assert client.get("/api/changes").json()["seq"] == 1
+
+def test_api_and_direct_writes_are_logged(client, mock_db, quiet):
+    start = client.get("/api/changes").json()["seq"]
+    # As a CLI script would, bypassing the API
+    mock_db.execute("INSERT INTO atoms (id, type, domain, status, content, hash) VALUES ('a.txt', 'file', 'Software', 1, 'text', 'h1')")
+    mock_db.commit()
+    client.post("/api/geometry", json=[{"atom_id": "a.txt", "x": 10, "y": 20}])
+    client.post("/api/threads", json={"source": "a.txt", "target": "b.txt"})
+    client.post("/api/envelopes", json={"id": "env", "domain": "Software", "x": 0, "y": 0, "w": 100, "h": 100})
+    client.delete("/api/envelopes/env")
+
+    data = changes(client, start)
+    assert data["more"] is False
+    entries = {(c["table"], c["id"]): c for c in data["changes"]}
+    assert entries[("atoms", "a.txt")]["row"] == {"id": "a.txt", "domain": "Software", "status": 1, "hash": "h1", "x": 10, "y": 20}
+    assert entries[("geometry", "a.txt")]["row"] == {"atom_id": "a.txt", "x": 10, "y": 20}
+    thread = next(c for (table, _), c in entries.items() if table == "threads")
+    assert (thread["row"]["source"], thread["row"]["target"]) == ("a.txt", "b.txt")
+    # Created then deleted: a tombstone
+    assert entries[("envelopes", "env")] == {"seq": entries[("envelopes", "env")]["seq"], "table": "envelopes", "id": "env", "deleted": True, "row": None}
+
+    seqs = [c["seq"] for c in data["changes"]]
+    assert seqs == sorted(seqs)
+    assert data["seq"] == seqs[-1] == client.get("/api/changes").json()["seq"]
+    # Nothing new since
+    assert changes(client, data["seq"])["changes"] == []
+
+def test_repeated_changes_collapse_to_latest(client, mock_db):
+    mock_db.execute("INSERT INTO atoms (id, status) VALUES ('a', 0)")
+    for status in (1, 2, 3):
+        mock_db.execute("UPDATE atoms SET status = ? WHERE id = 'a'", (status,))
+    mock_db.commit()
+    data = changes(client, 0, fields="status")
+    assert [(c["id"], c["row"]) for c in data["changes"]] == [("a", {"id": "a", "status": 3})]
+    assert data["seq"] == 4
+
+def test_outer_conflict_clauses_still_log(mock_db):
+    mock_db.execute("INSERT INTO geometry (atom_id, x, y) VALUES ('a', 0, 0)")
+    first = changelog.current_seq(mock_db)
+    # OR IGNORE/OR REPLACE on the outer statement must not suppress the log entry
+    mock_db.execute("INSERT OR REPLACE INTO geometry (atom_id, x, y) VALUES ('a', 5, 5)")
+    mock_db.execute("INSERT OR IGNORE INTO threads (id, source, target) VALUES ('t', 'a', 'b')")
+    assert changelog.current_seq(mock_db) == first + 2
+    assert mock_db.execute("SELECT COUNT(*) FROM changes WHERE tbl = 'geometry'").fetchone()[0] == 1
+
+def test_pagination(client, mock_db):
+    mock_db.executemany("INSERT INTO atoms (id) VALUES (?)", [(f"a{i}",) for i in range(5)])
+    mock_db.commit()
+    seen, since = [], 0
+    while True:
+        data = changes(client, since, limit=2)
+        seen.extend(c["id"] for c in data["changes"])
+        since = data["seq"]
+        if not data["more"]:
+            break
+    assert seen == [f"a{i}" for i in range(5)]
+
+def test_since_from_another_database_requests_reset(client, mock_db):
+    data = changes(client, 500)
+    assert data["reset"] is True
+    assert data["changes"] == []
+
+def test_fossils_are_logged(client, mock_db, quiet):
+    client.post("/api/shatter", json={"path": "note", "content": "v1"})
+    since = client.get("/api/changes").json()["seq"]
+    client.post("/api/shatter", json={"path": "note", "content": "v2"})
+    fossil = next(c for c in changes(client, since)["changes"] if c["table"] == "fossils")
+    assert fossil["id"].startswith("note@")
+    assert fossil["row"]["atom_id"] == "note"
+    assert fossil["deleted"] is False
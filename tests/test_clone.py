@@ -0,0 +1,144 @@
+import asyncio
+import errno
+import json
+import os
+import sqlite3
+import threading
+import pytest
+from unittest.mock import patch, AsyncMock
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from backend import clone, migrations, snapshots
+from backend.main import app, clone_jobs
+
+@pytest.fixture
+def workspaces(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    ws_path = tmp_path / "workspaces" / "src"
+    (ws_path / "notes").mkdir(parents=True)
+    conn = sqlite3.connect(ws_path / "sentinel.db")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("CREATE TABLE atoms (id TEXT PRIMARY KEY, type TEXT, domain TEXT, status INTEGER DEFAULT 1, content TEXT, hash TEXT, last_witnessed TEXT)")
+    migrations.migrate(conn)
+    conn.executemany("INSERT INTO atoms (id, content) VALUES (?, ?)", [(f"a{i}", os.urandom(500).hex()) for i in range(300)])
+    conn.commit()
+    (ws_path / "geometry.sp").write_text("; Spatia Geometry Projection\n")
+    (ws_path / "notes" / "big.bin").write_bytes(os.urandom(3 * 1024 * 1024))
+    yield ws_path, conn
+    conn.close()
+    clone_jobs.clear()
+
+def atom_count(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM atoms").fetchone()[0]
+    finally:
+        conn.close()
+
+def test_plan_picks_a_method_per_file(workspaces):
+    ws_path, conn = workspaces
+    snapshot = snapshots.take(str(ws_path), "full")
+    methods = {rel: method for rel, method, _ in clone.plan(str(ws_path))}
+    assert methods == {
+        "sentinel.db": "backup",
+        f"sentinel.snap.{snapshot['id']}.db": "hardlink",
+        "geometry.sp": "copy",
+        os.path.join("notes", "big.bin"): "copy",
+    }
+    # The open connection's WAL is folded in by the backup, not copied
+    assert os.path.exists(ws_path / "sentinel.db-wal")
+
+def test_clone_job_copies_everything(workspaces, tmp_path):
+    ws_path, conn = workspaces
+    snapshot = snapshots.take(str(ws_path), "full")
+    target = tmp_path / "workspaces" / "dst"
+    reports = []
+    job = clone.CloneJob("src", "dst", str(ws_path), str(target))
+    job.progress_interval = 0
+    assert job.run(lambda job: reports.append(job.done)) == "done"
+
+    assert atom_count(target / "sentinel.db") == 300
+    assert (target / "notes" / "big.bin").read_bytes() == (ws_path / "notes" / "big.bin").read_bytes()
+    assert (target / "geometry.sp").read_text() == "; Spatia Geometry Projection\n"
+    snap = f"sentinel.snap.{snapshot['id']}.db"
+    assert os.path.samefile(target / snap, ws_path / snap)
+    assert not os.path.exists(target / "sentinel.db-wal")
+    assert job.done == job.total and reports == sorted(reports) and len(reports) > 2
+    assert job.methods["backup"] == 1 and job.methods["hardlink"] == 1
+
+    # The clone is independent of its source
+    conn.execute("DELETE FROM atoms")
+    conn.commit()
+    assert atom_count(target / "sentinel.db") == 300
+
+def test_copy_falls_back_when_reflinks_and_copy_file_range_fail(tmp_path):
+    src, dst = tmp_path / "src.bin", tmp_path / "dst.bin"
+    src.write_bytes(os.urandom(100_000))
+    unsupported = OSError(errno.EXDEV, "Invalid cross-device link")
+    with patch("backend.clone.fcntl.ioctl", side_effect=OSError(errno.EOPNOTSUPP, "Operation not supported")), \
+         patch("os.copy_file_range", side_effect=unsupported, create=True):
+        assert clone.copy_file(str(src), str(dst), lambda n: None, lambda: None) == "copy"
+    assert dst.read_bytes() == src.read_bytes()
+
+    with patch("backend.clone.fcntl.ioctl", side_effect=OSError(errno.EIO, "I/O error")):
+        with pytest.raises(OSError):
+            clone.copy_file(str(src), str(dst), lambda n: None, lambda: None)
+
+def test_cancel_removes_the_partial_clone(workspaces, tmp_path):
+    ws_path, conn = workspaces
+    target = tmp_path / "workspaces" / "dst"
+    job = clone.CloneJob("src", "dst", str(ws_path), str(target))
+    job.progress_interval = 0
+    # Cancel from the first progress report, mid-copy
+    assert job.run(lambda job: job.cancel()) == "cancelled"
+    assert job.done < job.total
+    assert sorted(os.listdir(tmp_path / "workspaces")) == ["src"]
+
+def test_clone_api_events(workspaces):
+    client = TestClient(app)
+    with patch("backend.main.broadcast_event", new_callable=AsyncMock) as broadcast:
+        response = client.post("/api/workspaces/src/clone", json={"new_name": "copy"})
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["status"], data["target"]) == ("cloned", "copy")
+    assert atom_count("workspaces/copy/sentinel.db") == 300
+
+    types = [call.args[0]["type"] for call in broadcast.await_args_list]
+    assert types[0] == "clone_started" and types[-1] == "clone_done"
+    assert set(types[1:-1]) <= {"clone_progress"}
+    assert client.get(f"/api/clones/{data['job']}").json()["status"] == "done"
+    assert client.get("/api/workspaces").json() == ["copy", "src"]
+    assert client.post(f"/api/clones/{data['job']}/cancel").status_code == 409
+    assert client.post("/api/clones/nope/cancel").status_code == 404
+
+@pytest.mark.asyncio
+async def test_background_clone_can_be_cancelled(workspaces):
+    from backend.main import cancel_clone, clone_workspace, list_clones, CloneRequest
+    started, release = threading.Event(), threading.Event()
+    real_copy = clone.copy_file
+
+    def slow_copy(*args):
+        started.set()
+        release.wait(5)
+        return real_copy(*args)
+
+    with patch("backend.clone.copy_file", side_effect=slow_copy), \
+         patch("backend.main.broadcast_event", new_callable=AsyncMock) as broadcast:
+        response = await clone_workspace("src", req=None, wait=False)
+        assert response.status_code == 202
+        job_id = json.loads(response.body)["job"]
+        assert await asyncio.to_thread(started.wait, 5)
+        assert (await list_clones())[0]["status"] == "running"
+        # A second clone doesn't pick the name still being built
+        with pytest.raises(HTTPException) as exc:
+            await clone_workspace("src", CloneRequest(new_name="src-copy"))
+        assert exc.value.status_code == 409
+
+        assert await cancel_clone(job_id) == {"status": "cancelling", "job": job_id}
+        release.set()
+        while clone_jobs[job_id].status == "running":
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.01)
+        assert broadcast.await_args[0][0]["type"] == "clone_cancelled"
+    assert clone_jobs[job_id].status == "cancelled"
+    assert sorted(os.listdir("workspaces")) == ["src"]
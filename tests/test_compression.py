@@ -0,0 +1,96 @@
+import gzip
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from backend import compression, fastjson
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate", "gzip"),
+    ("GZIP", "gzip"),
+    ("deflate", None),
+    ("", None),
+    ("identity", None),
+    ("gzip;q=0", None),
+    ("*", next(iter(compression.ENCODERS))),
+    ("*;q=0.5, gzip;q=0", next((e for e in compression.ENCODERS if e != "gzip"), None)),
+])
+def test_negotiate(header, expected):
+    assert compression.negotiate(header) == expected
+
+def test_negotiate_prefers_client_weight_then_server_order():
+    encoders = {"zstd": None, "br": None, "gzip": None}
+    assert compression.negotiate("gzip, br, zstd", encoders) == "zstd"
+    assert compression.negotiate("gzip, br;q=0.8, zstd;q=0.5", encoders) == "gzip"
+    assert compression.negotiate("gzip;q=0.5, br", encoders) == "br"
+    assert compression.negotiate("gzip;q=bogus", encoders) is None
+
+@pytest.fixture
+def app_client():
+    app = FastAPI()
+    app.add_middleware(compression.CompressionMiddleware, minimum_size=100)
+
+    @app.get("/big")
+    def big():
+        return fastjson.JSONBytes([{"id": f"atom_{i}", "x": i} for i in range(100)], headers={"ETag": '"v1"'})
+
+    @app.get("/small")
+    def small():
+        return {"ok": True}
+
+    @app.get("/text")
+    def text():
+        return StreamingResponse(iter([b"data: x\n\n" * 50, b"data: y\n\n" * 50]), media_type="text/event-stream")
+
+    return TestClient(app)
+
+def test_large_json_is_compressed(app_client):
+    response = app_client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    # Different bytes for the same entity: the validator is weakened
+    assert response.headers["ETag"] == 'W/"v1"'
+    assert response.json()[99] == {"id": "atom_99", "x": 99}
+
+    # Headers describe the bytes on the wire
+    assert int(response.headers["Content-Length"]) < len(fastjson.dumps(response.json()))
+
+def test_identity_and_small_bodies_are_not_compressed(app_client):
+    response = app_client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["ETag"] == '"v1"'
+    assert response.headers["Vary"] == "Accept-Encoding"
+
+    response = app_client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+
+def test_streams_pass_through(app_client):
+    response = app_client.get("/text", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    assert response.text == "data: x\n\n" * 50 + "data: y\n\n" * 50
+
+def test_gzip_is_deterministic():
+    data = b"x" * 1000
+    assert compression.ENCODERS["gzip"](data) == compression.ENCODERS["gzip"](data)
+    assert gzip.decompress(compression.ENCODERS["gzip"](data)) == data
+
+def test_atoms_listing_is_compressed(client, mock_db):
+    mock_db.executemany("INSERT INTO atoms (id, domain, status, hash) VALUES (?, 'Software', 1, ?)", [(f"src/file_{i}.py", f"h{i}") for i in range(200)])
+    mock_db.commit()
+    response = client.get("/api/atoms", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    atoms = response.json()
+    assert len(atoms) == 200
+    assert atoms[0] == {"id": "src/file_0.py", "domain": "Software", "status": 1, "hash": "h0", "x": 0, "y": 0}
+
+    # The weakened tag still revalidates
+    again = client.get("/api/atoms", headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["ETag"]})
+    assert again.status_code == 304
+
+def test_json_bytes_matches_the_default_encoder():
+    data = [{"id": "a", "content": "naïve \"quoted\"\n", "x": 1, "y": None, "flag": True}]
+    response = fastjson.JSONBytes(data)
+    assert json.loads(response.body) == data
+    assert response.headers["content-type"] == "application/json"
+    assert fastjson.JSONBytes(b'[1]').body == b'[1]'
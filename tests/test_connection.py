@@ -28,12 +28,13 @@ async def test_global_exception_handler(monkeypatch):
     # a new testing route.
     # A safer way is to mock a function that an endpoint calls.
     
-    async def mock_shatter_subprocess(*args, **kwargs):
-        raise RuntimeError("Simulated Subprocess Crash")
+    def mock_shatter_items(*args, **kwargs):
+        raise RuntimeError("Simulated Shatter Crash")
     
-    # Patch the run_subprocess_async which is used by /api/shatter
+    # Patch the in-process shatter used by /api/shatter
     from backend import main
-    monkeypatch.setattr(main, "run_subprocess_async", mock_shatter_subprocess)
+    monkeypatch.setattr(main, "shatter_and_place", mock_shatter_items)
+    monkeypatch.setattr(main, "get_db_connection", lambda: sqlite3.connect(":memory:", check_same_thread=False))
     
     transport = ASGITransport(app=app)
     async with AsyncClient(transport=transport, base_url=BASE_URL) as ac:
@@ -44,7 +45,7 @@ async def test_global_exception_handler(monkeypatch):
     assert data["status"] == "error"
     # Shatter endpoint catches exceptions and wraps in HTTPException, so we expect HTTP_ERROR
     assert data["error"]["code"] == "HTTP_ERROR"
-    assert "Simulated Subprocess Crash" in data["error"]["message"]
+    assert "Simulated Shatter Crash" in data["error"]["message"]
 
 @pytest.mark.asyncio
 async def test_http_exception_handler():
@@ -3,6 +3,7 @@ import sqlite3
 import pytest
 import asyncio
 from unittest.mock import patch, MagicMock, AsyncMock
+from fastapi import Request, Response
 from fastapi.testclient import TestClient
 from backend.main import app, DB_PATH, run_witness_process, watch_sentinel_db, lifespan
 import backend.main
@@ -14,6 +15,10 @@ import sys
 client = TestClient(app)
 TEST_DB = "test_coverage.db"
 
+def get_request(path):
+    # For calling route handlers directly
+    return Request({"type": "http", "method": "GET", "path": path, "query_string": b"", "headers": []})
+
 # --- Fixtures ---
 
 @pytest.fixture(autouse=True)
@@ -86,25 +91,20 @@ def test_witness_broadcasts_event(mock_broadcast):
 # 1. Background Loops: watch_sentinel_db
 @pytest.mark.asyncio
 async def test_watch_sentinel_db_flow():
-    # Mock awatch to yield one event then stop (or we break manually)
-    # We can mock it to return an AsyncIterator
-    
-    ms = MagicMock()
-    ms.__aiter__.return_value = [[('modified', TEST_DB)]]
-    
-    with patch('backend.main.awatch', return_value=ms):
-        with patch('backend.main.manager.broadcast', new_callable=AsyncMock) as mock_broadcast:
-            # We need to run watch_sentinel_db but interrupt it or let it finish if we mocked it to yield once
-            # The actual code: `async for changes in awatch(...)`
-            # If our mock yields once and stops, the loop finishes.
-            await watch_sentinel_db()
-            
-            mock_broadcast.assert_called_with({"type": "db_update"})
+    # A database without the change log yet is skipped, not fatal
+    event = {"type": "thread_removed", "ids": ["t1"], "seq": 3}
+    reads = [sqlite3.OperationalError("no such table: changes"), [event], Exception("stop")]
+
+    with patch('backend.main.db.read', new_callable=AsyncMock, side_effect=reads):
+        with patch('backend.main.DB_WATCH_INTERVAL', 0):
+            with patch('backend.main.manager.broadcast', new_callable=AsyncMock) as mock_broadcast:
+                await watch_sentinel_db()
+                mock_broadcast.assert_called_once_with(event)
 
 @pytest.mark.asyncio
 async def test_watch_sentinel_db_error_handling():
     # Force an exception inside the loop
-    with patch('backend.main.awatch', side_effect=Exception("Watch Error")):
+    with patch('backend.main.db.read', new_callable=AsyncMock, side_effect=Exception("Watch Error")):
         # Should catch and print, not raise
         await watch_sentinel_db()
         # Pass if no exception raised
@@ -164,12 +164,16 @@ async def test_lifespan_error_handling():
 
 
 # 4. Global Exception Handler
-def test_global_exception_handler():
+def test_global_exception_handler(tmp_path, monkeypatch):
     # Pass raise_server_exceptions=False to allow app's exception handler to run
     # instead of TestClient re-raising the exception.
     client = TestClient(app, raise_server_exceptions=False)
+    (tmp_path / "workspaces").mkdir()
+    monkeypatch.chdir(tmp_path)
     
-    with patch('os.listdir', side_effect=Exception("Global Boom")):
+    # Only backend.main's reference to os: executor and pool threads keep the real one
+    with patch('backend.main.os', wraps=os) as main_os:
+        main_os.listdir.side_effect = Exception("Global Boom")
         response = client.get("/api/workspaces")
         assert response.status_code == 500
         # Observed Schema: {'status': 'error', 'error': {'code': 'INTERNAL_ERROR', 'message': 'Global Boom', 'type': 'Exception'}}
@@ -334,7 +338,7 @@ async def test_sse_endpoint_flow():
         assert len(backend.main.manager.clients) > 0
         q = backend.main.manager.clients[0]
         
-    await q.put("test_data")
+    q.put_nowait("test_data")
     
     # 3. Second yield: data
     second = await iterator.__anext__()
@@ -349,9 +353,9 @@ async def test_sse_endpoint_flow():
 @pytest.mark.asyncio
 async def test_health_check_coverage():
     # 1. Success case
-    with patch('sqlite3.connect') as mock_connect:
+    with patch('backend.main.pool.connection') as mock_connect:
         with patch('os.path.exists', return_value=True):
-            mock_connect.return_value.__enter__.return_value.cursor.return_value.execute.return_value = None
+            mock_connect.return_value.execute.return_value.fetchone.return_value = (1,)
             
             # Mock readlink for workspace name
             with patch('os.path.islink', return_value=True):
@@ -361,13 +365,13 @@ async def test_health_check_coverage():
                      assert res['workspace'] == 'test_ws'
 
     # 2. Error case (Exception coverage)
-    with patch('sqlite3.connect', side_effect=Exception("Health Fail")):
+    with patch('backend.main.pool.connection', side_effect=Exception("Health Fail")):
         with patch('os.path.exists', return_value=True):
              res = await health_check()
              assert "error: Health Fail" in res['db_status']
              
     # Exception in workspace name parsing
-    with patch('sqlite3.connect'):
+    with patch('backend.main.pool.connection'):
         with patch('os.path.exists', return_value=True):
             with patch('os.path.islink', return_value=True):
                 with patch('os.readlink', side_effect=Exception("Link Fail")):
@@ -388,7 +392,7 @@ async def test_get_envelopes_operational_error():
     cursor.execute.side_effect = sqlite3.OperationalError("Table missing")
     
     with patch('backend.main.get_db_connection', return_value=conn):
-         envs = await get_envelopes()
+         envs = await get_envelopes(get_request("/api/envelopes"), Response())
          assert envs == []
 
 @pytest.mark.asyncio
@@ -584,12 +588,17 @@ async def test_clone_workspace_collision_handling():
             return False
             
         with patch('os.path.exists', side_effect=side_effect_exists):
-            with patch('shutil.copytree') as mock_copy:
+            def finish(job, on_progress=None):
+                job.status = "done"
+                return job.status
+
+            with patch('backend.clone.CloneJob.run', autospec=True, side_effect=finish) as mock_run:
                  # Must pass req=None to avoid Body(...) default object
                  res = await clone_workspace("ws1", req=None)
                  
                  assert res['target'] == "ws1-copy-1"
-                 mock_copy.assert_called_with('workspaces/ws1', 'workspaces/ws1-copy-1')
+                 job = mock_run.call_args[0][0]
+                 assert (job.src_path, job.target_path) == ('workspaces/ws1', 'workspaces/ws1-copy-1')
 
 @pytest.mark.asyncio
 async def test_clone_workspace_explicit_collision():
@@ -607,16 +616,17 @@ async def test_clone_workspace_explicit_collision():
 @pytest.mark.asyncio
 async def test_clone_workspace_copy_failure():
     """
-    Test 500 when shutil.copytree fails.
+    Test 500 when the copy fails.
     """
     from backend.main import clone_workspace
     
     with patch('os.path.isdir', return_value=True):
         with patch('os.path.exists', return_value=False):
-             with patch('shutil.copytree', side_effect=Exception("Disk Full")):
+             with patch('backend.clone.plan', side_effect=OSError("Disk Full")):
                  with pytest.raises(Exception) as exc:
                      await clone_workspace("ws1", req=None)
                  assert exc.value.status_code == 500
+                 assert "Disk Full" in exc.value.detail
 
 # --- Additional Gaps Coverage ---
 
@@ -642,7 +652,7 @@ async def test_snapshot_workspace_error_cases():
     # 3. 500 Copy Fail (lines 267-268)
     with patch('os.path.isdir', return_value=True):
         with patch('os.path.exists', return_value=True):
-            with patch('shutil.copy2', side_effect=Exception("Copy Fail")):
+            with patch('backend.snapshots.take', side_effect=Exception("Copy Fail")):
                 with pytest.raises(Exception) as exc:
                     await snapshot_workspace("valid_ws")
                 assert exc.value.status_code == 500
@@ -670,16 +680,17 @@ def test_get_db_connection_missing():
              assert "Sentinel DB not found" in exc.value.detail
 
 @pytest.mark.asyncio
-async def test_shatter_no_output_id():
-    from backend.main import shatter_atom, ShatterRequest, SHATTER_SCRIPT
-    # Line 444: if not atom_id
+async def test_shatter_missing_file():
+    from backend.main import shatter_atom, ShatterRequest
     
-    # Mock run_subprocess_async to return output without ATOM_ID:
-    with patch('backend.main.run_subprocess_async', return_value="Some output but no ID"):
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    conn.execute("CREATE TABLE atoms (id TEXT PRIMARY KEY, type TEXT, content TEXT, hash TEXT, domain TEXT, status INTEGER, last_witnessed TEXT)")
+    conn.execute("CREATE TABLE geometry (atom_id TEXT PRIMARY KEY, x INTEGER, y INTEGER)")
+    with patch('backend.main.get_db_connection', return_value=conn):
          with pytest.raises(Exception) as exc:
-             await shatter_atom(ShatterRequest(path="foo"))
+             await shatter_atom(ShatterRequest(path="does/not/exist.txt"))
          assert exc.value.status_code == 500
-         assert "Could not determine atom_id" in exc.value.detail
+         assert "not found" in exc.value.detail
 
 @pytest.mark.asyncio
 async def test_summon_atom_write_disk():
@@ -732,7 +743,7 @@ async def test_get_atom_logs_error():
     with patch('os.path.exists', return_value=True):
         with patch('builtins.open', side_effect=Exception("Read Fail")):
              with pytest.raises(Exception) as exc:
-                 await get_atom_logs("atom1")
+                 await get_atom_logs("atom1", get_request("/api/atoms/atom1/logs"), Response())
              assert exc.value.status_code == 500
 
 @pytest.mark.asyncio
@@ -0,0 +1,111 @@
+import pytest
+import asyncio
+import sqlite3
+import threading
+import time
+from unittest.mock import patch
+from httpx import AsyncClient, ASGITransport
+from backend import db_executor, db_pool
+import backend.main as main
+
+@pytest.fixture
+def db_file(tmp_path):
+    path = str(tmp_path / "sentinel.db")
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("CREATE TABLE atoms (id TEXT PRIMARY KEY, status INTEGER)")
+    conn.execute("CREATE TABLE geometry (atom_id TEXT PRIMARY KEY, x INTEGER, y INTEGER)")
+    conn.execute("CREATE TABLE threads (id TEXT PRIMARY KEY, source TEXT, target TEXT)")
+    conn.execute("INSERT INTO threads VALUES ('t1', 'a', 'b')")
+    conn.commit()
+    conn.close()
+    return path
+
+@pytest.fixture
+def executor(db_file):
+    pool = db_pool.ConnectionPool()
+    executor = db_executor.DatabaseExecutor(lambda: pool.connection(db_file), readers=4)
+    yield executor
+    executor.shutdown()
+    pool.close_all()
+
+@pytest.mark.asyncio
+async def test_writes_are_serialized_on_one_thread(executor):
+    threads, active, overlaps = set(), [], []
+    def write(conn, i):
+        threads.add(threading.current_thread().name)
+        active.append(i)
+        if len(active) > 1:
+            overlaps.append(i)
+        time.sleep(0.01)
+        conn.execute("INSERT INTO atoms VALUES (?, 0)", (str(i),))
+        active.remove(i)
+
+    await asyncio.gather(*(executor.write(write, i) for i in range(10)))
+    assert len(threads) == 1
+    assert overlaps == []
+    assert await executor.read(lambda conn: conn.execute("SELECT COUNT(*) FROM atoms").fetchone()[0]) == 10
+
+@pytest.mark.asyncio
+async def test_reads_run_concurrently(executor):
+    barrier = threading.Barrier(3, timeout=2)
+    def read(conn):
+        # Deadlocks (BrokenBarrierError) unless three reads run at once
+        barrier.wait()
+        return conn.execute("SELECT COUNT(*) FROM threads").fetchone()[0]
+
+    assert await asyncio.gather(*(executor.read(read) for _ in range(3))) == [1, 1, 1]
+
+@pytest.mark.asyncio
+async def test_failed_write_rolls_back(executor):
+    def write(conn):
+        conn.execute("INSERT INTO atoms VALUES ('x', 0)")
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await executor.write(write)
+    assert await executor.read(lambda conn: conn.execute("SELECT COUNT(*) FROM atoms").fetchone()[0]) == 0
+
+@pytest.mark.asyncio
+async def test_event_loop_stays_responsive_during_long_write(db_file):
+    # Another process-like writer holds the write lock; the API write has to wait for it
+    locked, release = threading.Event(), threading.Event()
+    def hold_write_lock():
+        conn = sqlite3.connect(db_file)
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("INSERT INTO atoms VALUES ('busy', 0)")
+        locked.set()
+        release.wait(5)
+        conn.commit()
+        conn.close()
+
+    holder = threading.Thread(target=hold_write_lock)
+    holder.start()
+    locked.wait(5)
+
+    with patch.object(main, 'DB_PATH', db_file):
+        async with AsyncClient(transport=ASGITransport(app=main.app), base_url="http://test") as ac:
+            write = asyncio.create_task(ac.post("/api/geometry", json=[{"atom_id": "a", "x": 1, "y": 2}]))
+
+            # Sample loop latency while the write is stuck behind the lock
+            worst = 0.0
+            deadline = time.monotonic() + 0.5
+            while time.monotonic() < deadline:
+                start = time.monotonic()
+                await asyncio.sleep(0.01)
+                worst = max(worst, time.monotonic() - start - 0.01)
+
+            # Reads are not queued behind the pending write
+            read = await asyncio.wait_for(ac.get("/api/threads"), timeout=1)
+            assert read.json() == [{"id": "t1", "source": "a", "target": "b"}]
+            assert not write.done()
+
+            release.set()
+            response = await asyncio.wait_for(write, timeout=5)
+
+    holder.join()
+    assert response.status_code == 200
+    assert worst < 0.1
+    conn = sqlite3.connect(db_file)
+    assert conn.execute("SELECT x, y FROM geometry WHERE atom_id = 'a'").fetchone() == (1, 2)
+    conn.close()
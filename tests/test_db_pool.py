@@ -0,0 +1,150 @@
+import pytest
+import os
+import sqlite3
+import threading
+from unittest.mock import patch, AsyncMock
+from backend import db_pool
+
+@pytest.fixture
+def db(tmp_path):
+    path = str(tmp_path / "sentinel.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE atoms (id TEXT PRIMARY KEY, content TEXT)")
+    conn.commit()
+    conn.close()
+    return path
+
+@pytest.fixture
+def pool():
+    pool = db_pool.ConnectionPool()
+    yield pool
+    pool.close_all()
+
+def test_connection_is_reused_within_a_thread(pool, db):
+    first = pool.connection(db)
+    assert pool.connection(db) is first
+    assert pool.opened == 1
+
+def test_each_thread_gets_its_own_connection(pool, db):
+    seen = []
+    connected = threading.Barrier(5)
+    done = threading.Event()
+    def worker():
+        conn = pool.connection(db)
+        conn.execute("SELECT COUNT(*) FROM atoms").fetchone()
+        seen.append(conn)
+        connected.wait()
+        done.wait()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    connected.wait()
+    assert len({id(conn) for conn in seen}) == 4
+    assert pool.size() == 4
+    done.set()
+    for t in threads:
+        t.join()
+
+def test_connections_of_exited_threads_are_closed(pool, db):
+    seen = []
+    t = threading.Thread(target=lambda: seen.append(pool.connection(db)))
+    t.start()
+    t.join()
+    pool.close_all()
+    assert pool.size() == 0
+    with pytest.raises(sqlite3.ProgrammingError):
+        seen[0].execute("SELECT 1")
+
+def test_close_all_leaves_live_threads_alone(pool, db):
+    ready, closed, results = threading.Event(), threading.Event(), []
+    def worker():
+        first = pool.connection(db)
+        ready.set()
+        closed.wait()
+        # Still usable until this thread asks again, then replaced
+        results.append(first.execute("SELECT 1").fetchone()[0])
+        results.append(pool.connection(db) is not first)
+
+    t = threading.Thread(target=worker)
+    t.start()
+    ready.wait()
+    pool.close_all()
+    closed.set()
+    t.join()
+    assert results == [1, True]
+
+def test_connections_are_configured(pool, db):
+    conn = pool.connection(db)
+    assert conn.row_factory is sqlite3.Row
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+    assert conn.execute("PRAGMA mmap_size").fetchone()[0] > 0
+
+def test_reset_reopens(pool, db):
+    first = pool.connection(db)
+    pool.reset()
+    with pytest.raises(sqlite3.ProgrammingError):
+        first.execute("SELECT 1")
+    assert pool.connection(db) is not first
+    assert pool.size() == 1
+
+def test_replaced_file_is_reopened(pool, db, tmp_path):
+    pool.connection(db).execute("INSERT INTO atoms VALUES ('old', 'x')")
+    pool.connection(db).commit()
+
+    other = str(tmp_path / "other.db")
+    conn = sqlite3.connect(other)
+    conn.execute("CREATE TABLE atoms (id TEXT PRIMARY KEY, content TEXT)")
+    conn.execute("INSERT INTO atoms VALUES ('new', 'y')")
+    conn.commit()
+    conn.close()
+    link = str(tmp_path / "link.db")
+    os.symlink(db, link)
+    assert pool.connection(link).execute("SELECT id FROM atoms").fetchone()[0] == "old"
+
+    os.remove(link)
+    os.symlink(other, link)
+    assert pool.connection(link).execute("SELECT id FROM atoms").fetchone()[0] == "new"
+
+def test_missing_database_raises(pool, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        pool.connection(str(tmp_path / "gone.db"))
+
+def test_close_all(pool, db):
+    conn = pool.connection(db)
+    pool.close_all()
+    assert pool.size() == 0
+    assert pool.connection(db) is not conn
+
+def test_checkpoint_folds_wal_into_file(pool, db):
+    conn = pool.connection(db)
+    conn.execute("INSERT INTO atoms VALUES ('a', 'b')")
+    conn.commit()
+    db_pool.checkpoint(db)
+    assert os.path.getsize(db + "-wal") == 0
+
+def test_switch_workspace_resets_pool(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    from backend import main
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(".spatia")
+    for name in ("one", "two"):
+        os.makedirs(os.path.join("workspaces", name))
+        conn = sqlite3.connect(os.path.join("workspaces", name, "sentinel.db"))
+        conn.execute("CREATE TABLE atoms (id TEXT PRIMARY KEY, content TEXT)")
+        conn.execute("INSERT INTO atoms VALUES (?, '')", (name,))
+        conn.commit()
+        conn.close()
+    os.symlink(os.path.join("..", "workspaces", "one", "sentinel.db"), main.DB_PATH)
+
+    with patch.object(main, 'watch_sentinel_db', new=AsyncMock()), \
+         patch.object(main, 'broadcast_event', new=AsyncMock()), \
+         patch.object(main.pool, 'reset', wraps=main.pool.reset) as reset:
+        assert main.get_db_connection().execute("SELECT id FROM atoms").fetchone()[0] == "one"
+        response = TestClient(main.app).post("/api/workspace/switch", json={"name": "two"})
+        assert response.status_code == 200
+        reset.assert_called_once()
+        assert main.get_db_connection().execute("SELECT id FROM atoms").fetchone()[0] == "two"
+    main.pool.close_all()
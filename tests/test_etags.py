@@ -0,0 +1,107 @@
+import os
+import pytest
+from unittest.mock import patch
+from backend import changelog
+
+ENDPOINTS = ["/api/atoms", "/api/atoms?fields=id,content&limit=1", "/api/threads", "/api/envelopes", "/api/portals/a.txt", "/api/atoms/a.txt"]
+
+@pytest.fixture
+def seeded(client, mock_db):
+    mock_db.execute("INSERT INTO atoms (id, domain, status, content, hash) VALUES ('a.txt', 'Software', 1, 'text', 'h1')")
+    mock_db.execute("INSERT INTO threads (id, source, target) VALUES ('t1', 'a.txt', 'b.txt')")
+    mock_db.execute("INSERT INTO portals (atom_id, path) VALUES ('a.txt', 'docs/a.md')")
+    mock_db.commit()
+    return client
+
+def revalidate(client, url, etag):
+    return client.get(url, headers={"If-None-Match": etag})
+
+@pytest.mark.parametrize("url", ENDPOINTS)
+def test_unchanged_resource_is_not_modified(seeded, mock_db, url):
+    first = seeded.get(url)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert etag.startswith('"') and etag.endswith('"')
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    statements = []
+    mock_db.set_trace_callback(statements.append)
+    again = revalidate(seeded, url, etag)
+    mock_db.set_trace_callback(None)
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["ETag"] == etag
+    # Only the seq lookup: the endpoint's own query never runs
+    assert statements == ["SELECT COALESCE(MAX(seq), 0) FROM changes"]
+
+@pytest.mark.parametrize("url", ENDPOINTS)
+def test_any_logged_write_changes_the_etag(seeded, mock_db, url):
+    etag = seeded.get(url).headers["ETag"]
+    # A direct write, as a CLI script would make
+    mock_db.execute("INSERT INTO envelopes (id, domain, x, y, w, h) VALUES ('env', 'Software', 0, 0, 10, 10)")
+    mock_db.commit()
+    response = revalidate(seeded, url, etag)
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+def test_api_write_changes_the_etag(seeded):
+    etag = seeded.get("/api/portals/a.txt").headers["ETag"]
+    seeded.post("/api/portals", json={"atom_id": "a.txt", "path": "docs/b.md"})
+    response = revalidate(seeded, "/api/portals/a.txt", etag)
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+def test_etag_depends_on_query_and_workspace(seeded):
+    tags = {seeded.get(url).headers["ETag"] for url in ENDPOINTS}
+    assert len(tags) == len(ENDPOINTS)
+
+    etag = seeded.get("/api/threads").headers["ETag"]
+    # Another workspace can be at the same seq
+    with patch('backend.main.etag_epoch', 'other'):
+        assert revalidate(seeded, "/api/threads", etag).status_code == 200
+
+def test_if_none_match_lists_and_weak_tags(seeded):
+    etag = seeded.get("/api/threads").headers["ETag"]
+    assert revalidate(seeded, "/api/threads", f'"stale", W/{etag}').status_code == 304
+    assert revalidate(seeded, "/api/threads", '"stale"').status_code == 200
+
+def test_paginated_atoms_keep_next_after(seeded, mock_db):
+    mock_db.execute("INSERT INTO atoms (id) VALUES ('b.txt')")
+    mock_db.commit()
+    response = seeded.get("/api/atoms?limit=1")
+    assert response.headers["X-Next-After"] == "a.txt"
+    assert "ETag" in response.headers
+
+def test_missing_atom_is_still_404(seeded):
+    etag = seeded.get("/api/atoms/a.txt").headers["ETag"]
+    assert revalidate(seeded, "/api/atoms/nope", etag).status_code == 404
+
+def test_database_without_change_log(client, mock_db):
+    mock_db.execute("DROP TABLE changes")
+    response = client.get("/api/threads")
+    assert response.status_code == 200
+    assert "ETag" not in response.headers
+
+def test_portal_changes_are_logged(mock_db):
+    mock_db.execute("INSERT INTO portals (atom_id, path) VALUES ('a.txt', 'docs/a.md')")
+    [change] = changelog.changes_since(mock_db, 0, 10, changelog.ATOM_ID_QUERY)
+    assert (change["table"], change["id"], change["deleted"]) == ("portals", "1", False)
+    assert change["row"]["path"] == "docs/a.md"
+
+def test_logs_etag_follows_the_file(client, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(".spatia/logs")
+    log_path = ".spatia/logs/a.txt.log"
+    with open(log_path, "w") as f:
+        f.write("building\n")
+
+    first = client.get("/api/atoms/a.txt/logs")
+    assert first.json()["logs"] == "building\n"
+    etag = first.headers["ETag"]
+    assert revalidate(client, "/api/atoms/a.txt/logs", etag).status_code == 304
+
+    with open(log_path, "a") as f:
+        f.write("done\n")
+    response = revalidate(client, "/api/atoms/a.txt/logs", etag)
+    assert response.status_code == 200
+    assert response.json()["logs"] == "building\ndone\n"
@@ -0,0 +1,102 @@
+import pytest
+import random
+import sqlite3
+from unittest.mock import patch
+from backend import blobs, migrations
+
+@pytest.fixture
+def cursor():
+    conn = sqlite3.connect(":memory:")
+    migrations.migrate(conn)
+    yield conn.cursor()
+    conn.close()
+
+def edit(text, rng):
+    lines = text.splitlines(keepends=True)
+    i = rng.randrange(len(lines))
+    lines[i] = f"line {i} edited {rng.random()}\n"
+    return ''.join(lines)
+
+def chain_length(cursor, blob_hash):
+    hops = 0
+    while True:
+        base = cursor.execute("SELECT base FROM blobs WHERE hash = ?", (blob_hash,)).fetchone()[0]
+        if base is None:
+            return hops
+        hops += 1
+        blob_hash = base
+
+def test_delta_roundtrip():
+    rng = random.Random(1)
+    base = ''.join(f"line {i}\n" for i in range(200))
+    target = edit(edit(base, rng), rng) + "tail without newline"
+    assert blobs.apply_delta(base, blobs.encode_delta(base, target)) == target
+    assert blobs.apply_delta("", blobs.encode_delta("", "x")) == "x"
+    assert blobs.apply_delta("x\n", blobs.encode_delta("x\n", "")) == ""
+
+def test_history_is_reverse_delta_encoded(cursor):
+    rng = random.Random(2)
+    versions = [''.join(f"line {i}\n" for i in range(300))]
+    for _ in range(10):
+        versions.append(edit(versions[-1], rng))
+
+    fossil_hashes = [blobs.fossilize(cursor, old, new) for old, new in zip(versions, versions[1:])]
+
+    for version, fossil_hash in zip(versions, fossil_hashes):
+        assert blobs.get_blob(cursor, fossil_hash) == version
+    # The newest version is a keyframe, older ones are deltas against their successor
+    head = blobs.calculate_hash(versions[-1])
+    assert cursor.execute("SELECT base FROM blobs WHERE hash = ?", (head,)).fetchone()[0] is None
+    assert cursor.execute("SELECT base FROM blobs WHERE hash = ?", (fossil_hashes[-1],)).fetchone()[0] == head
+
+def test_keyframes_bound_chain_length(cursor):
+    rng = random.Random(3)
+    versions = [''.join(f"line {i}\n" for i in range(100))]
+    for _ in range(40):
+        versions.append(edit(versions[-1], rng))
+
+    with patch.object(blobs, 'FOSSIL_KEYFRAME_INTERVAL', 4):
+        fossil_hashes = [blobs.fossilize(cursor, old, new) for old, new in zip(versions, versions[1:])]
+
+    assert max(chain_length(cursor, h) for h in fossil_hashes) <= 4
+    for version, fossil_hash in zip(versions, fossil_hashes):
+        assert blobs.get_blob(cursor, fossil_hash) == version
+
+def test_flip_flop_history_has_no_cycles(cursor):
+    a = ''.join(f"a {i}\n" for i in range(50))
+    b = a + "extra\n"
+    for old, new in [(a, b), (b, a), (a, b), (b, a)]:
+        blobs.fossilize(cursor, old, new)
+    for text in (a, b):
+        assert blobs.get_blob(cursor, blobs.calculate_hash(text)) == text
+    # The current head must always be a keyframe
+    assert cursor.execute("SELECT base FROM blobs WHERE hash = ?", (blobs.calculate_hash(a),)).fetchone()[0] is None
+
+def test_migrate_upgrades_plain_blob_table():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE blobs (hash TEXT PRIMARY KEY, content TEXT)")
+    conn.execute("INSERT INTO blobs (hash, content) VALUES ('h', 'legacy')")
+    migrations.migrate(conn)
+    cursor = conn.cursor()
+    assert blobs.get_blob(cursor, 'h') == 'legacy'
+    # Legacy plain blobs can still be re-encoded as deltas
+    blobs.fossilize(cursor, 'legacy', 'legacy\nmore')
+    assert blobs.get_blob(cursor, blobs.calculate_hash('legacy')) == 'legacy'
+
+def test_revive_rebuilds_delta_fossil(client, mock_db):
+    cursor = mock_db.cursor()
+    v1 = ''.join(f"line {i}\n" for i in range(100))
+    v2 = v1.replace("line 50\n", "line fifty\n")
+    fossil_hash = blobs.fossilize(cursor, v1, v2)
+    cursor.execute("INSERT INTO atoms (id, type, content, hash, status) VALUES ('doc.txt', 'file', ?, ?, 1)", (v2, blobs.calculate_hash(v2)))
+    cursor.execute("INSERT INTO fossils (atom_id, ts, hash, type) VALUES ('doc.txt', 't1', ?, 'file')", (fossil_hash,))
+    mock_db.commit()
+    assert cursor.execute("SELECT base FROM blobs WHERE hash = ?", (fossil_hash,)).fetchone()[0] is not None
+
+    with patch('backend.main.run_subprocess_async'):
+        response = client.post("/api/revive", json={"fossil_id": "doc.txt@t1"})
+    assert response.status_code == 200
+
+    assert cursor.execute("SELECT content FROM atoms WHERE id = 'doc.txt'").fetchone()[0] == v1
+    atoms = {a['id']: a for a in client.get("/api/atoms", params={"include_fossils": True, "fields": "content"}).json()}
+    assert atoms['doc.txt@t1']['content'] == v1
@@ -1,5 +1,6 @@
 import pytest
 from unittest.mock import patch, AsyncMock
+from backend import blobs
 
 def test_revive_flow(client, mock_db):
     cursor = mock_db.cursor()
@@ -10,12 +11,13 @@ def test_revive_flow(client, mock_db):
         INSERT INTO atoms (id, type, content, hash, status, last_witnessed)
         VALUES ('test.txt', 'file', 'Version 2', 'hash_v2', 1, '2026-01-01T12:00:00')
     """)
-    # Fossil
+    # Fossil (content in the blob store)
     fossil_id = "test.txt@2026-01-01T10:00:00"
+    fossil_hash = blobs.put_blob(cursor, 'Version 1')
     cursor.execute("""
-        INSERT INTO atoms (id, type, content, hash, status, last_witnessed)
-        VALUES (?, 'file', 'Version 1', 'hash_v1', 4, '2026-01-01T10:00:00')
-    """, (fossil_id,))
+        INSERT INTO fossils (atom_id, ts, hash, type, last_witnessed)
+        VALUES ('test.txt', '2026-01-01T10:00:00', ?, 'file', '2026-01-01T10:00:00')
+    """, (fossil_hash,))
     
     # Geometry for Active (should be copied to new fossil)
     cursor.execute("INSERT INTO geometry (atom_id, x, y) VALUES ('test.txt', 10, 20)")
@@ -41,18 +43,70 @@ def test_revive_flow(client, mock_db):
     assert current['content'] == 'Version 1'
     # Status should be 1 (Claim)
     assert current['status'] == 1
-    assert current['hash'] == 'hash_v1'
+    assert current['hash'] == fossil_hash
 
-    # 4. Verify Old Active (Version 2) is now a Fossil
-    # ID should be test.txt@{timestamp}
-    cursor.execute("SELECT id, content, status FROM atoms WHERE id LIKE 'test.txt@%' AND content = 'Version 2'")
+    # 4. Verify Old Active (Version 2) is now a Fossil; its content lives in the blob store
+    cursor.execute("SELECT ts, hash, x, y FROM fossils WHERE atom_id = 'test.txt' AND ts != '2026-01-01T10:00:00'")
     new_fossil = cursor.fetchone()
     assert new_fossil is not None
-    assert new_fossil['status'] == 4
+    assert blobs.get_blob(cursor, new_fossil['hash']) == 'Version 2'
     
     # 5. Verify Geometry Copied to New Fossil
-    cursor.execute("SELECT x, y FROM geometry WHERE atom_id = ?", (new_fossil['id'],))
-    geo = cursor.fetchone()
-    assert geo is not None
-    assert geo['x'] == 10
-    assert geo['y'] == 20
+    assert new_fossil['x'] == 10
+    assert new_fossil['y'] == 20
+
+def insert_fossils(cursor, atom_id, count):
+    for i in range(count):
+        cursor.execute(
+            "INSERT INTO fossils (atom_id, ts, hash, type, x, y) VALUES (?, ?, ?, 'file', ?, 0)",
+            (atom_id, f"2026-01-01T10:00:{i:02d}", blobs.put_blob(cursor, f"v{i}"), i)
+        )
+
+def test_revive_atom_id_containing_at_sign(client, mock_db):
+    atom_id = "src/@types/x.ts"
+    cursor = mock_db.cursor()
+    cursor.execute("INSERT INTO atoms (id, type, content, hash, status) VALUES (?, 'file', 'current', 'h', 1)", (atom_id,))
+    cursor.execute("INSERT INTO fossils (atom_id, ts, hash, type) VALUES (?, '2026-01-01T10:00:00', ?, 'file')",
+                   (atom_id, blobs.put_blob(cursor, 'old')))
+    mock_db.commit()
+
+    [fossil] = client.get(f"/api/atoms/{atom_id}/fossils").json()["fossils"]
+    with patch('backend.main.run_subprocess_async', new_callable=AsyncMock):
+        response = client.post("/api/revive", json={"fossil_id": fossil["id"]})
+    assert response.status_code == 200
+    assert response.json()["atom_id"] == atom_id
+    assert cursor.execute("SELECT content FROM atoms WHERE id = ?", (atom_id,)).fetchone()[0] == "old"
+
+def test_atoms_exclude_fossils_by_default(client, mock_db):
+    cursor = mock_db.cursor()
+    cursor.execute("INSERT INTO atoms (id, type, content, status) VALUES ('a.txt', 'file', 'live', 1)")
+    insert_fossils(cursor, 'a.txt', 2)
+    mock_db.commit()
+
+    assert [a['id'] for a in client.get("/api/atoms").json()] == ['a.txt']
+
+    atoms = {a['id']: a for a in client.get("/api/atoms", params={"include_fossils": True, "fields": "status,content,x,y"}).json()}
+    fossil = atoms['a.txt@2026-01-01T10:00:01']
+    assert fossil['status'] == 4
+    assert fossil['content'] == 'v1'
+    assert (fossil['x'], fossil['y']) == (1, 0)
+    assert len(atoms) == 3
+
+def test_fossil_history_keyset_pagination(client, mock_db):
+    cursor = mock_db.cursor()
+    insert_fossils(cursor, 'src/a.txt', 5)
+    insert_fossils(cursor, 'other.txt', 3)
+    mock_db.commit()
+
+    page = client.get("/api/atoms/src/a.txt/fossils", params={"limit": 2}).json()
+    assert [f['content'] for f in page['fossils']] == ['v4', 'v3']
+    assert page['fossils'][0]['id'] == 'src/a.txt@2026-01-01T10:00:04'
+
+    seen = [f['content'] for f in page['fossils']]
+    while page['next']:
+        page = client.get("/api/atoms/src/a.txt/fossils", params={"limit": 2, "before": page['next']}).json()
+        seen.extend(f['content'] for f in page['fossils'])
+    assert seen == ['v4', 'v3', 'v2', 'v1', 'v0']
+
+    assert client.get("/api/atoms/missing.txt/fossils").json() == {"fossils": [], "next": None}
+    assert client.get("/api/atoms/src/a.txt/fossils", params={"limit": 0}).status_code == 422
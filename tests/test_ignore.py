@@ -0,0 +1,117 @@
+import pytest
+import os
+import sqlite3
+from backend import ignore, shatter
+
+def write(root, rel_path, text="x"):
+    path = root / rel_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+
+@pytest.mark.parametrize("pattern, path, is_dir, expected", [
+    ("*.log", "a.log", False, True),
+    ("*.log", "deep/dir/a.log", False, True),
+    ("*.log", "a.log.txt", False, False),
+    ("/root.txt", "root.txt", False, True),
+    ("/root.txt", "sub/root.txt", False, False),
+    ("docs/*.md", "docs/a.md", False, True),
+    ("docs/*.md", "docs/sub/a.md", False, False),
+    ("docs/**/*.md", "docs/sub/deep/a.md", False, True),
+    ("**/cache", "a/b/cache", True, True),
+    ("out/", "out", True, True),
+    ("out/", "out", False, False),
+    ("*.py[cod]", "x.pyc", False, True),
+    ("file?.txt", "file1.txt", False, True),
+    ("file?.txt", "file10.txt", False, False),
+    ("\\#hash", "#hash", False, True),
+])
+def test_pattern_semantics(pattern, path, is_dir, expected):
+    assert bool(ignore.RuleSet([pattern]).match(path, is_dir)) is expected
+
+def test_last_match_wins_across_runs():
+    rules = ignore.RuleSet(["*.txt", "!keep*.txt", "keep_not.txt"])
+    assert rules.match("a.txt", False) is True
+    assert rules.match("keep1.txt", False) is False
+    assert rules.match("keep_not.txt", False) is True
+    assert rules.match("a.md", False) is None
+    # Consecutive same-sign patterns compile to one regex
+    assert len(ignore.RuleSet(["a", "b", "c", "!d"]).runs) == 2
+
+def test_walk_prunes_ignored_directories(tmp_path, monkeypatch):
+    (tmp_path / ".gitignore").write_text("build/\n*.log\n")
+    (tmp_path / ".ctxignore").write_text("vendor/\n!important.log\n")
+    write(tmp_path, "src/main.py")
+    write(tmp_path, "src/debug.log")
+    write(tmp_path, "important.log")
+    write(tmp_path, "build/out/a.o")
+    write(tmp_path, "vendor/lib/x.py")
+    write(tmp_path, ".spatia/sentinel.db")
+
+    entered = []
+    real_walk = os.walk
+    def tracking_walk(top, *args, **kwargs):
+        for dirpath, dirs, files in real_walk(top, *args, **kwargs):
+            entered.append(os.path.relpath(dirpath, tmp_path))
+            yield dirpath, dirs, files
+    monkeypatch.setattr(ignore.os, 'walk', tracking_walk)
+
+    matcher = ignore.IgnoreMatcher(tmp_path)
+    found = sorted(
+        os.path.relpath(os.path.join(d, f), tmp_path)
+        for d, _, files in matcher.walk() for f in files
+    )
+    assert found == [".ctxignore", ".gitignore", "important.log", "src/main.py"]
+    assert not [d for d in entered if d.startswith(("build", "vendor", ".spatia"))]
+
+def test_nested_gitignore_is_scoped(tmp_path):
+    write(tmp_path, "frontend/.gitignore", "dist\n!keep.js\n")
+    matcher = ignore.IgnoreMatcher(tmp_path)
+    assert matcher.is_ignored("frontend/dist/app.js")
+    assert not matcher.is_ignored("dist/app.js")
+    assert not matcher.is_ignored("frontend/src/app.js")
+
+def test_defaults_cannot_be_reincluded(tmp_path):
+    (tmp_path / ".ctxignore").write_text("!.spatia\n!sentinel.db\n")
+    matcher = ignore.IgnoreMatcher(tmp_path)
+    assert matcher.is_ignored(".spatia/bin/tool.py")
+    assert matcher.is_ignored("sentinel.db")
+    assert matcher.is_ignored("../outside.py")
+
+def test_load_recompiles_when_rules_change(tmp_path):
+    first = ignore.load(tmp_path)
+    assert ignore.load(tmp_path) is first
+    (tmp_path / ".gitignore").write_text("*.tmp\n")
+    second = ignore.load(tmp_path)
+    assert second is not first
+    assert second.is_ignored("a.tmp")
+
+def test_load_notices_nested_and_exclude_rules(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write(tmp_path, "sub/x.log")
+    write(tmp_path, "notes.bak")
+    (tmp_path / ".git" / "info").mkdir(parents=True)
+    first = ignore.load(tmp_path)
+    assert not first.is_ignored("sub/x.log") and not first.is_ignored("notes.bak")
+
+    # A rule file created below the root, after the matcher looked for it
+    (tmp_path / "sub" / ".gitignore").write_text("*.log\n")
+    second = ignore.load(tmp_path)
+    assert second is not first and second.is_ignored("sub/x.log")
+    (tmp_path / ".git" / "info" / "exclude").write_text("*.bak\n")
+    assert ignore.load(tmp_path).is_ignored("notes.bak")
+
+    conn = sqlite3.connect(":memory:")
+    assert shatter.shatter_paths(conn, ["sub/x.log", "notes.bak"])["atom_ids"] == []
+    conn.close()
+
+def test_shatter_honours_gitignore(project, tmp_path):
+    (tmp_path / ".gitignore").write_text("dist/\n")
+    write(tmp_path, "app.py")
+    write(tmp_path, "dist/bundle.js")
+
+    shatter.shatter(project)
+    ids = {row[0] for row in project.execute("SELECT id FROM atoms")}
+    assert ids == {".gitignore", "app.py"}
+
+    result = shatter.shatter_paths(project, ["dist/bundle.js"])
+    assert result["atom_ids"] == []
@@ -0,0 +1,153 @@
+import pytest
+import os
+import sqlite3
+import subprocess
+import sys
+from backend import blobs, migrations
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    yield conn
+    conn.close()
+
+def tables(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+def indexes(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'")}
+
+def test_migrate_fresh_database(conn):
+    assert migrations.migrate(conn) == migrations.LATEST_VERSION
+    assert {"atoms", "geometry", "threads", "portals", "envelopes", "blobs",
+            "shatter_manifest", "shatter_state", "fossils", "changes", "schema_version"} <= tables(conn)
+    assert indexes(conn) == {"idx_threads_source_target", "idx_portals_atom_id", "idx_atoms_status", "idx_atoms_domain"}
+    versions = [row[0] for row in conn.execute("SELECT version FROM schema_version ORDER BY version")]
+    assert versions == list(range(1, migrations.LATEST_VERSION + 1))
+
+def test_migrate_is_idempotent(conn):
+    migrations.migrate(conn)
+    statements = []
+    conn.set_trace_callback(statements.append)
+    assert migrations.migrate(conn) == migrations.LATEST_VERSION
+    conn.set_trace_callback(None)
+    # Up-to-date databases cost a single version lookup
+    assert len(statements) == 1
+
+def test_migrate_upgrades_legacy_database(conn):
+    # As created by older code: no schema_version, partial columns, duplicate threads
+    conn.execute("CREATE TABLE atoms (id TEXT PRIMARY KEY, content TEXT)")
+    conn.execute("CREATE TABLE threads (id TEXT PRIMARY KEY, source TEXT, target TEXT)")
+    conn.execute("CREATE TABLE blobs (hash TEXT PRIMARY KEY, content TEXT)")
+    conn.executemany("INSERT INTO threads VALUES (?, ?, ?)", [("t1", "a", "b"), ("t2", "a", "b"), ("t3", "b", "a")])
+    conn.execute("INSERT INTO atoms VALUES ('x', 'keep me')")
+    conn.commit()
+
+    migrations.migrate(conn)
+    conn.commit()
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(atoms)")}
+    assert {"status", "domain", "hash", "last_witnessed"} <= columns
+    assert conn.execute("SELECT content FROM atoms WHERE id = 'x'").fetchone()[0] == "keep me"
+    assert conn.execute("SELECT id FROM threads ORDER BY id").fetchall() == [("t1",), ("t3",)]
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO threads VALUES ('t4', 'a', 'b')")
+
+def test_migrate_moves_legacy_fossils(conn):
+    # Before the fossils table: history rows lived in atoms (status 4, "<id>@<ts>"),
+    # with inline content (oldest) or a blob reference
+    conn.execute("CREATE TABLE atoms (id TEXT PRIMARY KEY, type TEXT, domain TEXT, content TEXT, status INTEGER, hash TEXT, last_witnessed TEXT)")
+    conn.execute("CREATE TABLE geometry (atom_id TEXT PRIMARY KEY, x INTEGER, y INTEGER)")
+    conn.execute("CREATE TABLE blobs (hash TEXT PRIMARY KEY, content TEXT)")
+    conn.execute("INSERT INTO blobs VALUES ('h_blob', 'from blob')")
+    conn.executemany("INSERT INTO atoms VALUES (?, 'file', 'Software', ?, ?, ?, ?)", [
+        ("a.txt", "live", 1, "h_live", "t3"),
+        ("a.txt@t1", "inline", 4, "bogus", "t1"),
+        ("a.txt@t2", None, 4, "h_blob", "t2"),
+        ("b.txt@t1", "inline", 4, "bogus", "t1"),
+        # IDs may contain '@' themselves; timestamps never do
+        ("src/@types/x.ts@t1", "inline", 4, "bogus", "t1"),
+        ("no-timestamp", "inline", 4, "bogus", "t0"),
+    ])
+    conn.executemany("INSERT INTO geometry VALUES (?, ?, ?)", [("a.txt", 1, 1), ("a.txt@t1", 10, 20)])
+
+    migrations.migrate(conn)
+    assert conn.execute("SELECT id FROM atoms").fetchall() == [("a.txt",)]
+    assert conn.execute("SELECT atom_id FROM geometry").fetchall() == [("a.txt",)]
+    fossils = conn.execute("SELECT atom_id, ts, hash, domain, x, y FROM fossils ORDER BY atom_id, ts").fetchall()
+    inline_hash = blobs.calculate_hash("inline")
+    assert fossils == [
+        ("a.txt", "t1", inline_hash, "Software", 10, 20),
+        ("a.txt", "t2", "h_blob", "Software", None, None),
+        ("b.txt", "t1", inline_hash, "Software", None, None),
+        ("no-timestamp", "t0", inline_hash, "Software", None, None),
+        ("src/@types/x.ts", "t1", inline_hash, "Software", None, None),
+    ]
+    # Shared inline content is stored once
+    assert blobs.get_blob(conn.cursor(), inline_hash) == "inline"
+    assert conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 2
+
+def test_migrate_resumes_from_recorded_version(conn):
+    migrations.migrate(conn)
+    version = migrations.MIGRATIONS.index(migrations.create_lookup_indexes) + 1
+    conn.execute("DROP INDEX idx_portals_atom_id")
+    conn.execute("DELETE FROM schema_version WHERE version >= ?", (version,))
+    assert migrations.current_version(conn) == version - 1
+    migrations.migrate(conn)
+    assert "idx_portals_atom_id" in indexes(conn)
+
+def test_portal_triggers_added_to_existing_change_log(conn):
+    migrations.migrate(conn)
+    conn.execute("DROP TRIGGER changes_portals_insert")
+    conn.execute("DELETE FROM schema_version WHERE version >= ?", (migrations.MIGRATIONS.index(migrations.log_portal_changes) + 1,))
+    migrations.migrate(conn)
+    conn.execute("INSERT INTO portals (atom_id, path) VALUES ('a', 'b')")
+    assert conn.execute("SELECT tbl, row_id FROM changes").fetchall() == [("portals", "1")]
+
+def test_failed_migration_rolls_back(conn, monkeypatch):
+    def broken(conn):
+        conn.execute("CREATE TABLE half_done (x)")
+        raise sqlite3.OperationalError("boom")
+
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS + [broken])
+    monkeypatch.setattr(migrations, "LATEST_VERSION", len(migrations.MIGRATIONS))
+    with pytest.raises(sqlite3.OperationalError):
+        migrations.migrate(conn)
+    assert "half_done" not in tables(conn)
+    assert migrations.current_version(conn) == migrations.LATEST_VERSION - 1
+
+def test_migrate_inside_open_transaction(conn):
+    migrations.migrate(conn)
+    conn.execute("INSERT INTO atoms (id) VALUES ('pending')")
+    conn.execute("DELETE FROM schema_version WHERE version = ?", (migrations.LATEST_VERSION,))
+    migrations.migrate(conn)
+    conn.rollback()
+    assert conn.execute("SELECT COUNT(*) FROM atoms").fetchone()[0] == 0
+
+def test_cli(tmp_path):
+    db_path = tmp_path / "sentinel.db"
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    result = subprocess.run([sys.executable, "-m", "backend.migrations", str(db_path)], cwd=root, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert f"Schema version 0 -> {migrations.LATEST_VERSION}" in result.stdout
+    conn = sqlite3.connect(db_path)
+    assert migrations.current_version(conn) == migrations.LATEST_VERSION
+    conn.close()
+
+# --- Query plans ---
+
+QUERIES = [
+    ("SELECT target FROM threads WHERE source = ?", ("a",), "idx_threads_source_target"),
+    ("SELECT id FROM threads WHERE source = ? AND target = ?", ("a", "b"), "idx_threads_source_target"),
+    ("SELECT * FROM portals WHERE atom_id = ?", ("a",), "idx_portals_atom_id"),
+    ("SELECT id FROM atoms WHERE status = ?", (1,), "idx_atoms_status"),
+    ("SELECT id FROM atoms WHERE domain = ?", ("Software",), "idx_atoms_domain"),
+    ("SELECT ts FROM fossils WHERE atom_id = ? AND ts < ? ORDER BY ts DESC LIMIT 50", ("a", "t"), "sqlite_autoindex_fossils_1"),
+]
+
+@pytest.mark.parametrize("sql, params, index", QUERIES)
+def test_lookups_use_indexes(conn, sql, params, index):
+    migrations.migrate(conn)
+    plan = [row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+    print(f"\n{sql}\n  " + "\n  ".join(plan))
+    assert any(index in step for step in plan), plan
+    assert not any(step.startswith("SCAN") for step in plan), plan
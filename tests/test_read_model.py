@@ -0,0 +1,157 @@
+import random
+import sqlite3
+import pytest
+from unittest.mock import patch
+from backend import migrations, readmodel
+from backend.main import graph
+
+ATOM_FIELDS = list(readmodel.AtomRecord.__slots__)
+
+def db_state(conn):
+    atoms = [dict(row) for row in conn.execute(readmodel.ATOM_QUERY + " ORDER BY a.id")]
+    threads = sorted(tuple(row) for row in conn.execute("SELECT source, target FROM threads"))
+    envelopes = sorted(tuple(row) for row in conn.execute(readmodel.ENVELOPE_QUERY))
+    return atoms, threads, envelopes
+
+def model_state(model):
+    atoms, _ = model.list_atoms(ATOM_FIELDS)
+    threads = sorted((t["source"], t["target"]) for t in model.list_threads())
+    envelopes = sorted(tuple(e.values()) for e in model.list_envelopes())
+    return atoms, threads, envelopes
+
+def assert_consistent(model, conn):
+    assert model.sync(conn)
+    assert model_state(model) == db_state(conn)
+
+def random_write(rng, conn):
+    atom_id = f"src/file_{rng.randrange(40)}.py"
+    op = rng.randrange(9)
+    if op == 0:
+        # An upsert, not INSERT OR REPLACE: that would bypass the search index triggers
+        conn.execute("""
+            INSERT INTO atoms (id, type, domain, status, hash) VALUES (?, 'file', ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET type = excluded.type, domain = excluded.domain, status = excluded.status, hash = excluded.hash
+        """, (atom_id, rng.choice(["Software", "Docs"]), rng.randrange(4), f"h{rng.random()}"))
+    elif op == 1:
+        conn.execute("UPDATE atoms SET status = ?, last_witnessed = ? WHERE id = ?", (rng.randrange(4), str(rng.random()), atom_id))
+    elif op == 2:
+        conn.execute("DELETE FROM atoms WHERE id = ?", (atom_id,))
+    elif op == 3:
+        conn.execute("INSERT INTO geometry (atom_id, x, y) VALUES (?, ?, ?) ON CONFLICT(atom_id) DO UPDATE SET x = excluded.x, y = excluded.y",
+                     (atom_id, rng.randrange(1000), rng.randrange(1000)))
+    elif op == 4:
+        conn.execute("DELETE FROM geometry WHERE atom_id = ?", (atom_id,))
+    elif op == 5:
+        conn.execute("INSERT OR IGNORE INTO threads (id, source, target) VALUES (?, ?, ?)",
+                     (f"t{rng.random()}", atom_id, f"src/file_{rng.randrange(40)}.py"))
+    elif op == 6:
+        conn.execute("DELETE FROM threads WHERE source = ?", (atom_id,))
+    elif op == 7:
+        conn.execute("INSERT OR REPLACE INTO envelopes (id, domain, x, y, w, h) VALUES (?, 'Software', ?, 0, 100, 100)",
+                     (f"env{rng.randrange(5)}", rng.randrange(1000)))
+    else:
+        conn.execute("DELETE FROM envelopes WHERE id = ?", (f"env{rng.randrange(5)}",))
+
+@pytest.mark.parametrize("seed", range(5))
+def test_incremental_updates_match_the_db(mock_db, seed):
+    rng = random.Random(seed)
+    model = readmodel.ReadModel(batch=7)
+    for _ in range(5):
+        random_write(rng, mock_db)
+    assert_consistent(model, mock_db)
+    for _ in range(30):
+        for _ in range(rng.randrange(1, 20)):
+            random_write(rng, mock_db)
+        assert_consistent(model, mock_db)
+
+def test_unchanged_sync_is_one_lookup(mock_db):
+    model = readmodel.ReadModel()
+    model.sync(mock_db)
+    statements = []
+    mock_db.set_trace_callback(statements.append)
+    model.sync(mock_db)
+    mock_db.set_trace_callback(None)
+    assert statements == ["SELECT COALESCE(MAX(seq), 0) FROM changes"]
+
+def test_another_database_is_reloaded(mock_db):
+    model = readmodel.ReadModel()
+    for i in range(3):
+        mock_db.execute("INSERT INTO atoms (id) VALUES (?)", (f"a{i}",))
+    assert_consistent(model, mock_db)
+
+    other = sqlite3.connect(":memory:")
+    other.row_factory = sqlite3.Row
+    migrations.migrate(other)
+    other.execute("INSERT INTO atoms (id) VALUES ('b')")
+    # Lower seq than the model's: not a continuation of what it holds
+    assert_consistent(model, other)
+    assert [a["id"] for a in model.list_atoms(["id"])[0]] == ["b"]
+
+def test_database_without_change_log():
+    conn = sqlite3.connect(":memory:")
+    assert readmodel.ReadModel().sync(conn) is False
+
+def test_table_compacts_holes():
+    table = readmodel.Table(readmodel.ThreadRecord)
+    for i in range(10):
+        table.upsert((f"t{i}", "a", "b"))
+    for i in range(6):
+        table.delete(f"t{i}")
+    assert table.holes == 0
+    assert len(table.records) == len(table) == 4
+    assert [record.id for record in table] == ["t6", "t7", "t8", "t9"]
+    assert table.get("t8").id == "t8"
+    assert table.get("t0") is None
+    assert table.delete("t0") is False
+
+LISTINGS = [
+    {},
+    {"fields": "type,status,last_witnessed"},
+    {"status": 1},
+    {"domain": "Docs"},
+    {"bbox": "0,0,500,500"},
+    {"limit": 3},
+    {"limit": 3, "after": "src/file_12.py"},
+    {"limit": 2, "domain": "Software", "status": 1},
+]
+
+@pytest.mark.parametrize("params", LISTINGS)
+def test_listing_matches_sql_path(client, mock_db, params):
+    rng = random.Random(1)
+    for _ in range(200):
+        random_write(rng, mock_db)
+    mock_db.commit()
+
+    from_memory = client.get("/api/atoms", params=params)
+    with patch.object(graph, "covers", return_value=False):
+        from_db = client.get("/api/atoms", params=params)
+    assert from_memory.json() == from_db.json()
+    assert from_memory.headers.get("X-Next-After") == from_db.headers.get("X-Next-After")
+
+def test_endpoints_serve_from_memory(client, mock_db):
+    mock_db.execute("INSERT INTO atoms (id, domain, status) VALUES ('a.txt', 'Software', 1)")
+    mock_db.execute("INSERT INTO threads (id, source, target) VALUES ('t1', 'a.txt', 'b.txt')")
+    mock_db.execute("INSERT INTO envelopes (id, domain, x, y, w, h) VALUES ('env', 'Software', 0, 0, 10, 10)")
+    mock_db.commit()
+    client.get("/api/atoms")
+
+    statements = []
+    mock_db.set_trace_callback(statements.append)
+    atoms = client.get("/api/atoms?fields=status").json()
+    threads = client.get("/api/threads").json()
+    envelopes = client.get("/api/envelopes").json()
+    mock_db.set_trace_callback(None)
+
+    assert atoms == [{"id": "a.txt", "status": 1}]
+    assert threads == [{"id": "t1", "source": "a.txt", "target": "b.txt"}]
+    assert envelopes == [{"id": "env", "domain": "Software", "x": 0, "y": 0, "w": 10, "h": 10}]
+    # Seq lookups only (ETag, then freshness check), no table reads
+    assert set(statements) == {"SELECT COALESCE(MAX(seq), 0) FROM changes"}
+
+def test_api_writes_are_visible_immediately(client, mock_db):
+    client.get("/api/threads")
+    client.post("/api/threads", json={"source": "a", "target": "b"})
+    assert [(t["source"], t["target"]) for t in client.get("/api/threads").json()] == [("a", "b")]
+    client.post("/api/geometry", json=[{"atom_id": "a", "x": 5, "y": 6}])
+    mock_db.execute("INSERT INTO atoms (id) VALUES ('a')")
+    assert client.get("/api/atoms?fields=x,y").json() == [{"id": "a", "x": 5, "y": 6}]
@@ -71,12 +71,11 @@ def test_register_symmetry_failure(temp_db):
     assert "Collision Detected" in result.stdout
 
 def test_ignore_fossil_status(temp_db):
-    # Collision but one is a fossil (Status 4) -> Should Pass (as per script logic update)
-    # Wait, did we exclude status 4?
-    # Script: SELECT ... WHERE domain = 'Register' AND status != 4
+    # Collision but one is a fossil (Status 4) -> Should Pass
+    # Legacy fossils are moved out of the atoms table by the script's schema migration
     
     insert_atom(temp_db, "active.h", "#define REG_X 0x1000", status=1)
-    insert_atom(temp_db, "old.h", "#define REG_X 0x1000", status=4) # Fossil
+    insert_atom(temp_db, "old.h@2026-01-01T00:00:00", "#define REG_X 0x1000", status=4) # Fossil
     
     result = run_check_script(temp_db)
     assert result.returncode == 0
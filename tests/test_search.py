@@ -0,0 +1,172 @@
+import importlib.machinery
+import importlib.util
+import os
+import sqlite3
+import pytest
+from unittest.mock import patch, AsyncMock
+from fastapi.testclient import TestClient
+from backend import migrations, search, shatter
+from backend.main import app
+
+@pytest.fixture
+def quiet():
+    with patch('backend.main.manager.broadcast', new_callable=AsyncMock):
+        yield
+
+@pytest.fixture
+def atoms(mock_db):
+    mock_db.executemany("INSERT INTO atoms (id, domain, status, content) VALUES (?, ?, ?, ?)", [
+        ("src/parser.py", "Software", 1, "def parse_tokens(stream):\n    return tokenizer.split(stream)\n"),
+        ("src/lexer.py", "Software", 3, "class Lexer:\n    # Feeds the parser one token at a time\n    pass\n"),
+        ("docs/parser.md", "Docs", 1, "How the parser works, in prose."),
+        ("regs/uart.h", "Hardware", 0, "#define UART_BASE 0x4000"),
+    ])
+    mock_db.commit()
+    return mock_db
+
+def ids(response):
+    assert response.status_code == 200, response.text
+    return [r["id"] for r in response.json()["results"]]
+
+@pytest.mark.parametrize("q, expected", [
+    ("Parser", "\"Parser\"*"),
+    ("main.py ", "\"main.py\""),
+    ('say "hi"', "\"say\" \"\"\"hi\"\"\"*"),
+    ("  a  -- b", "\"a\" \"b\"*"),
+])
+def test_parse_query(q, expected):
+    assert search.parse_query(q)[0] == expected
+
+def test_empty_queries_are_rejected():
+    for q in ("", "   ", "--"):
+        with pytest.raises(search.QueryError):
+            search.parse_query(q)
+
+def test_ranking_prefers_id_matches(client, atoms):
+    found = ids(client.get("/api/search", params={"q": "parser"}))
+    assert set(found) == {"src/parser.py", "src/lexer.py", "docs/parser.md"}
+    # Both files named parser outrank a mere mention in lexer.py's content
+    assert found[-1] == "src/lexer.py"
+
+def test_result_shape_and_snippet(client, atoms):
+    [result] = client.get("/api/search", params={"q": "tokenizer"}).json()["results"]
+    assert result["id"] == "src/parser.py"
+    assert (result["domain"], result["status"]) == ("Software", 1)
+    assert "<mark>tokenizer</mark>" in result["snippet"]
+    assert result["score"] > 0
+
+def test_prefix_matching_of_last_term(client, atoms):
+    assert ids(client.get("/api/search", params={"q": "UART_BA"})) == ["regs/uart.h"]
+    # A trailing space ends the word
+    assert ids(client.get("/api/search", params={"q": "UART_BA "})) == []
+
+def test_filters(client, atoms):
+    assert set(ids(client.get("/api/search", params={"q": "parser", "domain": "Software"}))) == {"src/parser.py", "src/lexer.py"}
+    assert ids(client.get("/api/search", params={"q": "parser", "status": 3})) == ["src/lexer.py"]
+
+def test_pagination(client, atoms):
+    everything = ids(client.get("/api/search", params={"q": "parser"}))
+    pages = ids(client.get("/api/search", params={"q": "parser", "limit": 2})) + ids(client.get("/api/search", params={"q": "parser", "limit": 2, "offset": 2}))
+    assert pages == everything
+
+def test_fts_syntax(client, atoms):
+    assert set(ids(client.get("/api/search", params={"q": "parser NOT prose", "syntax": "fts"}))) == {"src/parser.py", "src/lexer.py"}
+    response = client.get("/api/search", params={"q": "parser AND (", "syntax": "fts"})
+    assert response.status_code == 400
+    assert client.get("/api/search", params={"q": "x", "syntax": "regex"}).status_code == 422
+
+def test_index_follows_writes(client, atoms):
+    atoms.execute("UPDATE atoms SET content = 'rewritten entirely' WHERE id = 'src/parser.py'")
+    atoms.execute("DELETE FROM atoms WHERE id = 'docs/parser.md'")
+    atoms.commit()
+    assert ids(client.get("/api/search", params={"q": "tokenizer"})) == []
+    assert ids(client.get("/api/search", params={"q": "rewritten"})) == ["src/parser.py"]
+    # Still found by ID
+    assert "src/parser.py" in ids(client.get("/api/search", params={"q": "parser"}))
+    assert "docs/parser.md" not in ids(client.get("/api/search", params={"q": "parser"}))
+    # Raises if the index disagrees with the atoms table
+    atoms.execute("INSERT INTO atoms_fts (atoms_fts) VALUES ('integrity-check')")
+
+def test_fossil_history_search(client, mock_db, quiet):
+    client.post("/api/shatter", json={"path": "notes.txt", "content": "the original zebra paragraph\n"})
+    client.post("/api/shatter", json={"path": "notes.txt", "content": "nothing striped here\n"})
+    client.post("/api/shatter", json={"path": "notes.txt", "content": "final text\n"})
+
+    assert ids(client.get("/api/search", params={"q": "zebra"})) == []
+    data = client.get("/api/search", params={"q": "zebra", "fossils": True}).json()
+    [fossil] = data["fossils"]
+    assert fossil["atom_id"] == "notes.txt"
+    assert fossil["id"] == f"notes.txt@{fossil['ts']}"
+    assert fossil["snippet"] == "the original <mark>zebra</mark> paragraph\n"
+    # Delta-encoded history is indexed too
+    assert [f["atom_id"] for f in client.get("/api/search", params={"q": "striped", "fossils": True}).json()["fossils"]] == ["notes.txt"]
+    assert "fossils" not in client.get("/api/search", params={"q": "zebra"}).json()
+
+def test_index_fossils_catches_up_once(mock_db, quiet, client):
+    client.post("/api/shatter", json={"path": "a.txt", "content": "v1"})
+    client.post("/api/shatter", json={"path": "a.txt", "content": "v2"})
+    assert search.index_fossils(mock_db) == 1
+    assert search.index_fossils(mock_db) == 0
+
+def test_highlight():
+    text = "x " * 100 + "needle in a haystack " + "y " * 100
+    snippet = search.highlight(text, ["needle"])
+    assert "<mark>needle</mark>" in snippet
+    assert snippet.startswith(search.ELLIPSIS) and snippet.endswith(search.ELLIPSIS)
+    assert search.highlight("short", []) == "short"
+    assert search.highlight(None, ["a"]) == ""
+
+def load_script(name):
+    path = os.path.join(os.path.dirname(__file__), '../.spatia/bin', name)
+    module_name = name.replace('-', '_').replace('.py', '')
+    # Some scripts have no .py suffix: give the loader explicitly
+    spec = importlib.util.spec_from_loader(module_name, importlib.machinery.SourceFileLoader(module_name, path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def test_every_atom_writer_keeps_the_index_consistent(tmp_path, monkeypatch, quiet):
+    # atoms_fts has external content: a writer that bypasses its triggers
+    # (INSERT OR REPLACE) leaves stale entries that integrity-check reports
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(".spatia")
+    conn = sqlite3.connect(".spatia/sentinel.db", check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    migrations.migrate(conn)
+    conn.commit()
+    client = TestClient(app)
+
+    with patch('backend.main.get_db_connection', return_value=conn), \
+         patch('backend.main.run_subprocess_async', new_callable=AsyncMock), \
+         patch('backend.main.run_witness_process', new_callable=AsyncMock), \
+         patch('backend.main.projector.summon', return_value="summoned quokka"):
+        # API shatter, twice: an upsert and a fossil
+        client.post("/api/shatter", json={"path": "notes.txt", "content": "first wombat draft\n"})
+        client.post("/api/shatter", json={"path": "notes.txt", "content": "second draft\n"})
+        # Tree shatter in split mode, then a method removed: its part is retired
+        (tmp_path / "mod.py").write_text("class W:\n    def grow(self):\n        return 1\n\n    def shrink(self):\n        return 0\n")
+        shatter.shatter_paths(conn, ["mod.py"], split=True)
+        (tmp_path / "mod.py").write_text("class W:\n    def grow(self):\n        return 1\n")
+        shatter.shatter_paths(conn, ["mod.py"], split=True)
+        # Summon a hollow atom, then revive the first draft
+        client.post("/api/shatter", json={"path": "hollow.txt", "content": ""})
+        conn.execute("UPDATE atoms SET status = 0 WHERE id = 'hollow.txt'")
+        conn.commit()
+        assert client.post("/api/summon", json={"atom_id": "hollow.txt"}).status_code == 200
+        [ts] = [row[0] for row in conn.execute("SELECT ts FROM fossils WHERE atom_id = 'notes.txt'")]
+        assert client.post("/api/revive", json={"fossil_id": f"notes.txt@{ts}"}).status_code == 200
+
+    # CLI writers, the same atom twice
+    core = load_script('spatia-shatter').ShatterCore(".spatia/sentinel.db")
+    core.shatter_unit("void platypus();")
+    core.shatter_unit("void platypus();")
+    core.conn.close()
+    load_script('spatia-endorse.py').endorse(conn)
+
+    conn.execute("INSERT INTO atoms_fts (atoms_fts, rank) VALUES ('integrity-check', 1)")
+    found = lambda q: [r["id"] for r in search.search(conn, q)["results"]]
+    assert found("wombat ") == ["notes.txt"]
+    assert found("quokka ") == ["hollow.txt"]
+    assert found("shrink ") == []
+    assert len(found("platypus ")) == 1
+    conn.close()
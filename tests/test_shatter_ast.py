@@ -0,0 +1,168 @@
+import pytest
+import importlib.util
+import os
+from backend import blobs, parts, shatter
+
+SOURCE = '''import os
+
+CONSTANT = 1
+
+
+@decorator
+def first(a, b):
+    return a + b
+
+
+class Widget:
+    """Docstring."""
+
+    size = 3
+
+    def grow(self):
+        return self.size + 1
+
+    async def fetch(self):
+        return await thing()
+
+
+def last():
+    return "no trailing newline"'''
+
+def load_script(name):
+    path = os.path.join(os.path.dirname(__file__), '../.spatia/bin', name)
+    spec = importlib.util.spec_from_file_location(name.replace('-', '_').replace('.py', ''), path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture
+def project(project, tmp_path):
+    (tmp_path / "mod.py").write_text(SOURCE)
+    return project
+
+def live(conn):
+    return dict(conn.execute("SELECT id, content FROM atoms").fetchall())
+
+# --- backend/parts.py ---
+
+def test_split_and_compose_roundtrip():
+    skeleton, split = parts.split_python("mod.py", SOURCE)
+    ids = [pid for pid, _ in split]
+    assert ids == ["mod.py::first", "mod.py::Widget.grow", "mod.py::Widget.fetch", "mod.py::Widget", "mod.py::last"]
+    assert "# @spatia:part first" in skeleton
+    assert "CONSTANT = 1" in skeleton
+    widget = dict(split)["mod.py::Widget"]
+    assert "    # @spatia:part Widget.grow\n" in widget
+    assert dict(split)["mod.py::first"].startswith("@decorator\n")
+    assert parts.compose("mod.py", skeleton, dict(split)) == SOURCE
+
+def test_roundtrip_preserves_crlf_and_form_feeds():
+    source = "import x\r\n\x0c\r\ndef f():\r\n    return 1\r\n"
+    skeleton, split = parts.split_python("w.py", source)
+    assert parts.compose("w.py", skeleton, dict(split)) == source
+
+@pytest.mark.parametrize("source", [
+    "def broken(:\n",
+    "x = 1\n",
+    "# @spatia:part f\ndef f():\n    pass\n",
+])
+def test_unsplittable_sources(source):
+    assert parts.split_python("x.py", source) is None
+
+def test_redefined_names_stay_inline():
+    source = "def f():\n    return 1\n\ndef f():\n    return 2\n\ndef g():\n    pass\n"
+    skeleton, split = parts.split_python("x.py", source)
+    assert [pid for pid, _ in split] == ["x.py::g"]
+    assert "return 2" in skeleton
+
+# --- Split mode in shatter ---
+
+def test_shatter_split_creates_part_atoms(project):
+    shatter.shatter(project, split=True)
+    atoms = live(project)
+    assert set(atoms) == {"mod.py", "mod.py::first", "mod.py::Widget", "mod.py::Widget.grow", "mod.py::Widget.fetch", "mod.py::last"}
+    types = dict(project.execute("SELECT id, type FROM atoms"))
+    assert types["mod.py"] == "file"
+    assert types["mod.py::Widget.grow"] == "part"
+    assert parts.compose("mod.py", atoms["mod.py"], atoms) == SOURCE
+
+def test_editing_one_function_only_fossilizes_that_part(project, tmp_path):
+    shatter.shatter(project, split=True)
+    (tmp_path / "mod.py").write_text(SOURCE.replace("self.size + 1", "self.size + 2"))
+
+    result = shatter.shatter_paths(project, ["mod.py"], split=True)
+    assert result["atom_ids"] == ["mod.py::Widget.grow"]
+    assert result["fossilized"] == 1
+    fossil_atom, fossil_hash = project.execute("SELECT atom_id, hash FROM fossils").fetchone()
+    assert fossil_atom == "mod.py::Widget.grow"
+    assert "self.size + 1" in blobs.get_blob(project.cursor(), fossil_hash)
+
+def test_removed_definitions_are_retired(project, tmp_path):
+    shatter.shatter(project, split=True)
+    project.execute("INSERT INTO geometry (atom_id, x, y) VALUES ('mod.py::Widget.fetch', 5, 6)")
+    project.commit()
+    source = SOURCE.replace("    async def fetch(self):\n        return await thing()\n", "")
+    (tmp_path / "mod.py").write_text(source)
+
+    shatter.shatter_paths(project, ["mod.py"], split=True)
+    atoms = live(project)
+    assert "mod.py::Widget.fetch" not in atoms
+    assert parts.compose("mod.py", atoms["mod.py"], atoms) == source
+    assert project.execute("SELECT x, y FROM fossils WHERE atom_id = 'mod.py::Widget.fetch'").fetchone() == (5, 6)
+    assert project.execute("SELECT COUNT(*) FROM geometry WHERE atom_id = 'mod.py::Widget.fetch'").fetchone()[0] == 0
+
+def age(path):
+    # Outside the racy window, so the manifest trusts the stat tuple
+    os.utime(path, (1_000_000_000, 1_000_000_000))
+
+def test_turning_split_off_retires_all_parts(project):
+    age("mod.py")
+    shatter.shatter(project, split=True)
+    shatter.shatter(project, split=False)
+    assert set(live(project)) == {"mod.py"}
+    assert live(project)["mod.py"] == SOURCE
+
+def test_split_mode_change_rereads_unchanged_files(project, tmp_path):
+    age("mod.py")
+    (tmp_path / "notes.txt").write_text("plain\n")
+    age("notes.txt")
+    shatter.shatter(project)
+    assert shatter.shatter(project)["unchanged"] == 2
+
+    # Same stat tuples, new mode: only the Python file is read again
+    result = shatter.shatter(project, split=True)
+    assert (result["shattered"], result["unchanged"]) == (1, 1)
+    assert "mod.py::Widget.grow" in live(project)
+    assert shatter.shatter(project, split=True)["unchanged"] == 2
+
+    # The tree watcher applies a mode change to the paths it is given, and
+    # leaves recording it to the next full walk
+    assert shatter.shatter_paths(project, ["mod.py"], split=False)["atom_ids"] == ["mod.py"]
+    assert set(live(project)) == {"mod.py", "notes.txt"}
+    assert shatter.get_state(project, 'split') == '1'
+
+def test_non_python_files_are_not_split(project, tmp_path):
+    (tmp_path / "notes.txt").write_text("def f():\n    pass\n")
+    shatter.shatter(project, split=True)
+    assert "notes.txt::f" not in live(project)
+
+def test_materialize_composes_split_files(project, tmp_path):
+    shatter.shatter(project, split=True)
+    os.remove("mod.py")
+    load_script('spatia-materialize.py').materialize(project)
+    assert (tmp_path / "mod.py").read_text() == SOURCE
+
+def test_witness_verifies_parts_as_the_whole_file(project):
+    shatter.shatter(project, split=True)
+    source = load_script('spatia-atom-source.py')
+    # A method part alone is an indented fragment; the witness gets the file
+    assert live(project)["mod.py::Widget.grow"].startswith("    def grow")
+    assert source.atom_source(project, "mod.py::Widget.grow") == SOURCE
+    assert source.atom_source(project, "mod.py") == SOURCE
+    compile(source.atom_source(project, "mod.py::Widget"), "mod.py", "exec")
+
+    project.execute("DELETE FROM atoms WHERE id = 'mod.py'")
+    assert source.atom_source(project, "mod.py::Widget.grow").startswith("def grow(self):")
+    project.execute("INSERT INTO atoms (id, content) VALUES ('notes.txt', 'plain')")
+    assert source.atom_source(project, "notes.txt") == "plain"
+    assert source.atom_source(project, "missing") is None
@@ -0,0 +1,91 @@
+import pytest
+import os
+from unittest.mock import patch, AsyncMock
+from backend import blobs, shatter
+
+def test_batch_hollow_constructs_one_transaction(client, mock_db):
+    commits = []
+    mock_db.set_trace_callback(lambda sql: commits.append(sql) if sql.strip().upper() == "COMMIT" else None)
+    items = [{"path": f"construct_{i}", "content": f"body {i}"} for i in range(200)]
+
+    with patch('backend.main.manager.broadcast', new_callable=AsyncMock) as mock_broadcast:
+        response = client.post("/api/shatter/batch", json={"items": items})
+    mock_db.set_trace_callback(None)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["atom_ids"] == [f"construct_{i}" for i in range(200)]
+    assert len(data["changed"]) == 200
+    assert data["errors"] == []
+    assert len(commits) == 1
+
+    mock_broadcast.assert_called_once()
+    event = mock_broadcast.call_args[0][0]
+    assert event["type"] == "update"
+    assert len(event["atom_ids"]) == 200
+
+    cursor = mock_db.cursor()
+    assert cursor.execute("SELECT COUNT(*) FROM atoms").fetchone()[0] == 200
+    assert cursor.execute("SELECT COUNT(*) FROM geometry").fetchone()[0] == 200
+
+def test_batch_mixes_files_and_constructs(client, mock_db, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.py").write_text("print('v1')")
+    (tmp_path / "data.bin").write_bytes(b"\xff\xfe\x00")
+
+    items = [
+        {"path": "src/app.py"},
+        {"path": "idea", "content": "a hollow construct"},
+        {"path": "missing.txt"},
+        {"path": "data.bin"},
+    ]
+    with patch('backend.main.manager.broadcast', new_callable=AsyncMock):
+        data = client.post("/api/shatter/batch", json={"items": items}).json()
+
+    assert data["atom_ids"] == [os.path.join("src", "app.py"), "idea"]
+    assert [e["path"] for e in data["errors"]] == ["missing.txt", "data.bin"]
+
+    cursor = mock_db.cursor()
+    row = cursor.execute("SELECT content, domain FROM atoms WHERE id = ?", (os.path.join("src", "app.py"),)).fetchone()
+    assert tuple(row) == ("print('v1')", "Software")
+    # Files are tracked by the stat manifest, hollow constructs are not
+    assert cursor.execute("SELECT COUNT(*) FROM shatter_manifest").fetchone()[0] == 1
+
+def test_batch_fossilizes_changed_content(client, mock_db):
+    with patch('backend.main.manager.broadcast', new_callable=AsyncMock):
+        client.post("/api/shatter/batch", json={"items": [{"path": "note", "content": "v1"}]})
+        data = client.post("/api/shatter/batch", json={"items": [
+            {"path": "note", "content": "v2"},
+            {"path": "other", "content": "same"},
+        ]}).json()
+        again = client.post("/api/shatter/batch", json={"items": [{"path": "other", "content": "same"}]}).json()
+
+    assert data["fossilized"] == 1
+    assert again["changed"] == []
+    cursor = mock_db.cursor()
+    fossil_hash = cursor.execute("SELECT hash FROM fossils WHERE atom_id = 'note'").fetchone()[0]
+    assert blobs.get_blob(cursor, fossil_hash) == "v1"
+
+def test_batch_rejects_empty_request(client):
+    assert client.post("/api/shatter/batch", json={"items": []}).status_code == 400
+
+def test_single_shatter_passes_large_content(client, mock_db):
+    # Content no longer travels on a subprocess argv
+    content = "x" * (4 * 1024 * 1024)
+    with patch('backend.main.manager.broadcast', new_callable=AsyncMock):
+        response = client.post("/api/shatter", json={"path": "big", "content": content})
+    assert response.status_code == 200
+    assert mock_db.execute("SELECT length(content) FROM atoms WHERE id = 'big'").fetchone()[0] == len(content)
+
+def test_shatter_items_does_not_commit(tmp_path):
+    import sqlite3
+    db = tmp_path / "s.db"
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE atoms (id TEXT PRIMARY KEY, type TEXT, content TEXT, hash TEXT, domain TEXT, status INTEGER, last_witnessed TEXT)")
+    conn.execute("CREATE TABLE geometry (atom_id TEXT PRIMARY KEY, x INTEGER, y INTEGER)")
+    conn.commit()
+    shatter.shatter_items(conn, [("a", "content")])
+    conn.rollback()
+    assert conn.execute("SELECT COUNT(*) FROM atoms").fetchone()[0] == 0
+    conn.close()
@@ -0,0 +1,51 @@
+import pytest
+from backend import blobs, db_query, shatter
+
+@pytest.fixture
+def project(project, tmp_path):
+    for i in range(10):
+        (tmp_path / f"f{i}.txt").write_text(f"v1 {i}")
+    return project
+
+def test_unchanged_hashes_never_select_content(project):
+    shatter.shatter(project)
+
+    statements = []
+    project.set_trace_callback(statements.append)
+    result = shatter.shatter(project, full=True)
+    project.set_trace_callback(None)
+
+    assert result["shattered"] == 10
+    assert result["written"] == 0
+    assert not [s for s in statements if "SELECT id, content" in s]
+
+def test_changed_atoms_are_fossilized_in_bulk(project, tmp_path):
+    shatter.shatter(project)
+    project.execute("INSERT INTO geometry (atom_id, x, y) VALUES ('f3.txt', 7, 9)")
+    project.commit()
+
+    (tmp_path / "f3.txt").write_text("v2 3")
+    (tmp_path / "f5.txt").write_text("v2 5")
+
+    statements = []
+    project.set_trace_callback(statements.append)
+    result = shatter.shatter(project, full=True)
+    project.set_trace_callback(None)
+
+    assert result["written"] == 2
+    assert result["fossilized"] == 2
+    # One prefetch for the changed set rather than one SELECT per file
+    assert len([s for s in statements if "FROM atoms a LEFT JOIN geometry" in s]) == 1
+
+    cursor = project.cursor()
+    fossils = {atom_id: blobs.get_blob(cursor, h) for atom_id, h in project.execute("SELECT atom_id, hash FROM fossils").fetchall()}
+    assert fossils == {"f3.txt": "v1 3", "f5.txt": "v1 5"}
+    assert project.execute("SELECT x, y FROM fossils WHERE atom_id = 'f3.txt'").fetchone() == (7, 9)
+
+    live = project.execute("SELECT content FROM atoms WHERE id = 'f3.txt'").fetchone()[0]
+    assert live == "v2 3"
+
+def test_fetch_rows_chunks_large_id_sets(project):
+    project.executemany("INSERT INTO atoms (id, hash) VALUES (?, 'h')", [(f"id{i}",) for i in range(1200)])
+    rows = db_query.fetch_rows(project.cursor(), "SELECT id FROM atoms WHERE id IN ({placeholders})", [f"id{i}" for i in range(1200)])
+    assert len(rows) == 1200
@@ -1,16 +1,5 @@
 import pytest
-import importlib.util
-import os
-import sys
-
-# Load spatia-shatter.py module dynamically since it has a dash in the name
-MODULE_PATH = os.path.join(os.path.dirname(__file__), '../.spatia/bin/spatia-shatter.py')
-spec = importlib.util.spec_from_file_location("spatia_shatter", MODULE_PATH)
-spatia_shatter = importlib.util.module_from_spec(spec)
-sys.modules["spatia_shatter"] = spatia_shatter
-spec.loader.exec_module(spatia_shatter)
-
-detect_domain = spatia_shatter.detect_domain
+from backend.shatter import detect_domain
 
 def test_detect_domain_culinary():
     assert detect_domain("pasta.recipe", "content") == "Culinary"
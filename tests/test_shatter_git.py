@@ -0,0 +1,95 @@
+import pytest
+import os
+import sqlite3
+import subprocess
+from backend import shatter
+
+def git(root, *args):
+    subprocess.run(['git', *args], cwd=root, check=True, capture_output=True)
+
+def commit_all(root, message="change"):
+    git(root, 'add', '-A')
+    git(root, '-c', 'user.name=t', '-c', 'user.email=t@t', 'commit', '-q', '-m', message)
+
+@pytest.fixture
+def repo(project, tmp_path):
+    git(tmp_path, 'init', '-q')
+    (tmp_path / ".gitignore").write_text(".spatia/\n")
+    (tmp_path / "a.py").write_text("A = 1")
+    (tmp_path / "b.py").write_text("B = 1")
+    commit_all(tmp_path, "initial")
+    return project
+
+def head(root):
+    return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=root, capture_output=True, text=True).stdout.strip()
+
+def live_content(conn, atom_id):
+    row = conn.execute("SELECT content FROM atoms WHERE id = ?", (atom_id,)).fetchone()
+    return row[0] if row else None
+
+def test_first_git_run_walks_and_records_head(repo, tmp_path):
+    result = shatter.shatter_git(repo)
+    assert result['mode'] == 'walk'
+    assert live_content(repo, "a.py") == "A = 1"
+    assert shatter.get_state(repo, 'git_head') == head(tmp_path)
+
+def test_git_delta_covers_commits_worktree_and_deletions(repo, tmp_path):
+    shatter.shatter_git(repo)
+
+    (tmp_path / "a.py").write_text("A = 2")
+    commit_all(tmp_path)
+    (tmp_path / "b.py").unlink()
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "new.py").write_text("N = 1")
+    (tmp_path / "untouched.txt").write_text("never reported")
+    commit_all(tmp_path)
+    (tmp_path / "untouched.txt").write_text("changed in the worktree")
+
+    result = shatter.shatter_git(repo)
+    assert result['mode'] == 'git'
+    assert sorted(result['atom_ids']) == ["a.py", os.path.join("sub", "new.py"), "untouched.txt"]
+    assert result['deleted'] == ["b.py"]
+    assert live_content(repo, "a.py") == "A = 2"
+    assert shatter.get_state(repo, 'git_head') == head(tmp_path)
+
+def test_git_delta_skips_the_walk(repo, tmp_path):
+    shatter.shatter_git(repo)
+    (tmp_path / "a.py").write_text("A = 3")
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(shatter, 'iter_candidates', lambda *a, **k: pytest.fail("tree walk in --git mode"))
+        result = shatter.shatter_git(repo)
+    assert result['atom_ids'] == ["a.py"]
+
+def test_reverted_dirty_file_is_rechecked(repo, tmp_path):
+    shatter.shatter_git(repo)
+    (tmp_path / "a.py").write_text("scratch edit")
+    shatter.shatter_git(repo)
+    assert live_content(repo, "a.py") == "scratch edit"
+
+    git(tmp_path, 'checkout', '--', 'a.py')
+    result = shatter.shatter_git(repo)
+    assert result['atom_ids'] == ["a.py"]
+    assert live_content(repo, "a.py") == "A = 1"
+
+def test_unknown_sync_point_falls_back_to_walk(repo):
+    shatter.shatter_git(repo)
+    shatter.set_state(repo, {'git_head': 'f' * 40})
+    assert shatter.shatter_git(repo)['mode'] == 'walk'
+
+def test_split_mode_change_falls_back_to_walk(repo, tmp_path):
+    (tmp_path / "a.py").write_text("def f():\n    return 1\n")
+    commit_all(tmp_path)
+    shatter.shatter_git(repo)
+    # git reports nothing new, but every Python file has to be split
+    result = shatter.shatter_git(repo, split=True)
+    assert result['mode'] == 'walk'
+    assert live_content(repo, "a.py::f") == "def f():\n    return 1\n"
+    assert shatter.shatter_git(repo, split=True)['mode'] == 'git'
+
+def test_git_mode_outside_repository(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    conn = sqlite3.connect(":memory:")
+    with pytest.raises(shatter.GitUnavailable):
+        shatter.shatter_git(conn)
+    conn.close()
@@ -0,0 +1,81 @@
+import pytest
+import os
+from backend import shatter
+
+@pytest.fixture
+def project(project, tmp_path):
+    (tmp_path / "a.py").write_text("print('a')")
+    (tmp_path / "b.txt").write_text("b")
+    return project
+
+def age(path, seconds=60):
+    # Push mtime out of the racy window so the stat tuple is trusted
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns - seconds * 1_000_000_000))
+
+def test_unchanged_files_are_skipped(project):
+    age("a.py")
+    age("b.txt")
+
+    first = shatter.shatter(project)
+    assert first["shattered"] == 2
+
+    second = shatter.shatter(project)
+    assert second["shattered"] == 0
+    assert second["unchanged"] == 2
+
+def test_modified_file_is_reshattered(project):
+    age("a.py")
+    age("b.txt")
+    shatter.shatter(project)
+
+    with open("a.py", "w") as f:
+        f.write("print('changed')")
+    age("a.py", 30)
+
+    result = shatter.shatter(project)
+    assert result["shattered"] == 1
+    row = project.execute("SELECT content FROM atoms WHERE id = 'a.py'").fetchone()
+    assert row[0] == "print('changed')"
+
+def test_racy_files_are_rehashed(project):
+    # Fresh mtimes fall inside the racy window
+    shatter.shatter(project)
+    result = shatter.shatter(project)
+    assert result["unchanged"] == 0
+    # Re-hashing identical content must not create fossils
+    fossils = project.execute("SELECT COUNT(*) FROM fossils").fetchone()[0]
+    assert fossils == 0
+
+def test_racy_files_from_shatter_items_are_rehashed(project):
+    shatter.shatter_items(project, [("a.py", None)])
+    project.commit()
+    # Rewritten within the same mtime tick, at the same size
+    st = os.stat("a.py")
+    with open("a.py", "w") as f:
+        f.write("print('b')")
+    os.utime("a.py", ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert shatter.stat_key(os.stat("a.py")) == shatter.stat_key(st)
+
+    shatter.shatter(project)
+    assert project.execute("SELECT content FROM atoms WHERE id = 'a.py'").fetchone()[0] == "print('b')"
+
+def test_deleted_files_are_reported(project):
+    age("a.py")
+    age("b.txt")
+    shatter.shatter(project)
+
+    os.remove("b.txt")
+    result = shatter.shatter(project)
+    assert result["deleted"] == ["b.txt"]
+    paths = [r[0] for r in project.execute("SELECT path FROM shatter_manifest")]
+    assert "b.txt" not in paths
+
+def test_full_flag_rescans_everything(project):
+    age("a.py")
+    age("b.txt")
+    shatter.shatter(project)
+
+    result = shatter.shatter(project, full=True)
+    assert result["shattered"] == 2
+    assert result["unchanged"] == 0
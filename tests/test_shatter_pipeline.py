@@ -0,0 +1,47 @@
+import pytest
+from unittest.mock import patch
+from backend import shatter
+
+@pytest.fixture
+def project(project, tmp_path):
+    for i in range(40):
+        sub = tmp_path / f"pkg{i % 4}"
+        sub.mkdir(exist_ok=True)
+        (sub / f"mod{i}.py").write_text(f"VALUE = {i}\n")
+    (tmp_path / "blob.bin").write_bytes(b"\xff\xfe\x00binary")
+    return project
+
+def snapshot(conn):
+    return sorted(conn.execute("SELECT id, hash, domain FROM atoms"))
+
+def test_parallel_matches_serial(project, tmp_path):
+    shatter.shatter(project, full=True, jobs=1)
+    serial = snapshot(project)
+
+    project.execute("DELETE FROM atoms")
+    project.execute("DELETE FROM shatter_manifest")
+    project.commit()
+
+    result = shatter.shatter(project, full=True, jobs=8)
+    assert snapshot(project) == serial
+    assert result["shattered"] == 40
+    assert result["bytes"] > 0
+
+def test_small_write_batches_commit(project):
+    with patch.object(shatter, 'WRITE_BATCH_SIZE', 3):
+        shatter.shatter(project, jobs=4)
+    assert len(snapshot(project)) == 40
+
+def test_binary_files_are_recorded_in_manifest(project):
+    shatter.shatter(project, jobs=2)
+    row = project.execute("SELECT hash FROM shatter_manifest WHERE path = 'blob.bin'").fetchone()
+    assert row is not None
+    assert row[0] is None
+    assert project.execute("SELECT 1 FROM atoms WHERE id = 'blob.bin'").fetchone() is None
+
+def test_full_scan_reports_throughput(project, capsys):
+    shatter.shatter(project, jobs=3)
+    out = capsys.readouterr().out
+    assert "files/sec" in out
+    assert "MB/sec" in out
+    assert "(3 jobs" in out
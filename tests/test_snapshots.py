@@ -0,0 +1,158 @@
+import os
+import sqlite3
+import zlib
+import pytest
+from unittest.mock import patch, AsyncMock
+from fastapi.testclient import TestClient
+from backend import migrations, snapshots
+from backend.main import app, graph
+
+@pytest.fixture
+def ws(tmp_path):
+    ws_path = tmp_path / "workspaces" / "ws"
+    ws_path.mkdir(parents=True)
+    conn = sqlite3.connect(ws_path / "sentinel.db")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("CREATE TABLE atoms (id TEXT PRIMARY KEY, type TEXT, domain TEXT, status INTEGER DEFAULT 1, content TEXT, hash TEXT, last_witnessed TEXT)")
+    migrations.migrate(conn)
+    conn.commit()
+    yield str(ws_path), conn
+    conn.close()
+
+def write_atoms(conn, start, count):
+    # Incompressible content, so chunk dedup is what keeps snapshots small
+    conn.executemany("INSERT INTO atoms (id, content) VALUES (?, ?) ON CONFLICT(id) DO UPDATE SET content = excluded.content",
+                     [(f"a{i}", os.urandom(1000).hex()) for i in range(start, start + count)])
+    conn.commit()
+
+def atom_ids(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {row[0] for row in conn.execute("SELECT id FROM atoms")}
+    finally:
+        conn.close()
+
+@pytest.mark.parametrize("format", ["full", "incremental"])
+def test_snapshot_includes_wal_and_restores(ws, format):
+    ws_path, conn = ws
+    write_atoms(conn, 0, 50)
+    # Committed, but still only in the WAL (conn keeps it from being checkpointed on close)
+    assert os.path.getsize(os.path.join(ws_path, "sentinel.db-wal")) > 0
+    snapshot = snapshots.take(ws_path, format)
+    assert snapshot["format"] == format
+
+    conn.execute("DELETE FROM atoms")
+    write_atoms(conn, 100, 5)
+    assert snapshots.restore(ws_path, snapshot["id"]) == format
+    # The open connection sees the restored contents
+    assert {row[0] for row in conn.execute("SELECT id FROM atoms")} == {f"a{i}" for i in range(50)}
+    assert conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+
+def test_writers_are_not_blocked_and_copy_is_consistent(ws):
+    ws_path, conn = ws
+    write_atoms(conn, 0, 500)
+    writer = sqlite3.connect(os.path.join(ws_path, "sentinel.db"), timeout=0.1)
+    steps = []
+
+    def progress(remaining, total):
+        # A write lands mid-copy; it must neither wait nor leak into the snapshot
+        steps.append(remaining)
+        if len(steps) == 2:
+            writer.execute("INSERT INTO atoms (id) VALUES ('late')")
+            writer.commit()
+
+    dest = os.path.join(ws_path, "copy.db")
+    snapshots.backup(os.path.join(ws_path, "sentinel.db"), dest, pages=20, progress=progress)
+    writer.close()
+    assert len(steps) > 2 and steps[-1] == 0
+    assert atom_ids(dest) == {f"a{i}" for i in range(500)}
+
+def test_incremental_snapshots_share_chunks(ws):
+    ws_path, conn = ws
+    write_atoms(conn, 0, 2000)
+    first = snapshots.take(ws_path, "incremental")
+    write_atoms(conn, 0, 3)
+    second = snapshots.take(ws_path, "incremental")
+    assert second["size"] >= first["size"] > 1_000_000
+    assert second["stored"] < first["stored"] / 10
+
+    store = sqlite3.connect(os.path.join(ws_path, snapshots.STORE_NAME))
+    chunks = store.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+    snapshots.delete(ws_path, first["id"])
+    # Chunks only the first snapshot used are gone, shared ones stay
+    remaining = store.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+    assert 0 < remaining < chunks
+    store.close()
+    snapshots.restore(ws_path, second["id"])
+    assert atom_ids(os.path.join(ws_path, "sentinel.db")) == {f"a{i}" for i in range(2000)}
+
+def test_ids_listing_and_lookup(ws):
+    ws_path, conn = ws
+    taken = [snapshots.take(ws_path, "full"), snapshots.take(ws_path, "incremental"), snapshots.take(ws_path, "full")]
+    # Same second: suffixed ids, still unique
+    assert len({s["id"] for s in taken}) == 3
+    listed = snapshots.list_snapshots(ws_path)
+    assert [s["id"] for s in listed] == [s["id"] for s in reversed(taken)]
+    assert {(s["id"], s["format"]) for s in listed} == {(s["id"], s["format"]) for s in taken}
+
+    for bad in ("nope", "../sentinel", taken[0]["id"] + "0"):
+        with pytest.raises(snapshots.SnapshotNotFound):
+            snapshots.find(ws_path, bad)
+    snapshots.delete(ws_path, taken[0]["id"])
+    assert len(snapshots.list_snapshots(ws_path)) == 2
+
+def test_corrupt_incremental_snapshot_is_not_restored(ws):
+    ws_path, conn = ws
+    write_atoms(conn, 0, 10)
+    snapshot = snapshots.take(ws_path, "incremental")
+    store = sqlite3.connect(os.path.join(ws_path, snapshots.STORE_NAME))
+    store.execute("UPDATE chunks SET data = ?", (zlib.compress(b"garbage"),))
+    store.commit()
+    store.close()
+    with pytest.raises(ValueError):
+        snapshots.restore(ws_path, snapshot["id"])
+    assert len(atom_ids(os.path.join(ws_path, "sentinel.db"))) == 10
+
+def test_snapshot_api(ws, monkeypatch):
+    ws_path, conn = ws
+    monkeypatch.chdir(os.path.dirname(os.path.dirname(ws_path)))
+    write_atoms(conn, 0, 5)
+    client = TestClient(app)
+
+    response = client.post("/api/workspaces/ws/snapshot", json={"format": "incremental"})
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["status"], data["format"]) == ("snapshotted", "incremental")
+    assert client.post("/api/workspaces/ws/snapshot", json={"format": "tar"}).status_code == 422
+    full = client.post("/api/workspaces/ws/snapshot").json()
+    assert full["snapshot"] == f"sentinel.snap.{full['id']}.db"
+
+    listed = client.get("/api/workspaces/ws/snapshots").json()
+    assert {s["id"] for s in listed} == {data["id"], full["id"]}
+    assert client.get("/api/workspaces/missing/snapshots").status_code == 404
+
+    conn.execute("DELETE FROM atoms")
+    conn.commit()
+    response = client.post(f"/api/workspaces/ws/snapshots/{data['id']}/restore")
+    assert response.json() == {"status": "restored", "workspace": "ws", "snapshot": data["id"], "format": "incremental"}
+    assert conn.execute("SELECT COUNT(*) FROM atoms").fetchone()[0] == 5
+    assert client.post("/api/workspaces/ws/snapshots/20000101000000/restore").status_code == 404
+
+    assert client.delete(f"/api/workspaces/ws/snapshots/{full['id']}").json()["status"] == "deleted"
+    assert client.delete(f"/api/workspaces/ws/snapshots/{full['id']}").status_code == 404
+
+def test_restoring_the_active_workspace_resets_state(ws, monkeypatch):
+    ws_path, conn = ws
+    monkeypatch.chdir(os.path.dirname(os.path.dirname(ws_path)))
+    write_atoms(conn, 0, 3)
+    client = TestClient(app)
+    snapshot_id = client.post("/api/workspaces/ws/snapshot").json()["id"]
+    write_atoms(conn, 3, 2)
+
+    with patch("backend.main.DB_PATH", os.path.join(ws_path, "sentinel.db")), \
+         patch("backend.main.broadcast_event", new_callable=AsyncMock) as broadcast:
+        assert len(client.get("/api/atoms").json()) == 5
+        client.post(f"/api/workspaces/ws/snapshots/{snapshot_id}/restore")
+        broadcast.assert_awaited_with({"type": "world_reset"})
+        assert graph.seq is not None
+        assert len(client.get("/api/atoms").json()) == 3
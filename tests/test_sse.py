@@ -81,7 +81,10 @@ async def test_summon_flow(server_url):
     import sqlite3
     db_path = ".spatia/sentinel.db"
     with sqlite3.connect(db_path) as conn:
-        conn.execute("INSERT OR REPLACE INTO atoms (id, type, content, status) VALUES (?, 'file', ';; intent', 0)", (atom_id,))
+        conn.execute("""
+            INSERT INTO atoms (id, type, content, status) VALUES (?, 'file', ';; intent', 0)
+            ON CONFLICT(id) DO UPDATE SET type = excluded.type, content = excluded.content, status = excluded.status
+        """, (atom_id,))
         conn.commit()
 
     # Mocking Projector is tricky since it's a global instance in backend/main.py imported from backend.projector
@@ -0,0 +1,113 @@
+import pytest
+import os
+import sqlite3
+from unittest.mock import patch, AsyncMock, MagicMock
+from backend.main import reshatter_paths, watch_project_tree
+from backend import shatter
+
+@pytest.fixture
+def project(project, tmp_path):
+    (tmp_path / "a.py").write_text("A = 1")
+    (tmp_path / "b.py").write_text("B = 1")
+    return project
+
+# --- shatter_paths (spatia-shatter.py --paths) ---
+
+def test_shatter_paths_reports_only_changed_atoms(project, tmp_path):
+    first = shatter.shatter_paths(project, ["a.py", "b.py"])
+    assert sorted(first["atom_ids"]) == ["a.py", "b.py"]
+
+    (tmp_path / "a.py").write_text("A = 2")
+    # b.py is touched but its content is identical
+    (tmp_path / "b.py").write_text("B = 1")
+    second = shatter.shatter_paths(project, ["a.py", "b.py"])
+    assert second["atom_ids"] == ["a.py"]
+    assert second["fossilized"] == 1
+
+def test_shatter_paths_skips_ignored_and_reports_deleted(project, tmp_path):
+    shatter.shatter_paths(project, ["a.py", "b.py"])
+    os.makedirs("node_modules")
+    (tmp_path / "node_modules" / "dep.js").write_text("x")
+    os.remove("b.py")
+
+    result = shatter.shatter_paths(project, ["b.py", "node_modules/dep.js", "../outside.py"])
+    assert result["atom_ids"] == []
+    assert result["deleted"] == ["b.py"]
+    assert project.execute("SELECT 1 FROM atoms WHERE id = 'node_modules/dep.js'").fetchone() is None
+
+# --- Backend tree watcher ---
+
+@pytest.mark.asyncio
+async def test_reshatter_paths_broadcasts_exact_atoms(project):
+    shatter.shatter_paths(project, ["b.py"])
+    with patch('backend.main.DB_PATH', '.spatia/sentinel.db'), \
+         patch('backend.main.manager.broadcast', new_callable=AsyncMock) as mock_broadcast:
+        atom_ids = await reshatter_paths(["a.py", "b.py"])
+
+    assert atom_ids == ["a.py"]
+    mock_broadcast.assert_called_once_with({"type": "update", "atom_id": "a.py"})
+    assert project.execute("SELECT x, y FROM geometry WHERE atom_id = 'a.py'").fetchone() == (0, 0)
+
+def test_reshatter_commits_with_its_placement_and_announcements(project):
+    from backend.main import feed, reshatter_and_place
+    project.row_factory = sqlite3.Row
+    feed.poll(project)
+
+    # As on the DB writer: one transaction around the whole reshatter
+    project.execute("BEGIN IMMEDIATE")
+    assert sorted(reshatter_and_place(project, ["a.py", "b.py"])) == ["a.py", "b.py"]
+    assert project.in_transaction
+    other = sqlite3.connect(".spatia/sentinel.db")
+    assert other.execute("SELECT COUNT(*) FROM atoms").fetchone()[0] == 0
+    project.commit()
+    assert other.execute("SELECT COUNT(*) FROM atoms JOIN geometry ON atom_id = id").fetchone()[0] == 2
+    other.close()
+    # Announced in the same commit, so the change feed does not echo them
+    assert [e for e in feed.poll(project) if e["type"] == "atom_changed"] == []
+
+@pytest.mark.asyncio
+async def test_reshatter_paths_runs_in_worker_thread(project):
+    import threading
+    threads = []
+    real = shatter.shatter_paths
+    def recording(conn, paths, **kwargs):
+        threads.append(threading.current_thread())
+        return real(conn, paths, **kwargs)
+
+    with patch('backend.main.DB_PATH', '.spatia/sentinel.db'), \
+         patch('backend.main.shatter.shatter_paths', side_effect=recording), \
+         patch('backend.main.manager.broadcast', new_callable=AsyncMock):
+        assert await reshatter_paths(["a.py"]) == ["a.py"]
+    assert threads and threads[0] is not threading.main_thread()
+
+@pytest.mark.asyncio
+async def test_watch_project_tree_reshatters_changed_paths(tmp_path):
+    changes = MagicMock()
+    changes.__aiter__.return_value = [{(1, str(tmp_path / "x.py")), (2, str(tmp_path / "sub" / "y.py"))}]
+    with patch('backend.main.awatch', return_value=changes) as mock_awatch, \
+         patch('backend.main.reshatter_paths', new_callable=AsyncMock, return_value=["x.py"]) as mock_reshatter:
+        await watch_project_tree(str(tmp_path))
+    mock_reshatter.assert_called_once_with(["sub/y.py", "x.py"])
+    watch_filter = mock_awatch.call_args[1]['watch_filter']
+    assert watch_filter(1, str(tmp_path / "x.py"))
+    assert not watch_filter(1, str(tmp_path / ".spatia" / "sentinel.db"))
+
+@pytest.mark.asyncio
+async def test_watch_project_tree_survives_errors():
+    with patch('backend.main.awatch', side_effect=Exception("boom")):
+        await watch_project_tree(".")
+
+@pytest.mark.asyncio
+async def test_watch_project_tree_reloads_ignore_rules(tmp_path):
+    (tmp_path / "build").mkdir()
+    seen = []
+
+    async def fake_awatch(root, watch_filter, **kwargs):
+        (tmp_path / ".gitignore").write_text("build/\n")
+        yield {(1, str(tmp_path / ".gitignore"))}
+        seen.append(watch_filter(1, str(tmp_path / "build" / "out.o")))
+
+    with patch('backend.main.awatch', fake_awatch), \
+         patch('backend.main.reshatter_paths', new_callable=AsyncMock, return_value=[]):
+        await watch_project_tree(str(tmp_path))
+    assert seen == [False]
@@ -7,25 +7,19 @@ from backend.main import watch_sentinel_db, run_witness_process
 
 @pytest.mark.anyio
 async def test_watch_sentinel_db_flow():
-    """Test that watch_sentinel_db broadcasts events on file changes."""
-    
-    async def mock_changes(*args, **kwargs):
-        yield {('modified', 'sentinel.db')}
+    """Test that watch_sentinel_db broadcasts the change feed's events."""
+    event = {"type": "atom_changed", "ids": ["a.txt"], "seq": 7}
 
-    with patch('backend.main.awatch', side_effect=mock_changes):
-        with patch('backend.main.broadcast_event', new_callable=AsyncMock) as mock_broadcast:
-            await watch_sentinel_db()
-            mock_broadcast.assert_called_with({"type": "db_update"})
+    with patch('backend.main.db.read', new_callable=AsyncMock, side_effect=[[event], Exception("stop")]):
+        with patch('backend.main.DB_WATCH_INTERVAL', 0):
+            with patch('backend.main.broadcast_event', new_callable=AsyncMock) as mock_broadcast:
+                await watch_sentinel_db()
+                mock_broadcast.assert_called_once_with(event)
 
 @pytest.mark.anyio
 async def test_watch_sentinel_db_error_handling():
     """Test that watch_sentinel_db handles exceptions gracefully."""
-    
-    async def mock_error(*args, **kwargs):
-        raise Exception("Watcher crashed")
-        yield # Make it a generator
-
-    with patch('backend.main.awatch', side_effect=mock_error):
+    with patch('backend.main.db.read', new_callable=AsyncMock, side_effect=Exception("Watcher crashed")):
         with patch('builtins.print') as mock_print:
             await watch_sentinel_db()
             mock_print.assert_any_call("Watcher Error: Watcher crashed")
@@ -1,6 +1,7 @@
 
 import pytest
 import asyncio
+import json
 from backend.connection_manager import ConnectionManager
 
 @pytest.mark.asyncio
@@ -48,3 +49,67 @@ async def test_connection_manager_disconnect_idempotency():
     # Should not raise error
     await manager.disconnect(queue)
     assert len(manager.clients) == 0
+
+def queued_types(queue):
+    return [json.loads(payload[len("data: "):])["type"] for _, payload in queue._items]
+
+@pytest.mark.asyncio
+async def test_broadcast_never_waits_for_a_stalled_client():
+    manager = ConnectionManager(maxsize=4, policy="drop_oldest")
+    stalled = await manager.connect()
+    live = await manager.connect()
+    for n in range(100):
+        await asyncio.wait_for(manager.broadcast({"type": "update", "atom_id": f"a{n}"}), 0.1)
+        assert json.loads((await live.get())[len("data: "):])["atom_id"] == f"a{n}"
+    # Bounded: only the newest events are left for the stalled client
+    assert stalled.qsize() == 4 and stalled.dropped == 96
+    assert json.loads((await stalled.get())[len("data: "):])["atom_id"] == "a96"
+
+@pytest.mark.asyncio
+async def test_coalesce_supersedes_events_about_the_same_thing():
+    manager = ConnectionManager(maxsize=3, policy="coalesce")
+    queue = await manager.connect()
+    await manager.broadcast({"type": "clone_progress", "job": "j1", "done": 1})
+    await manager.broadcast({"type": "update", "atom_id": "a"})
+    await manager.broadcast({"type": "clone_progress", "job": "j1", "done": 2})
+    await manager.broadcast({"type": "clone_progress", "job": "j1", "done": 3})
+    assert queued_types(queue) == ["clone_progress", "update", "clone_progress"]
+    assert json.loads(queue._items[-1][1][len("data: "):])["done"] == 3
+    assert queue.coalesced == 1 and queue in manager.clients
+
+    # Nothing to supersede: the client has to resync
+    await manager.broadcast({"type": "world_reset"})
+    assert queue not in manager.clients and manager.resyncs == 1
+    assert queued_types(queue) == ["resync_required"]
+
+@pytest.mark.asyncio
+async def test_disconnect_ends_the_stream_with_resync_required():
+    manager = ConnectionManager(maxsize=2, policy="disconnect")
+    queue = await manager.connect()
+    for n in range(3):
+        await manager.broadcast({"type": "update", "atom_id": "a"})
+    assert await queue.get() == 'data: {"type": "resync_required"}\n\n'
+    assert await asyncio.wait_for(queue.get(), 0.1) is None
+    # Later events no longer reach it
+    await manager.broadcast({"type": "update", "atom_id": "b"})
+    assert queue.empty()
+
+@pytest.mark.asyncio
+async def test_stats_report_depth_per_client():
+    manager = ConnectionManager(maxsize=8)
+    first = await manager.connect()
+    second = await manager.connect()
+    for n in range(5):
+        await manager.broadcast({"type": "update", "atom_id": f"a{n}"})
+    await first.get()
+    stats = manager.stats()
+    assert (stats["policy"], stats["maxsize"], stats["resyncs"]) == ("coalesce", 8, 0)
+    by_id = {client["id"]: client for client in stats["clients"]}
+    assert (by_id[first.id]["depth"], by_id[first.id]["sent"], by_id[first.id]["high_water"]) == (4, 1, 5)
+    assert by_id[second.id]["depth"] == 5
+
+def test_invalid_settings_are_rejected():
+    with pytest.raises(ValueError):
+        ConnectionManager(policy="block")
+    with pytest.raises(ValueError):
+        ConnectionManager(maxsize=0)
@@ -1,4 +1,3 @@
-import os
 import pytest
 from fastapi.testclient import TestClient
 import sqlite3
@@ -6,18 +5,17 @@ import backend.main
 from backend.main import app
 
 client = TestClient(app)
-TEST_DB = "test_sentinel.db"
 
 @pytest.fixture(autouse=True)
-def setup_teardown():
-    # Setup: Override DB_PATH
-    backend.main.DB_PATH = TEST_DB
-    os.environ["SENTINEL_DB"] = TEST_DB
-    if os.path.lexists(TEST_DB):
-        os.remove(TEST_DB)
-    
+def test_db(tmp_path, monkeypatch):
+    # Under tmp_path: the backend's pooled WAL connections outlive the test,
+    # and with them the database's -wal/-shm files
+    path = str(tmp_path / "test_sentinel.db")
+    monkeypatch.setattr(backend.main, "DB_PATH", path)
+    monkeypatch.setenv("SENTINEL_DB", path)
+
     # Initialize DB schema (Partial for what we need)
-    conn = sqlite3.connect(TEST_DB)
+    conn = sqlite3.connect(path)
     cursor = conn.cursor()
     cursor.execute("CREATE TABLE atoms (id TEXT PRIMARY KEY, path TEXT, content TEXT, hash TEXT, domain TEXT, status INTEGER, parent_id TEXT, timestamp TEXT)")
     
@@ -31,14 +29,9 @@ def setup_teardown():
     
     conn.commit()
     conn.close()
-    
-    yield
-    
-    # Teardown
-    if os.path.exists(TEST_DB):
-        os.remove(TEST_DB)
+    return path
 
-def test_witness_success_flow():
+def test_witness_success_flow(test_db):
     """Test full cycle: Claim (1) -> Witness (2) -> Endorsed (3)"""
     
     # 1. Call Witness
@@ -51,12 +44,12 @@ def test_witness_success_flow():
     
     # 2. Verify Final Status
     # Since background task ran synchronously in TestClient, status should be 3 now
-    with sqlite3.connect(TEST_DB) as conn:
+    with sqlite3.connect(test_db) as conn:
         status = conn.execute("SELECT status FROM atoms WHERE id='test_atom_success'").fetchone()[0]
         print(f"[TEST] Final Status for success atom: {status}")
         assert status == 3
 
-def test_witness_failure_flow():
+def test_witness_failure_flow(test_db):
     """Test cycle: Claim (1) -> Witness (2) -> Failure -> Claim (1)"""
     
     print("\n[TEST] Sending failing witness request...")
@@ -64,12 +57,12 @@ def test_witness_failure_flow():
     assert response.status_code == 200
     
     # Verify Revert to 1
-    with sqlite3.connect(TEST_DB) as conn:
+    with sqlite3.connect(test_db) as conn:
         status = conn.execute("SELECT status FROM atoms WHERE id='test_atom_fail'").fetchone()[0]
         print(f"[TEST] Final Status for fail atom: {status}")
         assert status == 1
 
-def test_witness_lisp_intent():
+def test_witness_lisp_intent(test_db):
     """Test Intent: Claim (1) -> Witness (2) -> Endorsed (3) [Skipped Python Check]"""
     
     print("\n[TEST] Sending witness request for Lisp Intent...")
@@ -79,7 +72,7 @@ def test_witness_lisp_intent():
     assert response.json() == {"status": "witnessing", "atom_id": "test_atom_lisp"}
     
     # 2. Verify Final Status
-    with sqlite3.connect(TEST_DB) as conn:
+    with sqlite3.connect(test_db) as conn:
         status = conn.execute("SELECT status FROM atoms WHERE id='test_atom_lisp'").fetchone()[0]
         print(f"[TEST] Final Status for lisp atom: {status}")
         assert status == 3